@@ -5,7 +5,7 @@ Authentication and authorization dependencies
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import Optional
+from typing import Optional, Tuple
 
 from app.core.security import verify_access_token
 from app.models.user import User, UserRole
@@ -51,6 +51,33 @@ async def get_current_user(
     return user
 
 
+def get_near_point(near: Optional[str] = None) -> Optional[Tuple[float, float]]:
+    """
+    Parse a "lat,lng" query parameter.
+    
+    Raises:
+        HTTPException: If near is malformed or out of range
+    """
+    if not near:
+        return None
+    
+    try:
+        lat, lng = (float(v) for v in near.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="near must be 'lat,lng'",
+        )
+    
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="near is out of range",
+        )
+    
+    return lat, lng
+
+
 async def get_current_user_optional(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(
         HTTPBearer(auto_error=False)
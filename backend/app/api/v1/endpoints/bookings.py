@@ -3,22 +3,31 @@ Booking Endpoints
 Slot availability, online & offline bookings
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, File, Query, UploadFile, status
 from datetime import date
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from app.schemas.booking import (
     SlotAvailabilityRequest,
     SlotAvailabilityResponse,
+    AvailabilityMatrixResponse,
+    AvailableBoxesResponse,
     BookingCreate,
     BookingResponse,
     BookingListResponse,
     OfflineBookingCreate,
+    OfflineBookingImport,
+    OfflineImportResponse,
+    RecurringBookingCreate,
+    RecurringBookingResponse,
+    WaitlistJoin,
+    WaitlistEntryResponse,
     BookingCancelRequest,
 )
 from app.schemas.common import SuccessResponse
 from app.services.booking_service import BookingService
-from app.api.deps import get_current_user, get_current_owner
+from app.api.deps import get_current_user, get_current_owner, get_near_point
+from app.core.config import settings
 
 router = APIRouter()
 
@@ -40,6 +49,55 @@ async def check_slot_availability(
     return await BookingService.get_available_slots(box_id, booking_date)
 
 
+@router.get(
+    "/availability",
+    response_model=AvailabilityMatrixResponse,
+    summary="Availability matrix for a date range"
+)
+async def get_availability_matrix(
+    box_id: str,
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+):
+    """
+    Check availability of every slot for each day from `from` to `to`
+    (inclusive) in one request.
+    
+    Each day's `slots` string has one character per entry in
+    `slot_starts`: "1" = available, "0" = booked.
+    """
+    return await BookingService.get_availability_matrix(box_id, from_date, to_date)
+
+
+@router.get(
+    "/available-boxes",
+    response_model=AvailableBoxesResponse,
+    summary="Find boxes free at a time"
+)
+async def search_available_boxes(
+    booking_date: date,
+    start_time: str,  # "18:00"
+    end_time: str,    # "20:00"
+    area: Optional[str] = None,
+    near: Optional[Tuple[float, float]] = Depends(get_near_point),  # ?near=lat,lng
+    radius_km: Optional[float] = Query(None, gt=0, le=settings.NEARBY_MAX_RADIUS_KM),
+):
+    """
+    Find every box (in an area or near a point) with a free slot
+    starting between `start_time` and `end_time` on `booking_date`.
+    
+    Results near a point are sorted by distance, otherwise by rating.
+    """
+    return await BookingService.search_available_boxes(
+        booking_date,
+        start_time,
+        end_time,
+        area=area,
+        near=near,
+        radius_km=radius_km,
+    )
+
+
 @router.post(
     "/",
     response_model=BookingResponse,
@@ -60,6 +118,75 @@ async def create_booking(
     return await BookingService.create_booking(str(current_user.id), request)
 
 
+@router.post(
+    "/recurring",
+    response_model=RecurringBookingResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create weekly recurring booking"
+)
+async def create_recurring_booking(
+    request: RecurringBookingCreate,
+    current_user = Depends(get_current_user)
+):
+    """
+    Book the same slot every week, starting on `start_date`, for `weeks` weeks.
+    
+    - Dates already booked (or in the past) are skipped and listed in `skipped`
+    - Booked dates are held until `hold_expires_at`; pay for all of them
+      with one order (`series_id` in create-order) to confirm the series
+    """
+    return await BookingService.create_recurring_booking(str(current_user.id), request)
+
+
+@router.post(
+    "/waitlist",
+    response_model=WaitlistEntryResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Join slot waitlist"
+)
+async def join_waitlist(
+    request: WaitlistJoin,
+    current_user = Depends(get_current_user)
+):
+    """
+    Wait for a booked-out slot.
+    
+    - When the slot frees up (cancellation or lapsed hold), the first
+      player waiting gets a pending hold and a notification
+    - Pay within the hold time to confirm, as with a normal booking
+    """
+    return await BookingService.join_waitlist(str(current_user.id), request)
+
+
+@router.get(
+    "/waitlist/my",
+    response_model=List[WaitlistEntryResponse],
+    summary="Get my waitlist entries"
+)
+async def get_my_waitlist(
+    current_user = Depends(get_current_user)
+):
+    """
+    Get current user's waitlist entries from today onwards.
+    """
+    return await BookingService.get_user_waitlist(str(current_user.id))
+
+
+@router.delete(
+    "/waitlist/{entry_id}",
+    response_model=SuccessResponse,
+    summary="Leave slot waitlist"
+)
+async def leave_waitlist(
+    entry_id: str,
+    current_user = Depends(get_current_user)
+):
+    """
+    Stop waiting for a slot.
+    """
+    return await BookingService.leave_waitlist(entry_id, str(current_user.id))
+
+
 @router.get(
     "/my-bookings",
     response_model=BookingListResponse,
@@ -69,6 +196,8 @@ async def get_my_bookings(
     status: Optional[str] = None,
     page: int = 1,
     limit: int = 10,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     current_user = Depends(get_current_user)
 ):
     """
@@ -78,7 +207,9 @@ async def get_my_bookings(
         str(current_user.id),
         status=status,
         page=page,
-        limit=limit
+        limit=limit,
+        cursor=cursor,
+        include_total=include_total,
     )
 
 
@@ -122,6 +253,24 @@ async def cancel_booking(
 
 # Owner Endpoints
 
+@router.post(
+    "/{booking_id}/no-show",
+    response_model=SuccessResponse,
+    summary="Mark booking as no-show (Owner)"
+)
+async def mark_no_show(
+    booking_id: str,
+    current_user = Depends(get_current_owner)
+):
+    """
+    Mark a confirmed booking as a no-show (Owner only).
+    
+    - Allowed from the booking's start time until it is auto-completed
+    - Confirmed bookings are completed automatically shortly after they end
+    """
+    return await BookingService.mark_no_show(booking_id, str(current_user.id))
+
+
 @router.post(
     "/offline",
     response_model=BookingResponse,
@@ -145,6 +294,58 @@ async def create_offline_booking(
     )
 
 
+@router.post(
+    "/offline/bulk",
+    response_model=OfflineImportResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Import offline bookings (Owner)"
+)
+async def import_offline_bookings(
+    box_id: str,
+    request: OfflineBookingImport,
+    current_user = Depends(get_current_owner)
+):
+    """
+    Create many offline bookings for a box at once (Owner only).
+    
+    - Rows that overlap an existing booking or an earlier row are rejected
+    - Rejected rows are listed by position (1-based) with the reason
+    """
+    return await BookingService.import_offline_bookings(
+        str(current_user.id),
+        box_id,
+        list(enumerate(request.bookings, start=1)),
+    )
+
+
+@router.post(
+    "/offline/bulk/csv",
+    response_model=OfflineImportResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Import offline bookings from CSV (Owner)"
+)
+async def import_offline_bookings_csv(
+    box_id: str,
+    file: UploadFile = File(...),
+    current_user = Depends(get_current_owner)
+):
+    """
+    Create offline bookings for a box from a CSV file (Owner only).
+    
+    Header row: booking_date, start_time, end_time, customer_name,
+    customer_phone, amount_collected, owner_notes (optional).
+    Rows are numbered from the first line after the header.
+    """
+    rows, rejected = BookingService.parse_offline_csv(await file.read())
+    
+    return await BookingService.import_offline_bookings(
+        str(current_user.id),
+        box_id,
+        rows,
+        rejected,
+    )
+
+
 @router.get(
     "/box/{box_id}",
     response_model=BookingListResponse,
@@ -156,6 +357,8 @@ async def get_box_bookings(
     status: Optional[str] = None,
     page: int = 1,
     limit: int = 10,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     current_user = Depends(get_current_owner)
 ):
     """
@@ -167,5 +370,7 @@ async def get_box_bookings(
         booking_date=booking_date,
         status=status,
         page=page,
-        limit=limit
+        limit=limit,
+        cursor=cursor,
+        include_total=include_total,
     )
@@ -4,6 +4,8 @@ Messaging between players
 """
 
 from fastapi import APIRouter, HTTPException, Depends, WebSocket, WebSocketDisconnect, status
+from bson import ObjectId
+from datetime import date
 from typing import Optional
 
 from app.schemas.message import (
@@ -16,6 +18,7 @@ from app.schemas.message import (
 )
 from app.schemas.common import SuccessResponse
 from app.services.chat_service import ChatService
+from app.services.booking_service import BookingService
 from app.services.websocket_manager import ws_manager
 from app.api.deps import get_current_user, get_current_user_ws
 
@@ -86,16 +89,20 @@ async def get_messages(
     conversation_id: str,
     before: Optional[str] = None,  # Message ID for pagination
     limit: int = 50,
+    include_total: bool = True,
     current_user = Depends(get_current_user)
 ):
     """
     Get messages from a conversation.
+    
+    Pass include_total=false while scrolling to skip the message count.
     """
     return await ChatService.get_messages(
         conversation_id,
         str(current_user.id),
         before=before,
-        limit=limit
+        limit=limit,
+        include_total=include_total,
     )
 
 
@@ -179,6 +186,10 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
     - Connect with JWT token
     - Receive real-time messages
     - Send typing indicators
+    - Watch a box's slots for a date: send
+      {"event": "subscribe_slots", "box_id": ..., "date": "YYYY-MM-DD"};
+      a "slots_snapshot" follows, then a "slot_update" for every change
+      ("held", "booked" or "free") until "unsubscribe_slots"
     """
     user = await get_current_user_ws(token)
     
@@ -214,6 +225,38 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
                     data.get("conversation_id"),
                     user_id
                 )
+            
+            elif data.get("event") in ("subscribe_slots", "unsubscribe_slots"):
+                box_id = data.get("box_id")
+                
+                try:
+                    day = date.fromisoformat(data.get("date") or "")
+                except ValueError:
+                    await websocket.send_json({"event": "slots_error", "message": "date must be YYYY-MM-DD"})
+                    continue
+                
+                if not isinstance(box_id, str) or not ObjectId.is_valid(box_id):
+                    await websocket.send_json({"event": "slots_error", "message": "Invalid box_id"})
+                    continue
+                
+                if data["event"] == "unsubscribe_slots":
+                    ws_manager.unsubscribe_slots(box_id, day, user_id)
+                    continue
+                
+                try:
+                    snapshot = await BookingService.get_available_slots(box_id, day)
+                except HTTPException as e:
+                    await websocket.send_json({"event": "slots_error", "message": e.detail})
+                    continue
+                
+                if not ws_manager.subscribe_slots(box_id, day, user_id):
+                    await websocket.send_json({"event": "slots_error", "message": "Too many slot subscriptions"})
+                    continue
+                
+                await websocket.send_json({
+                    "event": "slots_snapshot",
+                    "data": snapshot.model_dump(mode="json"),
+                })
                 
     except WebSocketDisconnect:
         ws_manager.disconnect(user_id)
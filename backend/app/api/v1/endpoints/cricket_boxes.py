@@ -4,17 +4,20 @@ Browse, search, and view cricket boxes
 """
 
 from fastapi import APIRouter, HTTPException, Depends, Query, status
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
 from app.schemas.cricket_box import (
     CricketBoxCreate,
     CricketBoxUpdate,
     CricketBoxResponse,
     CricketBoxListResponse,
+    AreaCount,
+    BoxSuggestion,
 )
 from app.schemas.common import SuccessResponse
 from app.services.cricket_box_service import CricketBoxService
-from app.api.deps import get_current_user, get_current_owner
+from app.api.deps import get_current_user, get_current_owner, get_near_point
+from app.core.config import settings
 
 router = APIRouter()
 
@@ -35,6 +38,10 @@ async def list_cricket_boxes(
     sort_by: Optional[str] = "rating",  # rating, price, name
     page: int = 1,
     limit: int = 10,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    near: Optional[Tuple[float, float]] = Depends(get_near_point),  # ?near=lat,lng
+    radius_km: Optional[float] = Query(None, gt=0, le=settings.NEARBY_MAX_RADIUS_KM),
 ):
     """
     List all cricket boxes with filters.
@@ -42,8 +49,10 @@ async def list_cricket_boxes(
     - Filter by area (Vesu, Adajan, etc.)
     - Filter by price range
     - Filter by box type (indoor, outdoor)
-    - Filter by facilities
-    - Search by name
+    - Filter by facilities (boxes must have all of them)
+    - Search by name, area or description (best matches first)
+    - Find boxes near a point (`near=21.17,72.83&radius_km=5`), sorted by distance
+    - Pass `next_cursor` back as `cursor` for fast deep pagination
     """
     facilities_list = facilities.split(",") if facilities else None
     
@@ -57,7 +66,11 @@ async def list_cricket_boxes(
         search=search,
         sort_by=sort_by,
         page=page,
-        limit=limit
+        limit=limit,
+        cursor=cursor,
+        include_total=include_total,
+        near=near,
+        radius_km=radius_km,
     )
 
 
@@ -85,6 +98,35 @@ async def get_all_areas():
     return await CricketBoxService.get_all_areas()
 
 
+@router.get(
+    "/areas/counts",
+    response_model=List[AreaCount],
+    summary="Get box count per area"
+)
+async def get_area_counts():
+    """
+    Get number of listed boxes in each area, most boxes first
+    (for popular areas on the homepage).
+    """
+    return await CricketBoxService.get_area_counts()
+
+
+@router.get(
+    "/suggest",
+    response_model=List[BoxSuggestion],
+    summary="Search suggestions"
+)
+async def suggest(
+    q: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(8, ge=1, le=20),
+):
+    """
+    Typeahead suggestions for box names, areas and pincodes.
+    Tolerates a single typo.
+    """
+    return await CricketBoxService.suggest(q, limit)
+
+
 @router.get(
     "/{box_id}",
     response_model=CricketBoxResponse,
@@ -3,7 +3,7 @@ Match Request Endpoints
 Player matching / Find team feature
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, status
 from datetime import date
 from typing import Optional
 
@@ -12,6 +12,7 @@ from app.schemas.match_request import (
     MatchRequestUpdate,
     MatchRequestResponse,
     MatchRequestListResponse,
+    MatchRecommendationListResponse,
     JoinRequestCreate,
 )
 from app.schemas.common import SuccessResponse
@@ -33,6 +34,8 @@ async def list_match_requests(
     status: Optional[str] = "open",
     page: int = 1,
     limit: int = 10,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
 ):
     """
     List all open match requests with filters.
@@ -47,7 +50,9 @@ async def list_match_requests(
         skill_level=skill_level,
         status=status,
         page=page,
-        limit=limit
+        limit=limit,
+        cursor=cursor,
+        include_total=include_total,
     )
 
 
@@ -79,6 +84,8 @@ async def get_my_match_requests(
     status: Optional[str] = None,
     page: int = 1,
     limit: int = 10,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     current_user = Depends(get_current_user)
 ):
     """
@@ -88,7 +95,9 @@ async def get_my_match_requests(
         str(current_user.id),
         status=status,
         page=page,
-        limit=limit
+        limit=limit,
+        cursor=cursor,
+        include_total=include_total,
     )
 
 
@@ -101,6 +110,8 @@ async def get_my_joined_requests(
     status: Optional[str] = None,
     page: int = 1,
     limit: int = 10,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     current_user = Depends(get_current_user)
 ):
     """
@@ -110,10 +121,31 @@ async def get_my_joined_requests(
         str(current_user.id),
         status=status,
         page=page,
-        limit=limit
+        limit=limit,
+        cursor=cursor,
+        include_total=include_total,
     )
 
 
+@router.get(
+    "/recommended",
+    response_model=MatchRecommendationListResponse,
+    summary="Recommended match requests"
+)
+async def get_recommended_requests(
+    limit: int = Query(10, ge=1, le=50),
+    current_user = Depends(get_current_user)
+):
+    """
+    Open match requests ranked for the current player.
+    
+    - Scored on area (own or nearby), skill level, preferred time
+      and spots left
+    - Excludes own requests and ones already joined
+    """
+    return await MatchRequestService.get_recommendations(str(current_user.id), limit)
+
+
 @router.get(
     "/{request_id}",
     response_model=MatchRequestResponse,
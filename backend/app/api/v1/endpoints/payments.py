@@ -33,6 +33,8 @@ async def create_payment_order(
     """
     Create a Razorpay payment order.
     
+    - Pass `booking_id`, or `series_id` to pay for every held date of a
+      recurring series at once
     - Creates order with Razorpay
     - Returns order ID and amount
     """
@@ -3,7 +3,7 @@ Review Endpoints
 Box ratings and reviews
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, status
 from typing import Optional
 
 from app.schemas.review import (
@@ -11,6 +11,9 @@ from app.schemas.review import (
     ReviewUpdate,
     ReviewResponse,
     ReviewListResponse,
+    RatingSummary,
+    RatingSummaryBatchResponse,
+    HelpfulVotesResponse,
     OwnerResponseCreate,
 )
 from app.schemas.common import SuccessResponse
@@ -30,6 +33,8 @@ async def get_box_reviews(
     sort_by: Optional[str] = "recent",  # recent, rating_high, rating_low
     page: int = 1,
     limit: int = 10,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
 ):
     """
     Get all reviews for a cricket box.
@@ -38,7 +43,41 @@ async def get_box_reviews(
         box_id,
         sort_by=sort_by,
         page=page,
-        limit=limit
+        limit=limit,
+        cursor=cursor,
+        include_total=include_total,
+    )
+
+
+@router.get(
+    "/box/{box_id}/summary",
+    response_model=RatingSummary,
+    summary="Get box rating summary"
+)
+async def get_rating_summary(box_id: str):
+    """
+    Average rating, star histogram and aspect averages for a cricket box.
+    
+    Served from the box's running review aggregates.
+    """
+    return await ReviewService.get_rating_summary(box_id)
+
+
+@router.get(
+    "/summaries",
+    response_model=RatingSummaryBatchResponse,
+    summary="Get rating summaries for many boxes"
+)
+async def get_rating_summaries(
+    box_ids: str = Query(..., description="Comma-separated box IDs (max 50)"),
+):
+    """
+    Rating summaries for a list page in one call.
+    
+    Unknown box IDs are left out of the result.
+    """
+    return await ReviewService.get_rating_summaries(
+        [box_id.strip() for box_id in box_ids.split(",") if box_id.strip()]
     )
 
 
@@ -101,6 +140,26 @@ async def delete_review(
     )
 
 
+@router.get(
+    "/helpful/mine",
+    response_model=HelpfulVotesResponse,
+    summary="Get my helpful votes"
+)
+async def get_my_helpful_votes(
+    review_ids: str = Query(..., description="Comma-separated review IDs (max 100)"),
+    current_user = Depends(get_current_user)
+):
+    """
+    Which of the given reviews the current user marked as helpful.
+    
+    Use it to render a page of reviews in one call.
+    """
+    return await ReviewService.get_my_helpful_votes(
+        str(current_user.id),
+        [review_id.strip() for review_id in review_ids.split(",") if review_id.strip()],
+    )
+
+
 @router.post(
     "/{review_id}/helpful",
     response_model=SuccessResponse,
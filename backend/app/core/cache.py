@@ -0,0 +1,180 @@
+"""
+Cache Layer
+Read-through cache for hot catalog reads.
+Uses Redis when reachable, otherwise an in-process TTL store.
+"""
+
+import json
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+
+class InMemoryCacheBackend:
+    """
+    Process-local TTL cache
+    Used in tests/development or when Redis is unavailable
+
+    Invalidation only reaches this worker's store, so TTLs are capped at
+    max_ttl to bound how long other workers serve stale entries. The
+    store holds at most max_entries (expired, then oldest, go first).
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_ttl: Optional[int] = None):
+        # key -> (expires_at, value), oldest write first
+        self._store: Dict[str, Tuple[float, str]] = {}
+        self._max_entries = max_entries or settings.MEMORY_CACHE_MAX_ENTRIES
+        self._max_ttl = max_ttl or settings.MEMORY_CACHE_MAX_TTL_SECONDS
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._store.get(key)
+
+        if entry is None:
+            return None
+
+        if entry[0] <= time.monotonic():
+            self._store.pop(key, None)
+            return None
+
+        return entry[1]
+
+    def _prune(self, now: float):
+        for key in [k for k, (expires, _) in self._store.items() if expires <= now]:
+            del self._store[key]
+
+        # Dicts keep insertion order, so the first keys are the oldest writes
+        while len(self._store) >= self._max_entries:
+            del self._store[next(iter(self._store))]
+
+    async def set(self, key: str, value: str, ttl: int):
+        now = time.monotonic()
+
+        self._store.pop(key, None)  # Rewrites move to the back
+        if len(self._store) >= self._max_entries:
+            self._prune(now)
+
+        self._store[key] = (now + min(ttl, self._max_ttl), value)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._store.pop(key, None)
+
+    async def delete_prefix(self, prefix: str):
+        for key in [k for k in self._store if k.startswith(prefix)]:
+            self._store.pop(key, None)
+
+    async def close(self):
+        self._store.clear()
+
+
+class RedisCacheBackend:
+    """
+    Redis cache shared by all app workers
+    Errors are treated as cache misses so Redis never takes reads down.
+    """
+
+    def __init__(self, url: str):
+        self._client = aioredis.from_url(url, decode_responses=True)
+
+    async def ping(self):
+        await self._client.ping()
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            return await self._client.get(key)
+        except RedisError:
+            return None
+
+    async def set(self, key: str, value: str, ttl: int):
+        try:
+            await self._client.set(key, value, ex=ttl)
+        except RedisError:
+            pass
+
+    async def delete(self, *keys: str):
+        try:
+            if keys:
+                await self._client.delete(*keys)
+        except RedisError:
+            pass
+
+    async def delete_prefix(self, prefix: str):
+        try:
+            keys = [key async for key in self._client.scan_iter(match=f"{prefix}*")]
+            if keys:
+                await self._client.delete(*keys)
+        except RedisError:
+            pass
+
+    async def close(self):
+        await self._client.close()
+
+
+class Cache:
+    """
+    JSON cache facade over the configured backend
+    """
+
+    def __init__(self):
+        self.backend = InMemoryCacheBackend()
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.backend.get(f"{settings.CACHE_KEY_PREFIX}{key}")
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: int):
+        await self.backend.set(
+            f"{settings.CACHE_KEY_PREFIX}{key}",
+            json.dumps(value, default=str),
+            ttl,
+        )
+
+    async def delete(self, *keys: str):
+        await self.backend.delete(*(f"{settings.CACHE_KEY_PREFIX}{k}" for k in keys))
+
+    async def delete_prefix(self, prefix: str):
+        await self.backend.delete_prefix(f"{settings.CACHE_KEY_PREFIX}{prefix}")
+
+
+# Global cache instance
+cache = Cache()
+
+
+async def init_cache():
+    """
+    Select the cache backend on application startup
+    Falls back to the in-process backend if Redis can't be reached
+    """
+    if settings.CACHE_BACKEND != "redis":
+        print(
+            f"🗃️ Using in-memory cache (entries live at most "
+            f"{settings.MEMORY_CACHE_MAX_TTL_SECONDS}s; use Redis with several workers)"
+        )
+        return
+
+    backend = RedisCacheBackend(settings.REDIS_URL)
+
+    try:
+        await backend.ping()
+    except (RedisError, OSError):
+        print(
+            "⚠️ Redis unavailable, falling back to in-memory cache; with several "
+            "workers each keeps its own copy, stale for up to "
+            f"{settings.MEMORY_CACHE_MAX_TTL_SECONDS}s after changes"
+        )
+        await backend.close()
+        return
+
+    cache.backend = backend
+    print("✅ Connected to Redis cache!")
+
+
+async def close_cache():
+    """
+    Close cache backend on application shutdown
+    """
+    await cache.backend.close()
@@ -0,0 +1,17 @@
+"""
+Clock
+Local wall-clock time for booking dates and times
+"""
+
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from app.core.config import settings
+
+
+def local_now() -> datetime:
+    """
+    Current time where the boxes are, as a naive datetime
+    booking_date/start_time/end_time are stored in this local time.
+    """
+    return datetime.now(ZoneInfo(settings.APP_TIMEZONE)).replace(tzinfo=None)
@@ -37,6 +37,8 @@ class Settings(BaseSettings):
     RAZORPAY_KEY_ID: str = ""
     RAZORPAY_KEY_SECRET: str = ""
     RAZORPAY_WEBHOOK_SECRET: str = ""
+    REFUND_RETRY_INTERVAL_SECONDS: int = 300  # Automatic refunds that failed are retried this often
+    REFUND_CLAIM_TIMEOUT_SECONDS: int = 900  # A worker that claimed a refund this long ago is presumed dead
     
     # Twilio (OTP)
     TWILIO_ACCOUNT_SID: str = ""
@@ -52,6 +54,46 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
     
+    # Cache
+    CACHE_BACKEND: str = "redis"  # redis or memory
+    CACHE_KEY_PREFIX: str = "matchbox:"
+    BOX_CACHE_TTL_SECONDS: int = 300  # Box details, featured
+    AREA_CACHE_TTL_SECONDS: int = 86400  # Area counts (refreshed on box changes)
+    BOX_LIST_CACHE_TTL_SECONDS: int = 60  # Filtered box listings
+    MEMORY_CACHE_MAX_ENTRIES: int = 10_000  # In-memory backend only; oldest dropped first
+    MEMORY_CACHE_MAX_TTL_SECONDS: int = 60  # In-memory backend only; other workers aren't invalidated
+    
+    # Nearby search
+    NEARBY_DEFAULT_RADIUS_KM: float = 10.0
+    NEARBY_MAX_RADIUS_KM: float = 50.0
+    
+    # Booking
+    BOOKING_HOLD_MINUTES: int = 10  # Pending bookings hold the slot this long
+    HOLD_SWEEP_INTERVAL_SECONDS: int = 30
+    RECURRING_MAX_WEEKS: int = 26  # Longest weekly series
+    AVAILABILITY_MAX_DAYS: int = 31  # Longest range for the availability matrix
+    AVAILABILITY_SEARCH_MAX_BOXES: int = 200  # Boxes considered by cross-box search
+    OFFLINE_IMPORT_MAX_ROWS: int = 500  # Rows per bulk offline import
+    APP_TIMEZONE: str = "Asia/Kolkata"  # booking_date/start_time/end_time are local to this
+    BOOKING_COMPLETE_GRACE_MINUTES: int = 30  # Owners can mark no-shows until this long after the end
+    BOOKING_LIFECYCLE_INTERVAL_SECONDS: int = 300
+    BOOKING_LIFECYCLE_BATCH_SIZE: int = 500  # Bookings completed per update_many
+    BOOKING_REMINDER_LEAD_MINUTES: List[int] = [60, 15]  # Reminders sent this long before start
+    BOOKING_REMINDER_TICK_SECONDS: int = 30
+    WAITLIST_HOLD_MINUTES: int = 30  # Promoted waitlist users get this long to pay
+    SLOT_HOLD_PUSH_INTERVAL_SECONDS: int = 10  # How often lapsed holds are pushed to slot subscribers
+    
+    # Box name/area typeahead
+    SUGGEST_INDEX_REFRESH_SECONDS: int = 600  # Full rebuild to pick up other workers' writes
+    
+    # Player matching
+    MATCH_INDEX_REFRESH_SECONDS: int = 300  # Recommendation index rebuild, picks up other workers' writes
+    MATCH_EXPIRY_INTERVAL_SECONDS: int = 600
+    MATCH_EXPIRY_BATCH_SIZE: int = 500  # Requests expired per update_many
+    
+    # Pagination
+    COUNT_CACHE_TTL_SECONDS: int = 30  # How long list totals are reused
+    
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:5173", "http://localhost:3000"]
     
@@ -8,6 +8,8 @@ from beanie import init_beanie
 from typing import Optional
 
 from app.core.config import settings
+from app.core.indexes import ensure_index_coverage
+from app.core.migrations import dedupe_reviews, drop_retired_indexes, run_data_migrations
 
 # Import all document models here
 from app.models.user import User
@@ -15,12 +17,30 @@ from app.models.cricket_box import CricketBox
 from app.models.booking import Booking
 from app.models.match_request import MatchRequest
 from app.models.message import Message, Conversation
-from app.models.review import Review
+from app.models.review import Review, ReviewVote
 from app.models.favorite import Favorite
 from app.models.notification import Notification
+from app.models.waitlist import WaitlistEntry
 from app.models.payment import Payment
 
 
+# Every collection Beanie manages
+DOCUMENT_MODELS = [
+    User,
+    CricketBox,
+    Booking,
+    MatchRequest,
+    Message,
+    Conversation,
+    Review,
+    ReviewVote,
+    Favorite,
+    Notification,
+    Payment,
+    WaitlistEntry,
+]
+
+
 class Database:
     """
     Database connection manager
@@ -37,25 +57,30 @@ async def connect_to_mongo():
     """
     print("🔌 Connecting to MongoDB...")
     
+    # Refuse to start if a service query has no supporting index
+    ensure_index_coverage()
+    
     db.client = AsyncIOMotorClient(settings.MONGODB_URL)
     
+    database = db.client[settings.DATABASE_NAME]
+    
+    # Drop indexes older versions created under names now declared
+    # differently (or retired), so they can be rebuilt below
+    await drop_retired_indexes(database, DOCUMENT_MODELS)
+    
+    # Unique indexes can't be built over documents that already clash
+    await dedupe_reviews(database)
+    
     # Initialize Beanie with all document models
+    # Creates missing Settings.indexes; indexes made by hand are left alone
     await init_beanie(
-        database=db.client[settings.DATABASE_NAME],
-        document_models=[
-            User,
-            CricketBox,
-            Booking,
-            MatchRequest,
-            Message,
-            Conversation,
-            Review,
-            Favorite,
-            Notification,
-            Payment,
-        ]
+        database=database,
+        document_models=DOCUMENT_MODELS,
     )
     
+    # Backfill derived fields on documents saved by older versions
+    await run_data_migrations()
+    
     print("✅ Connected to MongoDB successfully!")
 
 
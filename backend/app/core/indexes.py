@@ -0,0 +1,211 @@
+"""
+Index Catalogue
+Query shapes issued by the services and a coverage check against the
+indexes declared in each document's Settings.indexes
+
+The catalogue is kept up to date by hand: the check only validates the
+shapes listed here, so a new service query passes until its shape
+(including any sort) is added.
+"""
+
+import sys
+from typing import List, NamedTuple, Tuple, Type
+
+from beanie import Document
+from pymongo import IndexModel
+
+from app.models.user import User
+from app.models.cricket_box import CricketBox
+from app.models.booking import Booking
+from app.models.match_request import MatchRequest
+from app.models.message import Message, Conversation
+from app.models.review import Review, ReviewVote
+from app.models.favorite import Favorite
+from app.models.notification import Notification
+from app.models.payment import Payment
+from app.models.waitlist import WaitlistEntry
+
+
+class QueryShape(NamedTuple):
+    """
+    A query issued by a service
+
+    equality: fields matched exactly (or with $in), in any order
+    order: fields sorted or range-scanned after the equality match,
+           ending in _id for keyset-paginated lists; every query that
+           sorts must list its sort here
+    Other filters on the query are applied to the index matches.
+    """
+    model: Type[Document]
+    equality: Tuple[str, ...]
+    order: Tuple[str, ...] = ()
+    source: str = ""
+
+
+# Keep in sync with the queries in app/services/ (by hand)
+QUERY_SHAPES: List[QueryShape] = [
+    # Bookings
+    QueryShape(Booking, ("cricket_box_id", "booking_date", "booking_status"),
+               source="BookingService.get_available_slots / create_booking"),
+    QueryShape(Booking, ("booking_status",), ("hold_expires_at",), source="BookingService.expire_holds"),
+    QueryShape(Booking, ("booking_status",), ("booking_date", "end_minute"),
+               source="BookingService.complete_finished_bookings"),
+    QueryShape(Booking, ("booking_status",), ("booking_date",), source="BookingReminderEngine.refill"),
+    QueryShape(Booking, ("booking_status",), ("hold_expires_at",),
+               source="SlotUpdatePublisher.push_lapsed_holds ($in statuses, box ids)"),
+    QueryShape(Booking, ("user_id",), ("created_at", "_id"), source="BookingService.get_user_bookings"),
+    QueryShape(Booking, ("cricket_box_id", "booking_date"), ("start_time", "_id"),
+               source="BookingService.get_box_bookings"),
+    QueryShape(Booking, ("cricket_box_id",), ("start_time", "_id"), source="BookingService.get_box_bookings"),
+    QueryShape(Booking, ("cricket_box_id",), ("booking_date", "booking_status"),
+               source="BookingService.get_availability_matrix"),
+    QueryShape(Booking, ("cricket_box_id", "booking_date", "booking_status"),
+               source="BookingService.search_available_boxes ($in box ids)"),
+    QueryShape(Booking, ("cricket_box_id", "booking_date", "booking_status"),
+               source="BookingService.create_recurring_booking ($in dates)"),
+    QueryShape(Booking, ("series_id",), ("booking_date",),
+               source="PaymentService.create_order / verify_payment (series)"),
+    QueryShape(Booking, ("cricket_box_id", "booking_date"), source="OwnerService.get_dashboard_stats ($in box ids)"),
+
+    # Waitlist
+    QueryShape(WaitlistEntry, ("cricket_box_id", "booking_date", "status"), ("created_at",),
+               source="BookingService._promote_waitlist"),
+    QueryShape(WaitlistEntry, ("user_id", "cricket_box_id", "booking_date", "start_time", "end_time"),
+               source="BookingService.join_waitlist"),
+    QueryShape(WaitlistEntry, ("user_id",), ("created_at",), source="BookingService.get_user_waitlist"),
+
+    # Cricket Boxes
+    QueryShape(CricketBox, ("is_active", "is_approved"), ("rating", "_id"), source="CricketBoxService.list_boxes"),
+    QueryShape(CricketBox, ("is_active", "is_approved"), ("price_per_hour", "_id"), source="CricketBoxService.list_boxes"),
+    QueryShape(CricketBox, ("is_active", "is_approved"), ("name", "_id"), source="CricketBoxService.list_boxes"),
+    QueryShape(CricketBox, ("is_active", "is_approved", "area"), ("rating", "_id"), source="CricketBoxService.list_boxes"),
+    QueryShape(CricketBox, ("is_active", "is_approved", "area"), ("price_per_hour", "_id"),
+               source="CricketBoxService.list_boxes"),
+    QueryShape(CricketBox, ("is_active", "is_approved", "area"), ("name", "_id"), source="CricketBoxService.list_boxes"),
+    QueryShape(CricketBox, ("is_active", "is_approved", "area"), ("rating",),
+               source="BookingService.search_available_boxes"),
+    QueryShape(CricketBox, ("is_active", "is_approved"), ("rating",),
+               source="CricketBoxService.get_featured_boxes (top rated fill)"),
+    QueryShape(CricketBox, ("is_active", "is_approved", "is_featured"), ("rating",),
+               source="CricketBoxService.get_featured_boxes"),
+    QueryShape(CricketBox, ("is_active", "is_approved"), ("area",), source="CricketBoxService.get_area_counts"),
+    QueryShape(CricketBox, ("location",), source="CricketBoxService.list_boxes (near=)"),
+    QueryShape(CricketBox, ("name",), source="CricketBoxService.list_boxes (search=, $text)"),
+    QueryShape(CricketBox, ("owner_id",), source="OwnerService.get_owner_boxes"),
+
+    # Chat
+    QueryShape(Conversation, ("participant_ids", "is_active"), ("last_message_at",),
+               source="ChatService.get_user_conversations"),
+    QueryShape(Conversation, ("conversation_type", "participant_ids"), source="ChatService.create_conversation"),
+    QueryShape(Message, ("conversation_id", "is_deleted"), ("created_at",), source="ChatService.get_messages"),
+    QueryShape(Message, ("conversation_id",), source="ChatService.mark_as_read"),
+
+    # Notifications
+    QueryShape(Notification, ("user_id",), ("created_at",), source="NotificationService.get_user_notifications"),
+    QueryShape(Notification, ("user_id", "is_read"), ("created_at",),
+               source="NotificationService.get_user_notifications"),
+
+    # Match Requests
+    QueryShape(MatchRequest, ("status",), ("created_at", "_id"), source="MatchRequestService.list_requests"),
+    QueryShape(MatchRequest, ("status", "preferred_area"), ("created_at", "_id"), source="MatchRequestService.list_requests"),
+    QueryShape(MatchRequest, ("status",), ("match_date",), source="MatchRecommendationIndex.rebuild"),
+    QueryShape(MatchRequest, ("status",), ("match_date",), source="MatchRequestService.expire_requests ($or branch)"),
+    QueryShape(MatchRequest, ("status",), ("expires_at",), source="MatchRequestService.expire_requests ($or branch)"),
+    QueryShape(MatchRequest, ("creator_id",), ("created_at", "_id"), source="MatchRequestService.get_user_requests"),
+    QueryShape(MatchRequest, ("join_requests.user_id",), ("created_at", "_id"),
+               source="MatchRequestService.get_user_joined_requests ($or branch)"),
+    QueryShape(MatchRequest, ("accepted_players",), ("created_at", "_id"),
+               source="MatchRequestService.get_user_joined_requests ($or branch)"),
+
+    # Reviews
+    QueryShape(Review, ("cricket_box_id", "is_visible"), ("created_at", "_id"), source="ReviewService.get_box_reviews"),
+    QueryShape(Review, ("cricket_box_id", "is_visible"), ("rating", "_id"), source="ReviewService.get_box_reviews"),
+    QueryShape(Review, ("cricket_box_id", "is_visible"), ("helpful_count", "_id"), source="ReviewService.get_box_reviews"),
+    QueryShape(Review, ("user_id", "cricket_box_id"), source="ReviewService.create_review"),
+    QueryShape(ReviewVote, ("review_id", "user_id"), source="ReviewService.mark_helpful"),
+    QueryShape(ReviewVote, ("review_id",), source="ReviewService.delete_review"),
+    QueryShape(ReviewVote, ("user_id", "review_id"), source="ReviewService.get_my_helpful_votes ($in review ids)"),
+
+    # Favorites
+    QueryShape(Favorite, ("user_id", "cricket_box_id"), source="FavoriteService.add_favorite"),
+
+    # Payments
+    QueryShape(Payment, ("razorpay_order_id",), source="PaymentService.verify_payment"),
+    QueryShape(Payment, ("razorpay_payment_id",), source="PaymentService.handle_webhook"),
+    QueryShape(Payment, (), ("refund_due",), source="PaymentService.retry_refunds"),
+
+    # Users
+    QueryShape(User, ("email",), source="AuthService.register_user / login"),
+    QueryShape(User, ("phone",), source="AuthService.register_user"),
+    QueryShape(User, ("is_active", "area"), source="UserService.list_users"),
+    QueryShape(User, ("role",), source="AdminService.get_platform_stats"),
+]
+
+
+def _declared_index_keys(model: Type[Document]) -> List[List[str]]:
+    """Field lists of every index declared in the model's Settings.indexes"""
+    keys = []
+
+    for index in getattr(model.Settings, "indexes", []):
+        if isinstance(index, IndexModel):
+            keys.append(list(index.document["key"].keys()))
+        elif isinstance(index, str):
+            keys.append([index])
+        else:
+            keys.append([
+                field if isinstance(field, str) else field[0]
+                for field in index
+            ])
+
+    return keys
+
+
+def _is_covered(shape: QueryShape, index_keys: List[str]) -> bool:
+    """Check if an index prefix serves the query shape"""
+    n = len(shape.equality)
+
+    if set(index_keys[:n]) != set(shape.equality):
+        return False
+
+    return index_keys[n:n + len(shape.order)] == list(shape.order)
+
+
+def check_index_coverage() -> List[QueryShape]:
+    """
+    Return every catalogued query shape with no supporting index
+    """
+    return [
+        shape for shape in QUERY_SHAPES
+        if not any(
+            _is_covered(shape, keys)
+            for keys in _declared_index_keys(shape.model)
+        )
+    ]
+
+
+def ensure_index_coverage():
+    """
+    Fail fast when a service query has no supporting index
+
+    Raises:
+        RuntimeError: If any catalogued query shape is uncovered
+    """
+    missing = check_index_coverage()
+
+    if missing:
+        details = "\n".join(
+            f"  - {s.model.__name__} {s.equality} order={s.order or '-'} ({s.source})"
+            for s in missing
+        )
+        raise RuntimeError(f"Queries without a supporting index:\n{details}")
+
+
+if __name__ == "__main__":
+    # python -m app.core.indexes
+    try:
+        ensure_index_coverage()
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"✅ All {len(QUERY_SHAPES)} query shapes are covered by an index")
@@ -0,0 +1,417 @@
+"""
+Data Migrations
+Idempotent backfills for fields derived from existing data.
+Run on every startup after Beanie is initialized.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Type
+
+from beanie import Document, PydanticObjectId
+from pymongo import IndexModel, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.core.config import settings
+from app.models.cricket_box import CricketBox, BoxFacility
+from app.models.booking import Booking, BookingStatus, SLOT_UNIT_MINUTES, time_to_minutes
+from app.models.review import Review, ReviewVote, REVIEW_ASPECTS, star_bucket
+
+
+# Indexes earlier versions declared that are no longer used, by collection
+RETIRED_INDEXES: Dict[str, List[str]] = {
+    "bookings": ["active_slot_unique"],  # Replaced by active_slot_units_unique
+}
+
+
+def _key_spec(key) -> List[tuple]:
+    """Index key as (field, direction) pairs; the server may return 1.0 for 1"""
+    return [(field, int(d) if isinstance(d, (int, float)) else d) for field, d in key]
+
+
+async def drop_retired_indexes(database, models: List[Type[Document]]):
+    """
+    Drop retired indexes, and declared indexes whose key or options
+    changed since an older version created them (they are rebuilt when
+    Beanie initializes). Indexes with other names are never touched.
+    Runs before init_beanie, on the raw collections.
+    """
+    for model in models:
+        collection = database[model.Settings.name]
+        existing = await collection.index_information()
+        declared = {
+            index.document["name"]: index.document
+            for index in getattr(model.Settings, "indexes", [])
+            if isinstance(index, IndexModel)
+        }
+        
+        for name, info in existing.items():
+            spec = declared.get(name)
+            
+            if name in RETIRED_INDEXES.get(model.Settings.name, []):
+                changed = True
+            elif spec is None or "_fts" in dict(info["key"]):
+                continue  # Not ours, or a text index (stored keys differ)
+            else:
+                changed = (
+                    _key_spec(info["key"]) != _key_spec(spec["key"].items())
+                    or info.get("unique", False) != spec.get("unique", False)
+                    or info.get("partialFilterExpression") != spec.get("partialFilterExpression")
+                )
+            
+            if changed:
+                await collection.drop_index(name)
+                print(f"🗑️ Dropped index {model.Settings.name}.{name}")
+
+
+async def dedupe_reviews(database):
+    """
+    Keep only the first review each user left on a box, so the unique
+    user_box index can be built. Boxes that lost reviews have their
+    rating_stats unset for backfill_box_rating_stats to rebuild.
+    Runs before init_beanie, on the raw collections.
+    """
+    reviews = database[Review.Settings.name]
+    duplicates = await reviews.aggregate([
+        {"$sort": {"created_at": 1, "_id": 1}},
+        {"$group": {
+            "_id": {"user_id": "$user_id", "cricket_box_id": "$cricket_box_id"},
+            "review_ids": {"$push": "$_id"},
+        }},
+        {"$match": {"review_ids.1": {"$exists": True}}},
+    ]).to_list(None)
+    if not duplicates:
+        return
+
+    review_ids = [review_id for group in duplicates for review_id in group["review_ids"][1:]]
+    box_ids = {group["_id"]["cricket_box_id"] for group in duplicates}
+
+    await reviews.delete_many({"_id": {"$in": review_ids}})
+    await database[ReviewVote.Settings.name].delete_many(
+        {"review_id": {"$in": [str(review_id) for review_id in review_ids]}}
+    )
+    await database[CricketBox.Settings.name].update_many(
+        {"_id": {"$in": [PydanticObjectId(box_id) for box_id in box_ids]}},
+        {"$unset": {"rating_stats": ""}},
+    )
+
+    print(f"🧹 Removed {len(review_ids)} duplicate reviews on {len(box_ids)} cricket boxes")
+
+
+async def backfill_box_locations():
+    """
+    Set GeoJSON location on boxes that have latitude/longitude but
+    were saved before the location field existed
+    """
+    result = await CricketBox.get_motor_collection().update_many(
+        {
+            "location": None,
+            "latitude": {"$type": "number"},
+            "longitude": {"$type": "number"},
+        },
+        [
+            {"$set": {
+                "location": {
+                    "type": "Point",
+                    "coordinates": ["$longitude", "$latitude"],
+                },
+            }},
+        ],
+    )
+
+    if result.modified_count:
+        print(f"📍 Backfilled location on {result.modified_count} cricket boxes")
+
+
+async def backfill_facility_masks():
+    """
+    Set facilities_mask on boxes saved before the field existed
+    Bit i is set for the i-th BoxFacility, matching FACILITY_BITS.
+    """
+    facility_values = [f.value for f in BoxFacility]
+
+    result = await CricketBox.get_motor_collection().update_many(
+        {"facilities_mask": {"$exists": False}},
+        [
+            {"$set": {
+                "facilities_mask": {"$sum": {"$map": {
+                    "input": {"$setUnion": [{"$ifNull": ["$facilities", []]}]},
+                    "as": "f",
+                    "in": {"$toLong": {"$pow": [2, {"$indexOfArray": [facility_values, "$$f"]}]}},
+                }}},
+            }},
+        ],
+    )
+
+    if result.modified_count:
+        print(f"🧩 Backfilled facilities_mask on {result.modified_count} cricket boxes")
+
+
+def _hhmm_to_minutes(field: str) -> dict:
+    """Aggregation expression for 'HH:MM' -> minutes since midnight"""
+    return {"$add": [
+        {"$multiply": [{"$toInt": {"$substrCP": [field, 0, 2]}}, 60]},
+        {"$toInt": {"$substrCP": [field, 3, 2]}},
+    ]}
+
+
+def _slot_range(doc: dict) -> dict:
+    """start_minute/end_minute/slot_units for a raw booking document"""
+    start = time_to_minutes(doc["start_time"])
+    end = time_to_minutes(doc["end_time"])
+    return {
+        "start_minute": start,
+        "end_minute": end,
+        "slot_units": list(range(start // SLOT_UNIT_MINUTES, -(-end // SLOT_UNIT_MINUTES))),
+    }
+
+
+async def _backfill_active_slot_ranges() -> int:
+    """
+    Backfill active (pending/confirmed) bookings, which active_slot_units_unique
+    covers once slot_units is set
+
+    Older versions only rejected a second booking with the same start
+    time, and offline bookings could end at any time, so active ones may
+    overlap. Per box and date, confirmed bookings win over pending ones,
+    then the oldest wins. A losing pending hold is expired; a losing
+    confirmed booking gets its minute range but no slot_units (so the
+    index still builds) and is flagged slot_conflict and logged for the
+    owner to sort out.
+    """
+    bookings = Booking.get_motor_collection()
+    active = [BookingStatus.CONFIRMED.value, BookingStatus.PENDING.value]
+    fields = {"cricket_box_id": 1, "booking_date": 1, "start_time": 1, "end_time": 1,
+              "booking_status": 1, "booking_number": 1, "created_at": 1, "slot_units": 1}
+
+    legacy: Dict[tuple, List[dict]] = {}
+    async for doc in bookings.find({"slot_units": None, "booking_status": {"$in": active}}, fields):
+        legacy.setdefault((doc["cricket_box_id"], doc["booking_date"]), []).append(doc)
+
+    updates, updated, conflicts = [], [], []
+    for (box_id, day), docs in legacy.items():
+        # Units already held by backfilled or newer bookings that day
+        taken = set()
+        async for doc in bookings.find({
+            "cricket_box_id": box_id,
+            "booking_date": day,
+            "booking_status": {"$in": active},
+            "slot_units": {"$exists": True, "$ne": None},
+        }, {"slot_units": 1}):
+            taken.update(doc["slot_units"])
+
+        docs.sort(key=lambda d: (d["booking_status"] != BookingStatus.CONFIRMED.value, d.get("created_at") or datetime.min))
+        for doc in docs:
+            try:
+                slot_range = _slot_range(doc)
+            except (KeyError, TypeError, ValueError):
+                print(f"⚠️ Booking {doc.get('booking_number')} has an unreadable time range, not backfilled")
+                continue
+
+            if taken.isdisjoint(slot_range["slot_units"]):
+                taken.update(slot_range["slot_units"])
+                changes = slot_range
+            elif doc["booking_status"] == BookingStatus.PENDING.value:
+                changes = {**slot_range, "booking_status": BookingStatus.EXPIRED.value, "updated_at": datetime.utcnow()}
+            else:
+                conflicts.append(doc)
+                continue
+
+            updates.append(UpdateOne({"_id": doc["_id"], "slot_units": None}, {"$set": changes}))
+            updated.append(doc)
+
+    failed = 0
+    if updates:
+        try:
+            await bookings.bulk_write(updates, ordered=False)
+        except BulkWriteError as e:
+            # A booking made meanwhile took the slot; flag these like the rest
+            for error in e.details.get("writeErrors", []):
+                if error.get("code") != 11000:
+                    raise
+                conflicts.append(updated[error["index"]])
+                failed += 1
+
+    for doc in conflicts:
+        slot_range = _slot_range(doc)
+        await bookings.update_one({"_id": doc["_id"]}, {"$set": {
+            "start_minute": slot_range["start_minute"],
+            "end_minute": slot_range["end_minute"],
+            "slot_conflict": True,
+        }})
+        print(
+            f"⚠️ Booking {doc.get('booking_number')} ({doc['start_time']}-{doc['end_time']} on "
+            f"{doc['booking_date']:%Y-%m-%d}, box {doc['cricket_box_id']}) overlaps another active "
+            f"booking; flagged slot_conflict for the owner to resolve"
+        )
+
+    return len(updates) - failed
+
+
+async def backfill_booking_slot_ranges():
+    """
+    Set start_minute/end_minute/slot_units on bookings saved before
+    variable-length bookings
+
+    Bookings that no longer hold their slot aren't in
+    active_slot_units_unique and are filled in one pipeline update;
+    active ones may overlap and go through _backfill_active_slot_ranges.
+    """
+    result = await Booking.get_motor_collection().update_many(
+        {
+            "slot_units": None,
+            "booking_status": {"$nin": [BookingStatus.CONFIRMED.value, BookingStatus.PENDING.value]},
+        },
+        [
+            {"$set": {
+                "start_minute": _hhmm_to_minutes("$start_time"),
+                "end_minute": _hhmm_to_minutes("$end_time"),
+            }},
+            {"$set": {
+                "slot_units": {"$range": [
+                    {"$toInt": {"$floor": {"$divide": ["$start_minute", SLOT_UNIT_MINUTES]}}},
+                    {"$toInt": {"$ceil": {"$divide": ["$end_minute", SLOT_UNIT_MINUTES]}}},
+                ]},
+            }},
+        ],
+    )
+    active = await _backfill_active_slot_ranges()
+
+    if result.modified_count or active:
+        print(f"🕒 Backfilled slot ranges on {result.modified_count + active} bookings")
+
+
+async def backfill_booking_holds():
+    """
+    Give pending bookings made before slot holds a hold expiry, counted
+    from when they were created, so abandoned ones get released
+    """
+    result = await Booking.get_motor_collection().update_many(
+        {"booking_status": BookingStatus.PENDING.value, "hold_expires_at": None},
+        [
+            {"$set": {
+                "hold_expires_at": {"$dateAdd": {
+                    "startDate": "$created_at",
+                    "unit": "minute",
+                    "amount": settings.BOOKING_HOLD_MINUTES,
+                }},
+            }},
+        ],
+    )
+
+    if result.modified_count:
+        print(f"⏳ Backfilled hold expiry on {result.modified_count} pending bookings")
+
+
+async def backfill_box_rating_stats():
+    """
+    Build rating_stats for boxes saved before review aggregates existed,
+    from one aggregation over their visible reviews
+    """
+    box_ids = [
+        str(doc["_id"])
+        async for doc in CricketBox.get_motor_collection().find(
+            {"rating_stats": {"$exists": False}}, {"_id": 1}
+        )
+    ]
+    if not box_ids:
+        return
+
+    group = {
+        "_id": "$cricket_box_id",
+        "count": {"$sum": 1},
+        "rating_sum": {"$sum": "$rating"},
+        "ratings": {"$push": "$rating"},
+    }
+    for aspect in REVIEW_ASPECTS:
+        field = f"${aspect}_rating"
+        group[f"{aspect}_sum"] = {"$sum": field}
+        # $sum ignores missing/null values, so count only the present ones
+        group[f"{aspect}_count"] = {"$sum": {"$cond": [{"$isNumber": field}, 1, 0]}}
+
+    rows = await Review.get_motor_collection().aggregate([
+        {"$match": {"cricket_box_id": {"$in": box_ids}, "is_visible": True}},
+        {"$group": group},
+    ]).to_list(None)
+    by_box = {row["_id"]: row for row in rows}
+
+    updates = []
+    for box_id in box_ids:
+        row = by_box.get(box_id)
+        stats = {"count": 0, "rating_sum": 0.0, "stars": {}, "aspect_sums": {}, "aspect_counts": {}}
+
+        if row:
+            stats["count"] = row["count"]
+            stats["rating_sum"] = row["rating_sum"]
+            for rating in row["ratings"]:
+                bucket = star_bucket(rating)
+                stats["stars"][bucket] = stats["stars"].get(bucket, 0) + 1
+            for aspect in REVIEW_ASPECTS:
+                if row[f"{aspect}_count"]:
+                    stats["aspect_sums"][aspect] = row[f"{aspect}_sum"]
+                    stats["aspect_counts"][aspect] = row[f"{aspect}_count"]
+
+        updates.append(UpdateOne(
+            {"_id": PydanticObjectId(box_id), "rating_stats": {"$exists": False}},
+            {"$set": {
+                "rating_stats": stats,
+                "total_reviews": stats["count"],
+                "rating": round(stats["rating_sum"] / stats["count"], 1) if stats["count"] else 0.0,
+            }},
+        ))
+
+    result = await CricketBox.get_motor_collection().bulk_write(updates, ordered=False)
+
+    if result.modified_count:
+        print(f"⭐ Backfilled rating stats on {result.modified_count} cricket boxes")
+
+
+async def backfill_review_votes():
+    """
+    Move helpful votes from the old embedded helpful_by arrays into
+    review_votes, then drop the arrays
+    """
+    reviews = Review.get_motor_collection()
+    moved = 0
+
+    async for doc in reviews.find({"helpful_by.0": {"$exists": True}}, {"helpful_by": 1}):
+        review_id = str(doc["_id"])
+        inserts = [
+            InsertOne({"review_id": review_id, "user_id": user_id, "created_at": datetime.utcnow()})
+            for user_id in set(doc["helpful_by"])
+        ]
+
+        # Votes already moved by an interrupted run just hit the unique index
+        try:
+            await ReviewVote.get_motor_collection().bulk_write(inserts, ordered=False)
+        except BulkWriteError as e:
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+
+        await reviews.update_one({"_id": doc["_id"]}, {"$unset": {"helpful_by": ""}})
+        moved += 1
+
+    await reviews.update_many({"helpful_by": {"$exists": True}}, {"$unset": {"helpful_by": ""}})
+
+    if moved:
+        print(f"👍 Moved helpful votes of {moved} reviews to review_votes")
+
+
+async def run_data_migrations():
+    """
+    Run all backfills (each is a no-op once applied)
+
+    A failing backfill is logged and retried on the next startup rather
+    than keeping the app down.
+    """
+    for migration in (
+        backfill_box_locations,
+        backfill_facility_masks,
+        backfill_booking_slot_ranges,
+        backfill_booking_holds,
+        backfill_box_rating_stats,
+        backfill_review_votes,
+    ):
+        try:
+            await migration()
+        except Exception as e:
+            print(f"⚠️ Migration {migration.__name__} failed, will retry on next startup: {e}")
@@ -0,0 +1,161 @@
+"""
+Pagination Helpers
+Keyset (cursor) pagination built from the sort key plus _id,
+limit+1 page fetches and a short-TTL cache for totals
+"""
+
+import base64
+import json
+import time
+from datetime import datetime, date
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, status
+from pymongo import ASCENDING
+
+from app.core.config import settings
+
+
+# "collection:normalized filter" -> (expires_at, count)
+_count_cache: Dict[str, Tuple[float, int]] = {}
+_COUNT_CACHE_MAX_ENTRIES = 10_000
+
+
+def encode_cursor(sort_field: str, value: Any, doc_id: Any) -> str:
+    """
+    Encode the position after a document as an opaque cursor
+
+    Args:
+        sort_field: Field the page is sorted by
+        value: Value of the sort field on the last document
+        doc_id: _id of the last document (tie-breaker)
+    """
+    if isinstance(value, datetime):
+        payload = {"t": "datetime", "v": value.isoformat()}
+    elif isinstance(value, date):
+        payload = {"t": "date", "v": value.isoformat()}
+    elif isinstance(value, ObjectId):
+        payload = {"t": "oid", "v": str(value)}  # Sorting by _id
+    elif hasattr(value, "value"):
+        payload = {"t": "raw", "v": value.value}  # Enum
+    else:
+        payload = {"t": "raw", "v": value}
+
+    payload["f"] = sort_field
+    payload["id"] = str(doc_id)
+
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_field: str) -> Tuple[Any, ObjectId]:
+    """
+    Decode a cursor into (sort value, _id)
+
+    Raises:
+        HTTPException: If cursor is malformed or was issued for another sort
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+
+        if payload["f"] != sort_field:
+            raise ValueError("cursor sort mismatch")
+
+        value = payload["v"]
+        if payload["t"] == "datetime":
+            value = datetime.fromisoformat(value)
+        elif payload["t"] == "date":
+            # Beanie stores dates as midnight datetimes
+            value = datetime.combine(date.fromisoformat(value), datetime.min.time())
+        elif payload["t"] == "oid":
+            value = ObjectId(value)
+
+        return value, ObjectId(payload["id"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def apply_keyset(query, sort_field: str, direction: int, cursor: Optional[str] = None):
+    """
+    Order a Beanie find query by (sort_field, _id) and, if a cursor
+    is given, restrict it to documents after that position
+
+    Use instead of skip() so deep pages cost the same as the first one.
+    """
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_field)
+        op = "$gt" if direction == ASCENDING else "$lt"
+
+        if sort_field == "_id":
+            query = query.find({"_id": {op: last_id}})
+        else:
+            query = query.find({
+                "$or": [
+                    {sort_field: {op: value}},
+                    {sort_field: value, "_id": {op: last_id}},
+                ]
+            })
+
+    if sort_field == "_id":
+        return query.sort([("_id", direction)])
+
+    return query.sort([(sort_field, direction), ("_id", direction)])
+
+
+async def fetch_page(query, limit: int, skip: int = 0) -> Tuple[List[Any], bool]:
+    """
+    Fetch one page plus one extra row
+
+    Returns:
+        (items, has_more) - has_more is True if another page follows
+    """
+    items = await query.skip(skip).limit(limit + 1).to_list()
+    return items[:limit], len(items) > limit
+
+
+async def cached_count(query, ttl: Optional[int] = None) -> int:
+    """
+    Count documents matching a Beanie find query
+
+    Served from an in-process cache keyed by collection and normalized
+    filter for a few seconds, so paging through a list does not rescan
+    the collection on every request. Call before apply_keyset() so the
+    cursor does not become part of the key.
+    """
+    ttl = settings.COUNT_CACHE_TTL_SECONDS if ttl is None else ttl
+    key = "{}:{}".format(
+        query.document_model.get_collection_name(),
+        json.dumps(query.get_filter_query(), sort_keys=True, default=str),
+    )
+    now = time.monotonic()
+
+    cached = _count_cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    total = await query.count()
+
+    if len(_count_cache) >= _COUNT_CACHE_MAX_ENTRIES:
+        for k in [k for k, (expires, _) in _count_cache.items() if expires <= now]:
+            del _count_cache[k]
+        if len(_count_cache) >= _COUNT_CACHE_MAX_ENTRIES:
+            _count_cache.clear()
+
+    _count_cache[key] = (now + ttl, total)
+    return total
+
+
+def next_cursor(items: List[Any], sort_field: str, has_more: bool) -> Optional[str]:
+    """Cursor for the page after items, or None if this is the last page"""
+    if not items or not has_more:
+        return None
+
+    last = items[-1]
+    value = last.id if sort_field == "_id" else getattr(last, sort_field)
+    return encode_cursor(sort_field, value, last.id)
@@ -0,0 +1,68 @@
+"""
+Background Scheduler
+Runs periodic maintenance jobs inside the app process
+"""
+
+import asyncio
+from typing import Awaitable, Callable, List, Optional
+
+
+class PeriodicJob:
+    """
+    A coroutine function run every interval_seconds
+    """
+
+    def __init__(self, name: str, interval_seconds: float, func: Callable[[], Awaitable]):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.func = func
+        self.task: Optional[asyncio.Task] = None
+
+    async def run_forever(self):
+        while True:
+            try:
+                await self.func()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep the loop alive; next tick retries
+                print(f"⚠️ Job {self.name} failed: {e}")
+
+            await asyncio.sleep(self.interval_seconds)
+
+
+class Scheduler:
+    """
+    Starts registered jobs on startup and cancels them on shutdown
+
+    Every app worker runs its own jobs, so jobs must be safe to run
+    concurrently (single update_many calls with a state filter are).
+    """
+
+    def __init__(self):
+        self.jobs: List[PeriodicJob] = []
+
+    def add_job(self, name: str, interval_seconds: float, func: Callable[[], Awaitable]):
+        """Register a job to start with the app"""
+        self.jobs.append(PeriodicJob(name, interval_seconds, func))
+
+    def start(self):
+        for job in self.jobs:
+            job.task = asyncio.create_task(job.run_forever())
+        print(f"⏱️ Started {len(self.jobs)} background jobs")
+
+    async def stop(self):
+        for job in self.jobs:
+            if job.task:
+                job.task.cancel()
+
+        await asyncio.gather(
+            *(job.task for job in self.jobs if job.task),
+            return_exceptions=True,
+        )
+
+        self.jobs = []
+
+
+# Global scheduler instance
+scheduler = Scheduler()
@@ -9,20 +9,83 @@ from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.core.database import connect_to_mongo, close_mongo_connection
+from app.core.cache import init_cache, close_cache
+from app.core.scheduler import scheduler
+from app.services.booking_service import BookingService
+from app.services.payment_service import PaymentService
+from app.services.match_request_service import MatchRequestService
+from app.services.box_suggest_index import box_suggest_index
+from app.services.booking_reminders import booking_reminders
+from app.services.slot_updates import slot_updates
+from app.services.match_recommender import match_recommender
 from app.api.v1 import api_router
 
 
+def register_background_jobs():
+    """
+    Periodic maintenance jobs run by every worker
+    """
+    scheduler.add_job(
+        "expire_booking_holds",
+        settings.HOLD_SWEEP_INTERVAL_SECONDS,
+        BookingService.expire_holds,
+    )
+    scheduler.add_job(
+        "complete_finished_bookings",
+        settings.BOOKING_LIFECYCLE_INTERVAL_SECONDS,
+        BookingService.complete_finished_bookings,
+    )
+    scheduler.add_job(
+        "retry_refunds",
+        settings.REFUND_RETRY_INTERVAL_SECONDS,
+        PaymentService.retry_refunds,
+    )
+    scheduler.add_job(
+        "send_booking_reminders",
+        settings.BOOKING_REMINDER_TICK_SECONDS,
+        booking_reminders.tick,
+    )
+    scheduler.add_job(
+        "push_lapsed_holds",
+        settings.SLOT_HOLD_PUSH_INTERVAL_SECONDS,
+        slot_updates.push_lapsed_holds,
+    )
+    scheduler.add_job(
+        "rebuild_suggest_index",
+        settings.SUGGEST_INDEX_REFRESH_SECONDS,
+        box_suggest_index.rebuild,
+    )
+    scheduler.add_job(
+        "rebuild_match_index",
+        settings.MATCH_INDEX_REFRESH_SECONDS,
+        match_recommender.rebuild,
+    )
+    scheduler.add_job(
+        "expire_match_requests",
+        settings.MATCH_EXPIRY_INTERVAL_SECONDS,
+        MatchRequestService.expire_requests,
+    )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Application lifespan events handler
-    - Startup: Connect to MongoDB
-    - Shutdown: Close MongoDB connection
+    - Startup: Connect to MongoDB and cache, build typeahead and match
+      recommendation indexes, start background jobs
+    - Shutdown: Stop jobs, close MongoDB and cache connections
     """
     # Startup
     await connect_to_mongo()
+    await init_cache()
+    await box_suggest_index.rebuild()
+    await match_recommender.rebuild()
+    register_background_jobs()
+    scheduler.start()
     yield
     # Shutdown
+    await scheduler.stop()
+    await close_cache()
     await close_mongo_connection()
 
 
@@ -4,19 +4,36 @@ Stores all booking information for cricket boxes
 """
 
 from datetime import datetime, date
-from typing import Optional
-from beanie import Document
+from typing import Optional, List
+from beanie import Document, before_event, Insert, Replace, Save
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from pydantic import Field
 from enum import Enum
 
 
+# Granularity of Booking.slot_units; any two bookings sharing a unit overlap
+SLOT_UNIT_MINUTES = 5
+
+
+def time_to_minutes(value: str) -> int:
+    """
+    '18:30' -> 1110
+    
+    Raises:
+        ValueError: If value is not HH:MM
+    """
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
 class BookingStatus(str, Enum):
     """Booking status types"""
-    PENDING = "pending"          # Waiting for payment
+    PENDING = "pending"          # Waiting for payment, slot held until hold_expires_at
     CONFIRMED = "confirmed"      # Payment done, slot booked
     CANCELLED = "cancelled"      # Cancelled by user/owner
     COMPLETED = "completed"      # Match finished
     NO_SHOW = "no_show"          # User didn't show up
+    EXPIRED = "expired"          # Not paid before the hold expired
 
 
 class BookingType(str, Enum):
@@ -30,6 +47,7 @@ class PaymentStatus(str, Enum):
     PENDING = "pending"
     PAID = "paid"
     FAILED = "failed"
+    REFUND_PENDING = "refund_pending"  # Refund started, not yet accepted by Razorpay
     REFUNDED = "refunded"
 
 
@@ -58,6 +76,12 @@ class Booking(Document):
     end_time: str = Field(...)    # "19:00"
     duration_hours: float = Field(default=1.0)
     
+    # Derived from start_time/end_time on save
+    start_minute: Optional[int] = None  # Minutes since midnight
+    end_minute: Optional[int] = None
+    slot_units: Optional[List[int]] = None  # 5-minute units in [start, end)
+    slot_conflict: bool = Field(default=False)  # Overlapped another active booking when backfilled
+    
     # Pricing
     base_amount: float = Field(...)  # Box rate
     tax_amount: float = Field(default=0.0)
@@ -75,10 +99,17 @@ class Booking(Document):
     # Status
     booking_status: BookingStatus = Field(default=BookingStatus.PENDING)
     booking_type: BookingType = Field(default=BookingType.ONLINE)
+    hold_expires_at: Optional[datetime] = None  # PENDING only; slot is free after this
     
     # Match Request Link (if booked through player matching)
     match_request_id: Optional[str] = None
     
+    # Weekly series this booking belongs to
+    series_id: Optional[str] = None
+    
+    # Lifecycle job run that completed it (stats are counted per run)
+    completion_batch: Optional[str] = None
+    
     # Notes
     user_notes: Optional[str] = None
     owner_notes: Optional[str] = None
@@ -89,8 +120,64 @@ class Booking(Document):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     cancelled_at: Optional[datetime] = None
     
+    @before_event(Insert, Replace, Save)
+    def sync_slot_range(self):
+        """Keep minute range and slot units in step with start/end time"""
+        self.start_minute = time_to_minutes(self.start_time)
+        self.end_minute = time_to_minutes(self.end_time)
+        self.slot_units = list(range(
+            self.start_minute // SLOT_UNIT_MINUTES,
+            -(-self.end_minute // SLOT_UNIT_MINUTES),
+        ))
+    
     class Settings:
         name = "bookings"
+        indexes = [
+            IndexModel([("booking_number", ASCENDING)], name="booking_number_unique", unique=True),
+            # Slot lookups: availability, conflict checks, owner schedule
+            IndexModel(
+                [("cricket_box_id", ASCENDING), ("booking_date", ASCENDING), ("booking_status", ASCENDING)],
+                name="box_date_status",
+            ),
+            # No two active bookings may share a 5-minute unit, so any
+            # overlap is rejected by Mongo (multikey unique), no app-level lock
+            IndexModel(
+                [("cricket_box_id", ASCENDING), ("booking_date", ASCENDING), ("slot_units", ASCENDING)],
+                name="active_slot_units_unique",
+                unique=True,
+                partialFilterExpression={
+                    "booking_status": {"$in": [BookingStatus.PENDING.value, BookingStatus.CONFIRMED.value]},
+                    "slot_units": {"$exists": True},
+                },
+            ),
+            # Hold expiry sweep
+            IndexModel(
+                [("booking_status", ASCENDING), ("hold_expires_at", ASCENDING)],
+                name="status_hold_expiry",
+            ),
+            # Lifecycle job: confirmed bookings that have ended
+            IndexModel(
+                [("booking_status", ASCENDING), ("booking_date", ASCENDING), ("end_minute", ASCENDING)],
+                name="status_date_end",
+            ),
+            # Owner schedule, keyset-paginated by start time
+            IndexModel(
+                [("cricket_box_id", ASCENDING), ("booking_date", ASCENDING), ("start_time", ASCENDING), ("_id", ASCENDING)],
+                name="box_date_start",
+            ),
+            # Owner schedule across dates, keyset-paginated by start time
+            IndexModel(
+                [("cricket_box_id", ASCENDING), ("start_time", ASCENDING), ("_id", ASCENDING)],
+                name="box_start",
+            ),
+            # Series payment
+            IndexModel([("series_id", ASCENDING), ("booking_date", ASCENDING)], name="series_date", sparse=True),
+            # My bookings, keyset-paginated
+            IndexModel(
+                [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                name="user_created",
+            ),
+        ]
         
     class Config:
         json_schema_extra = {
@@ -4,9 +4,10 @@ Stores cricket box/venue information
 """
 
 from datetime import datetime, time
-from typing import Optional, List
-from beanie import Document, Link
-from pydantic import Field
+from typing import Dict, Optional, List
+from beanie import Document, Link, before_event, Insert, Replace, Save
+from pymongo import IndexModel, ASCENDING, DESCENDING, GEOSPHERE, TEXT
+from pydantic import BaseModel, Field
 from enum import Enum
 
 
@@ -24,6 +25,24 @@ class BoxFacility(str, Enum):
     CANTEEN = "canteen"
 
 
+# Bit per facility for CricketBox.facilities_mask
+# Append new facilities at the end of BoxFacility - bits are stored
+FACILITY_BITS = {facility: 1 << i for i, facility in enumerate(BoxFacility)}
+
+
+def facilities_to_mask(facilities: List[str]) -> int:
+    """
+    Pack facilities into a bitmask
+    
+    Raises:
+        ValueError: If a facility is unknown
+    """
+    mask = 0
+    for facility in facilities:
+        mask |= FACILITY_BITS[BoxFacility(facility)]
+    return mask
+
+
 class BoxType(str, Enum):
     """Type of cricket box"""
     INDOOR = "indoor"
@@ -58,6 +77,24 @@ class TimeSlot(str, Enum):
     SLOT_21_22 = "21:00-22:00"
 
 
+class GeoPoint(BaseModel):
+    """GeoJSON point, coordinates are [longitude, latitude]"""
+    type: str = "Point"
+    coordinates: List[float]
+
+
+class RatingStats(BaseModel):
+    """
+    Running review aggregates for a box (visible reviews only)
+    Kept with atomic increments as reviews change, never recounted.
+    """
+    count: int = 0
+    rating_sum: float = 0.0
+    stars: Dict[str, int] = Field(default_factory=dict)  # "1".."5" -> reviews
+    aspect_sums: Dict[str, float] = Field(default_factory=dict)  # cleanliness, facilities, ...
+    aspect_counts: Dict[str, int] = Field(default_factory=dict)  # Aspects are optional per review
+
+
 class CricketBox(Document):
     """
     Cricket Box document model for MongoDB
@@ -77,6 +114,7 @@ class CricketBox(Document):
     latitude: Optional[float] = None
     longitude: Optional[float] = None
     google_maps_url: Optional[str] = None
+    location: Optional[GeoPoint] = None  # Derived from latitude/longitude
     
     # Pricing
     price_per_hour: float = Field(..., ge=0)
@@ -95,6 +133,7 @@ class CricketBox(Document):
     
     # Facilities
     facilities: List[BoxFacility] = Field(default=[])
+    facilities_mask: int = Field(default=0)  # Derived from facilities
     
     # Media
     photos: List[str] = Field(default=[])  # S3 URLs
@@ -107,8 +146,9 @@ class CricketBox(Document):
     owner_phone: Optional[str] = None
     
     # Stats & Ratings
-    rating: float = Field(default=0.0)
+    rating: float = Field(default=0.0)  # Derived from rating_stats
     total_reviews: int = Field(default=0)
+    rating_stats: RatingStats = Field(default_factory=RatingStats)
     total_bookings: int = Field(default=0)
     
     # Subscription & Listing
@@ -124,8 +164,66 @@ class CricketBox(Document):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
+    @before_event(Insert, Replace, Save)
+    def sync_location(self):
+        """Keep the GeoJSON location in step with latitude/longitude"""
+        if self.latitude is not None and self.longitude is not None:
+            self.location = GeoPoint(coordinates=[self.longitude, self.latitude])
+        else:
+            self.location = None
+    
+    @before_event(Insert, Replace, Save)
+    def sync_facilities_mask(self):
+        """Keep the facility bitmask in step with facilities"""
+        self.facilities_mask = facilities_to_mask(self.facilities)
+    
     class Settings:
         name = "cricket_boxes"
+        indexes = [
+            # Public listing (active + approved), keyset-paginated per sort order
+            IndexModel(
+                [("is_active", ASCENDING), ("is_approved", ASCENDING), ("rating", DESCENDING), ("_id", DESCENDING)],
+                name="listing_rating",
+            ),
+            IndexModel(
+                [("is_active", ASCENDING), ("is_approved", ASCENDING), ("price_per_hour", ASCENDING), ("_id", ASCENDING)],
+                name="listing_price",
+            ),
+            IndexModel(
+                [("is_active", ASCENDING), ("is_approved", ASCENDING), ("name", ASCENDING), ("_id", ASCENDING)],
+                name="listing_name",
+            ),
+            IndexModel(
+                [("is_active", ASCENDING), ("is_approved", ASCENDING), ("area", ASCENDING), ("rating", DESCENDING), ("_id", DESCENDING)],
+                name="listing_area_rating",
+            ),
+            IndexModel(
+                [("is_active", ASCENDING), ("is_approved", ASCENDING), ("area", ASCENDING), ("price_per_hour", ASCENDING), ("_id", ASCENDING)],
+                name="listing_area_price",
+            ),
+            IndexModel(
+                [("is_active", ASCENDING), ("is_approved", ASCENDING), ("area", ASCENDING), ("name", ASCENDING), ("_id", ASCENDING)],
+                name="listing_area_name",
+            ),
+            IndexModel(
+                [("is_active", ASCENDING), ("is_approved", ASCENDING), ("is_featured", ASCENDING), ("rating", DESCENDING)],
+                name="listing_featured",
+            ),
+            # Boxes near me ($geoNear)
+            IndexModel(
+                [("location", GEOSPHERE), ("is_active", ASCENDING), ("is_approved", ASCENDING)],
+                name="location_2dsphere",
+            ),
+            # Name/area/description search
+            IndexModel(
+                [("name", TEXT), ("area", TEXT), ("description", TEXT)],
+                weights={"name": 10, "area": 5, "description": 1},
+                default_language="english",
+                name="box_text",
+            ),
+            # Owner dashboard
+            IndexModel([("owner_id", ASCENDING)], name="owner"),
+        ]
         
     class Config:
         json_schema_extra = {
@@ -6,6 +6,7 @@ Stores user's favorite/saved cricket boxes
 from datetime import datetime
 from typing import Optional
 from beanie import Document
+from pymongo import IndexModel, ASCENDING
 from pydantic import Field
 
 
@@ -32,3 +33,6 @@ class Favorite(Document):
     
     class Settings:
         name = "favorites"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("cricket_box_id", ASCENDING)], name="user_box"),
+        ]
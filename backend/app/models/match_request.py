@@ -6,6 +6,7 @@ Stores player matching/team finding requests
 from datetime import datetime, date
 from typing import Optional, List
 from beanie import Document
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from pydantic import Field, BaseModel
 from enum import Enum
 
@@ -94,6 +95,29 @@ class MatchRequest(Document):
     
     class Settings:
         name = "match_requests"
+        indexes = [
+            # Public listing by status, optionally narrowed by area
+            IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="status_created"),
+            IndexModel(
+                [("status", ASCENDING), ("preferred_area", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                name="status_area_created",
+            ),
+            # Open, upcoming requests (recommendation index rebuild)
+            # and expiry by date or expires_at
+            IndexModel([("status", ASCENDING), ("match_date", ASCENDING)], name="status_match_date"),
+            IndexModel([("status", ASCENDING), ("expires_at", ASCENDING)], name="status_expires"),
+            # My requests
+            IndexModel([("creator_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="creator_created"),
+            # Requests I joined (one index per $or branch)
+            IndexModel(
+                [("join_requests.user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                name="joiner_created",
+            ),
+            IndexModel(
+                [("accepted_players", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                name="accepted_created",
+            ),
+        ]
         
     class Config:
         json_schema_extra = {
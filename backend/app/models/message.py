@@ -6,6 +6,7 @@ Stores chat messages between players
 from datetime import datetime
 from typing import Optional, List
 from beanie import Document
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from pydantic import Field, BaseModel
 from enum import Enum
 
@@ -77,6 +78,18 @@ class Conversation(Document):
     
     class Settings:
         name = "conversations"
+        indexes = [
+            # Inbox: my active conversations, most recent first
+            IndexModel(
+                [("participant_ids", ASCENDING), ("is_active", ASCENDING), ("last_message_at", DESCENDING)],
+                name="participant_active_last_message",
+            ),
+            # Existing direct conversation lookup
+            IndexModel(
+                [("conversation_type", ASCENDING), ("participant_ids", ASCENDING)],
+                name="type_participant",
+            ),
+        ]
 
 
 class Message(Document):
@@ -118,6 +131,12 @@ class Message(Document):
     
     class Settings:
         name = "messages"
+        indexes = [
+            IndexModel(
+                [("conversation_id", ASCENDING), ("is_deleted", ASCENDING), ("created_at", DESCENDING)],
+                name="conversation_deleted_created",
+            ),
+        ]
         
     class Config:
         json_schema_extra = {
@@ -6,6 +6,7 @@ Stores user notifications
 from datetime import datetime
 from typing import Optional
 from beanie import Document
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from pydantic import Field
 from enum import Enum
 
@@ -15,8 +16,10 @@ class NotificationType(str, Enum):
     BOOKING_CONFIRMED = "booking_confirmed"
     BOOKING_CANCELLED = "booking_cancelled"
     BOOKING_REMINDER = "booking_reminder"
+    WAITLIST_PROMOTED = "waitlist_promoted"
     PAYMENT_SUCCESS = "payment_success"
     PAYMENT_FAILED = "payment_failed"
+    PAYMENT_REFUNDED = "payment_refunded"
     MATCH_REQUEST_NEW = "match_request_new"
     MATCH_REQUEST_JOIN = "match_request_join"
     MATCH_REQUEST_ACCEPTED = "match_request_accepted"
@@ -46,6 +49,9 @@ class Notification(Document):
     # Action URL
     action_url: Optional[str] = None  # Deep link to relevant page
     
+    # Set for notifications that must be sent at most once
+    dedupe_key: Optional[str] = None  # e.g. "booking_reminder:<booking_id>:15"
+    
     # Status
     is_read: bool = Field(default=False)
     read_at: Optional[datetime] = None
@@ -55,3 +61,16 @@ class Notification(Document):
     
     class Settings:
         name = "notifications"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created"),
+            IndexModel(
+                [("user_id", ASCENDING), ("is_read", ASCENDING), ("created_at", DESCENDING)],
+                name="user_read_created",
+            ),
+            IndexModel(
+                [("dedupe_key", ASCENDING)],
+                name="dedupe_key_unique",
+                unique=True,
+                partialFilterExpression={"dedupe_key": {"$type": "string"}},
+            ),
+        ]
@@ -4,8 +4,9 @@ Stores payment transaction details
 """
 
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from beanie import Document
+from pymongo import IndexModel, ASCENDING
 from pydantic import Field
 from enum import Enum
 
@@ -36,7 +37,9 @@ class Payment(Document):
     
     # References
     user_id: str = Field(...)
-    booking_id: str = Field(...)
+    booking_id: str = Field(...)  # First booking when paying for a series
+    series_id: Optional[str] = None  # Recurring series paid with this order
+    booking_ids: List[str] = Field(default=[])  # Every booking this order pays for
     
     # Razorpay Details
     razorpay_order_id: str = Field(...)
@@ -64,6 +67,9 @@ class Payment(Document):
     refund_amount: Optional[float] = None
     refunded_at: Optional[datetime] = None
     refund_reason: Optional[str] = None
+    refund_due: float = Field(default=0.0)  # Owed back automatically, not yet refunded
+    refund_booking_ids: List[str] = Field(default=[])  # Bookings the automatic refunds are for
+    refund_claimed_at: Optional[datetime] = None  # Set while a worker is sending refund_due
     
     # Timestamps
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -72,3 +78,14 @@ class Payment(Document):
     
     class Settings:
         name = "payments"
+        indexes = [
+            IndexModel([("razorpay_order_id", ASCENDING)], name="razorpay_order"),
+            IndexModel([("razorpay_payment_id", ASCENDING)], name="razorpay_payment", sparse=True),
+            IndexModel([("booking_id", ASCENDING)], name="booking"),
+            # Refund retry job
+            IndexModel(
+                [("refund_due", ASCENDING)],
+                name="refund_due",
+                partialFilterExpression={"refund_due": {"$gt": 0}},
+            ),
+        ]
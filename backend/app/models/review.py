@@ -6,9 +6,19 @@ Stores user reviews for cricket boxes
 from datetime import datetime
 from typing import Optional
 from beanie import Document
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from pydantic import Field
 
 
+# Optional aspect ratings, stored as <aspect>_rating
+REVIEW_ASPECTS = ("cleanliness", "facilities", "value_for_money", "staff_behavior")
+
+
+def star_bucket(rating: float) -> str:
+    """Histogram bucket for a rating: nearest whole star, halves round up"""
+    return str(min(5, max(1, int(rating + 0.5))))
+
+
 class Review(Document):
     """
     Review document model for MongoDB
@@ -50,9 +60,8 @@ class Review(Document):
     is_verified: bool = Field(default=False)  # Verified if booking exists
     is_visible: bool = Field(default=True)
     
-    # Helpful votes
+    # Helpful votes (voters are in review_votes)
     helpful_count: int = Field(default=0)
-    helpful_by: list[str] = Field(default=[])  # User IDs
     
     # Timestamps
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -60,6 +69,27 @@ class Review(Document):
     
     class Settings:
         name = "reviews"
+        indexes = [
+            # Box review listing, keyset-paginated per sort order
+            IndexModel(
+                [("cricket_box_id", ASCENDING), ("is_visible", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                name="box_visible_created",
+            ),
+            IndexModel(
+                [("cricket_box_id", ASCENDING), ("is_visible", ASCENDING), ("rating", DESCENDING), ("_id", DESCENDING)],
+                name="box_visible_rating",
+            ),
+            IndexModel(
+                [("cricket_box_id", ASCENDING), ("is_visible", ASCENDING), ("helpful_count", DESCENDING), ("_id", DESCENDING)],
+                name="box_visible_helpful",
+            ),
+            # One review per user per box
+            IndexModel(
+                [("user_id", ASCENDING), ("cricket_box_id", ASCENDING)],
+                name="user_box",
+                unique=True,
+            ),
+        ]
         
     class Config:
         json_schema_extra = {
@@ -69,3 +99,27 @@ class Review(Document):
                 "review_text": "Amazing pitch quality and friendly staff.",
             }
         }
+
+
+class ReviewVote(Document):
+    """
+    Helpful vote on a review, one per user per review
+    """
+    
+    review_id: str = Field(...)
+    user_id: str = Field(...)
+    
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    class Settings:
+        name = "review_votes"
+        indexes = [
+            # One vote per user; also serves deleting a review's votes
+            IndexModel(
+                [("review_id", ASCENDING), ("user_id", ASCENDING)],
+                name="review_user_unique",
+                unique=True,
+            ),
+            # Which of these reviews did I vote on
+            IndexModel([("user_id", ASCENDING), ("review_id", ASCENDING)], name="user_review"),
+        ]
@@ -6,6 +6,7 @@ Stores player, owner, and admin information
 from datetime import datetime
 from typing import Optional, List
 from beanie import Document
+from pymongo import IndexModel, ASCENDING
 from pydantic import Field, EmailStr
 from enum import Enum
 
@@ -72,6 +73,12 @@ class User(Document):
     
     class Settings:
         name = "users"
+        indexes = [
+            IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+            IndexModel([("phone", ASCENDING)], name="phone_unique", unique=True),
+            IndexModel([("is_active", ASCENDING), ("area", ASCENDING)], name="active_area"),
+            IndexModel([("role", ASCENDING)], name="role"),
+        ]
         
     class Config:
         json_schema_extra = {
@@ -0,0 +1,68 @@
+"""
+Waitlist Model
+Players waiting for a fully booked slot to free up
+"""
+
+from datetime import datetime, date
+from typing import Optional
+from beanie import Document
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from pydantic import Field
+from enum import Enum
+
+
+class WaitlistStatus(str, Enum):
+    """Waitlist entry status"""
+    WAITING = "waiting"
+    PROMOTED = "promoted"    # Got a pending hold on the slot
+    CANCELLED = "cancelled"  # Left the waitlist
+
+
+class WaitlistEntry(Document):
+    """
+    Waitlist entry document model for MongoDB
+    
+    One player waiting for one time range at a box on a date
+    """
+    
+    # References
+    user_id: str = Field(...)
+    user_name: Optional[str] = None
+    user_phone: Optional[str] = None
+    cricket_box_id: str = Field(...)
+    cricket_box_name: Optional[str] = None
+    
+    # Wanted slot
+    booking_date: date = Field(...)
+    start_time: str = Field(...)  # "18:00"
+    end_time: str = Field(...)    # "19:00"
+    
+    # Status
+    status: WaitlistStatus = Field(default=WaitlistStatus.WAITING)
+    booking_id: Optional[str] = None  # Hold created on promotion
+    
+    # Timestamps
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    promoted_at: Optional[datetime] = None
+    
+    class Settings:
+        name = "waitlist"
+        indexes = [
+            # Promotion: first come, first served per box and date
+            IndexModel(
+                [("cricket_box_id", ASCENDING), ("booking_date", ASCENDING), ("status", ASCENDING), ("created_at", ASCENDING)],
+                name="box_date_status_created",
+            ),
+            # One waiting entry per user and slot
+            IndexModel(
+                [("user_id", ASCENDING), ("cricket_box_id", ASCENDING), ("booking_date", ASCENDING), ("start_time", ASCENDING), ("end_time", ASCENDING)],
+                name="user_slot_waiting_unique",
+                unique=True,
+                partialFilterExpression={"status": WaitlistStatus.WAITING.value},
+            ),
+            # My waitlist
+            IndexModel(
+                [("user_id", ASCENDING), ("created_at", DESCENDING)],
+                name="user_created",
+            ),
+        ]
@@ -30,6 +30,41 @@ class SlotAvailabilityResponse(BaseModel):
     slots: List[TimeSlot]
 
 
+class DayAvailability(BaseModel):
+    """One row of the availability matrix"""
+    date: date
+    price: float  # Per hour for this day
+    slots: str  # One char per slot in slot_starts: "1" free, "0" taken
+
+
+class AvailabilityMatrixResponse(BaseModel):
+    """Days x slots availability for a box"""
+    cricket_box_id: str
+    slot_duration_minutes: int
+    slot_starts: List[str]  # "06:00", "07:00", ...
+    days: List[DayAvailability]
+
+
+class AvailableBox(BaseModel):
+    """Box with free slots in the searched time window"""
+    cricket_box_id: str
+    name: str
+    area: str
+    cover_photo: Optional[str] = None
+    rating: float
+    price: float  # Per hour on the searched date
+    free_slots: List[str]  # Start times, e.g. ["18:00", "19:00"]
+    distance_km: Optional[float] = None  # Only set for near= searches
+
+
+class AvailableBoxesResponse(BaseModel):
+    """Cross-box availability search response"""
+    date: date
+    start_time: str
+    end_time: str
+    boxes: List[AvailableBox]
+
+
 class BookingCreate(BaseModel):
     """Create booking request"""
     cricket_box_id: str
@@ -40,6 +75,22 @@ class BookingCreate(BaseModel):
     match_request_id: Optional[str] = None  # If booking for a match request
 
 
+class RecurringBookingCreate(BaseModel):
+    """Create weekly recurring booking request"""
+    cricket_box_id: str
+    start_date: date  # First occurrence; repeats on the same weekday
+    weeks: int = Field(..., ge=1)
+    start_time: str
+    end_time: str
+    user_notes: Optional[str] = None
+
+
+class SkippedDate(BaseModel):
+    """Occurrence of a series that was not booked"""
+    date: date
+    reason: str
+
+
 class BookingResponse(BaseModel):
     """Booking response"""
     id: str
@@ -59,15 +110,27 @@ class BookingResponse(BaseModel):
     payment_status: str
     booking_status: str
     booking_type: str
+    hold_expires_at: Optional[datetime] = None  # Pay before this or the slot is released
     created_at: datetime
 
 
 class BookingListResponse(BaseModel):
     """List of bookings response"""
     bookings: List[BookingResponse]
-    total: int
+    total: Optional[int] = None  # None when include_total=false
     page: int
     limit: int
+    has_more: bool = False
+    next_cursor: Optional[str] = None  # Pass as ?cursor= for the next page
+
+
+class RecurringBookingResponse(BaseModel):
+    """Weekly recurring booking result"""
+    series_id: str
+    bookings: List[BookingResponse]
+    skipped: List[SkippedDate]
+    total_amount: float  # Paid upfront with one order for the series_id
+    hold_expires_at: Optional[datetime] = None  # Pay before this or the series is released
 
 
 class OfflineBookingCreate(BaseModel):
@@ -81,6 +144,45 @@ class OfflineBookingCreate(BaseModel):
     owner_notes: Optional[str] = None
 
 
+class OfflineBookingImport(BaseModel):
+    """Bulk offline booking import (by owner)"""
+    bookings: List[OfflineBookingCreate] = Field(..., min_length=1)
+
+
+class RejectedRow(BaseModel):
+    """Import row that was not booked"""
+    row: int  # 1-based position in the upload (CSV: data rows after the header)
+    reason: str
+
+
+class OfflineImportResponse(BaseModel):
+    """Bulk offline booking import result"""
+    created_count: int
+    bookings: List[BookingResponse]
+    rejected: List[RejectedRow]
+
+
+class WaitlistJoin(BaseModel):
+    """Join the waitlist for a booked-out slot"""
+    cricket_box_id: str
+    booking_date: date
+    start_time: str
+    end_time: str
+
+
+class WaitlistEntryResponse(BaseModel):
+    """Waitlist entry response"""
+    id: str
+    cricket_box_id: str
+    cricket_box_name: Optional[str] = None
+    booking_date: date
+    start_time: str
+    end_time: str
+    status: str
+    booking_id: Optional[str] = None  # Pending hold to pay for once promoted
+    created_at: datetime
+
+
 class BookingCancelRequest(BaseModel):
     """Cancel booking request"""
     reason: str
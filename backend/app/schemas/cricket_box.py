@@ -79,14 +79,30 @@ class CricketBoxResponse(BaseModel):
     is_featured: bool
     is_active: bool
     created_at: datetime
+    distance_km: Optional[float] = None  # Only set for near= searches
 
 
 class CricketBoxListResponse(BaseModel):
     """List of cricket boxes response"""
     boxes: List[CricketBoxResponse]
-    total: int
+    total: Optional[int] = None  # None when include_total=false
     page: int
     limit: int
+    has_more: bool = False
+    next_cursor: Optional[str] = None  # Pass as ?cursor= for the next page
+
+
+class AreaCount(BaseModel):
+    """Listed boxes in an area"""
+    area: str
+    box_count: int
+
+
+class BoxSuggestion(BaseModel):
+    """Typeahead suggestion"""
+    type: str  # box, area, pincode
+    value: str
+    box_id: Optional[str] = None  # Set for type=box
 
 
 class CricketBoxFilter(BaseModel):
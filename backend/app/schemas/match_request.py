@@ -78,9 +78,23 @@ class MatchRequestResponse(BaseModel):
 class MatchRequestListResponse(BaseModel):
     """List of match requests"""
     requests: List[MatchRequestResponse]
-    total: int
+    total: Optional[int] = None  # None when include_total=false
     page: int
     limit: int
+    has_more: bool = False
+    next_cursor: Optional[str] = None  # Pass as ?cursor= for the next page
+
+
+class MatchRecommendation(BaseModel):
+    """An open request scored against the player's profile"""
+    request: MatchRequestResponse
+    score: float  # 0-1, higher fits better
+    reasons: List[str] = []
+
+
+class MatchRecommendationListResponse(BaseModel):
+    """Recommended match requests, best first"""
+    recommendations: List[MatchRecommendation]
 
 
 class MatchRequestFilter(BaseModel):
@@ -71,7 +71,7 @@ class ConversationListResponse(BaseModel):
 class MessageListResponse(BaseModel):
     """List of messages"""
     messages: List[MessageResponse]
-    total: int
+    total: Optional[int] = None  # None when include_total=false
     has_more: bool
 
 
@@ -9,8 +9,9 @@ from pydantic import BaseModel
 
 
 class PaymentOrderCreate(BaseModel):
-    """Create payment order"""
-    booking_id: str
+    """Create payment order for a booking or a whole recurring series"""
+    booking_id: Optional[str] = None
+    series_id: Optional[str] = None
     amount: float
 
 
@@ -19,8 +20,9 @@ class PaymentOrderResponse(BaseModel):
     order_id: str
     amount: float
     currency: str
-    booking_id: str
+    booking_id: str  # First booking of a series
     razorpay_key_id: str
+    series_id: Optional[str] = None
 
 
 class PaymentVerifyRequest(BaseModel):
@@ -4,7 +4,7 @@ Request/Response models for review endpoints
 """
 
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 from pydantic import BaseModel, Field
 
 
@@ -55,10 +55,32 @@ class ReviewResponse(BaseModel):
 class ReviewListResponse(BaseModel):
     """List of reviews"""
     reviews: List[ReviewResponse]
-    total: int
+    total: Optional[int] = None  # None when include_total=false
     average_rating: float
     page: int
     limit: int
+    has_more: bool = False
+    next_cursor: Optional[str] = None  # Pass as ?cursor= for the next page
+
+
+class RatingSummary(BaseModel):
+    """Rating breakdown for a box page"""
+    cricket_box_id: str
+    average_rating: float
+    total_reviews: int
+    histogram: Dict[str, int]  # "1".."5" stars -> reviews
+    aspects: Dict[str, float]  # cleanliness, facilities, ... -> average (rated aspects only)
+    aspect_counts: Dict[str, int]
+
+
+class RatingSummaryBatchResponse(BaseModel):
+    """Rating breakdowns for many boxes (unknown ids are left out)"""
+    summaries: List[RatingSummary]
+
+
+class HelpfulVotesResponse(BaseModel):
+    """Which of the asked reviews the current user marked helpful"""
+    review_ids: List[str]
 
 
 class OwnerResponseCreate(BaseModel):
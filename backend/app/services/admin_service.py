@@ -2,12 +2,14 @@
 Admin Service - Platform administration
 """
 
-from datetime import date
+from datetime import date, datetime
 from typing import Optional
 
 from app.models.user import User, UserRole
 from app.models.cricket_box import CricketBox
 from app.models.booking import Booking
+from app.services.cricket_box_service import CricketBoxService
+from app.services.box_suggest_index import box_suggest_index
 
 
 class AdminService:
@@ -61,8 +63,9 @@ class AdminService:
         """Approve box"""
         box = await CricketBox.get(box_id)
         if box:
-            box.is_approved = True
-            await box.save()
+            await box.set({"is_approved": True, "updated_at": datetime.utcnow()})
+            await CricketBoxService.invalidate_cache(box_id, areas=True)
+            box_suggest_index.upsert(box)
         return {"success": True, "message": "Box approved"}
     
     @staticmethod
@@ -0,0 +1,201 @@
+"""
+Booking Reminders
+In-memory timer heap that reminds players before their bookings start
+"""
+
+import heapq
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Union
+
+from beanie import PydanticObjectId
+from beanie.operators import In
+from pydantic import BaseModel, Field
+
+from app.core.clock import local_now
+from app.core.config import settings
+from app.models.booking import Booking, BookingStatus, BookingType, time_to_minutes
+from app.models.notification import Notification, NotificationType
+from app.services.notification_service import NotificationService
+
+
+class _ReminderSource(BaseModel):
+    """Fields needed to schedule a booking's reminders"""
+    id: PydanticObjectId = Field(alias="_id")
+    user_id: str
+    cricket_box_name: Optional[str] = None
+    booking_date: date
+    start_time: str
+
+
+class _BookingRef(BaseModel):
+    """Projection for the still-confirmed check"""
+    id: PydanticObjectId = Field(alias="_id")
+
+
+@dataclass
+class _Upcoming:
+    """A booking with reminders still to send"""
+    user_id: str
+    box_name: Optional[str]
+    starts_at: datetime  # Local time
+
+
+class BookingReminderEngine:
+    """
+    Min-heap of (fire_at, booking_id, lead_minutes) timers
+
+    Each tick pops only the timers that are due, so its cost follows the
+    reminders sent rather than the bookings coming up. Bookings are
+    loaded a day at a time (one indexed query as each day comes into
+    range) and kept current by schedule()/cancel() as bookings are
+    confirmed or cancelled. Cancelled bookings leave their timers in the
+    heap; they are skipped when popped. Every worker runs an engine, and
+    the unique notification dedupe_key makes each reminder go out once.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, str, int]] = []
+        self._upcoming: Dict[str, _Upcoming] = {}  # booking_id -> details
+        self._loaded_through: Optional[date] = None
+
+    @staticmethod
+    def _leads() -> List[int]:
+        """Reminder lead times, longest first"""
+        return sorted(settings.BOOKING_REMINDER_LEAD_MINUTES, reverse=True)
+
+    # ---------- Scheduling ----------
+
+    def schedule(self, booking: Union[Booking, _ReminderSource]):
+        """Add timers for a confirmed online booking (no-op if already scheduled)"""
+        if isinstance(booking, Booking) and booking.booking_type != BookingType.ONLINE:
+            return  # Offline bookings are booked by the owner
+
+        # Days past the loaded range are picked up when they're loaded
+        if self._loaded_through is None or booking.booking_date > self._loaded_through:
+            return
+
+        booking_id = str(booking.id)
+        starts_at = datetime.combine(booking.booking_date, datetime.min.time()) + timedelta(
+            minutes=time_to_minutes(booking.start_time)
+        )
+        now = local_now()
+
+        if starts_at <= now:
+            return
+
+        current = self._upcoming.get(booking_id)
+        if current and current.starts_at == starts_at:
+            return
+
+        self._upcoming[booking_id] = _Upcoming(
+            user_id=booking.user_id,
+            box_name=booking.cricket_box_name,
+            starts_at=starts_at,
+        )
+
+        leads = self._leads()
+        for lead in leads:
+            fire_at = starts_at - timedelta(minutes=lead)
+
+            # Booked inside a lead time: skip it, but always send the last one
+            if fire_at > now or lead == leads[-1]:
+                heapq.heappush(self._heap, (fire_at, booking_id, lead))
+
+    def cancel(self, booking_id: str):
+        """Drop a booking's pending reminders"""
+        self._upcoming.pop(booking_id, None)
+
+    async def _load_days(self, first: date, last: date):
+        bookings = await Booking.find(
+            Booking.booking_status == BookingStatus.CONFIRMED,
+            Booking.booking_date >= first,
+            Booking.booking_date <= last,
+            Booking.booking_type == BookingType.ONLINE,
+        ).project(_ReminderSource).to_list()
+
+        for booking in bookings:
+            self.schedule(booking)
+
+    async def refill(self):
+        """Load any day from today through tomorrow that isn't loaded yet"""
+        today = local_now().date()
+        through = today + timedelta(days=1)
+
+        if self._loaded_through is not None and self._loaded_through >= through:
+            return
+
+        first = today
+        if self._loaded_through is not None and self._loaded_through >= today:
+            first = self._loaded_through + timedelta(days=1)
+
+        # Mark loaded first so bookings confirmed during the query are
+        # scheduled directly (schedule() ignores repeats)
+        self._loaded_through = through
+        await self._load_days(first, through)
+
+    # ---------- Sending ----------
+
+    def _pop_due(self, now: datetime) -> List[Tuple[str, int, _Upcoming]]:
+        last_lead = self._leads()[-1]
+        due = []
+
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, booking_id, lead = heapq.heappop(self._heap)
+            upcoming = self._upcoming.get(booking_id)
+
+            # Cancelled or moved since this timer was pushed
+            if upcoming is None or upcoming.starts_at - timedelta(minutes=lead) != fire_at:
+                continue
+
+            if lead == last_lead:
+                del self._upcoming[booking_id]
+
+            if upcoming.starts_at > now:
+                due.append((booking_id, lead, upcoming))
+
+        return due
+
+    async def tick(self):
+        """Send every reminder that is due (background job)"""
+        await self.refill()
+
+        now = local_now()
+        due = self._pop_due(now)
+        if not due:
+            return
+
+        # One query drops bookings cancelled on another worker
+        confirmed = {
+            str(ref.id)
+            for ref in await Booking.find(
+                In(Booking.id, [PydanticObjectId(booking_id) for booking_id, _, _ in due]),
+                Booking.booking_status == BookingStatus.CONFIRMED,
+            ).project(_BookingRef).to_list()
+        }
+
+        notifications = []
+        for booking_id, lead, upcoming in due:
+            if booking_id not in confirmed:
+                continue
+
+            minutes = max(1, round((upcoming.starts_at - now).total_seconds() / 60))
+            notifications.append(Notification(
+                user_id=upcoming.user_id,
+                notification_type=NotificationType.BOOKING_REMINDER,
+                title="Match starting soon ⏰",
+                message=(
+                    f"Your booking at {upcoming.box_name or 'the box'} starts in "
+                    f"{minutes} minutes ({upcoming.starts_at:%H:%M})"
+                ),
+                related_id=booking_id,
+                related_type="booking",
+                action_url=f"/bookings/{booking_id}",
+                dedupe_key=f"booking_reminder:{booking_id}:{lead}",
+            ))
+
+        await NotificationService.create_notifications(notifications)
+
+
+# Global reminder engine instance
+booking_reminders = BookingReminderEngine()
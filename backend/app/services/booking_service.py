@@ -4,23 +4,82 @@ Business logic for booking operations
 """
 
 from datetime import datetime, date, timedelta
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
+from collections import Counter
 from fastapi import HTTPException, status
+from beanie.operators import In, Or, And
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from beanie import PydanticObjectId
+from pydantic import BaseModel, Field, ValidationError
+import csv
+import io
 import uuid
 
-from app.models.booking import Booking, BookingStatus, BookingType, PaymentStatus
+from app.models.booking import (
+    Booking,
+    BookingStatus,
+    BookingType,
+    PaymentStatus,
+    SLOT_UNIT_MINUTES,
+    time_to_minutes,
+)
 from app.models.cricket_box import CricketBox
 from app.models.user import User
+from app.models.notification import NotificationType
+from app.models.waitlist import WaitlistEntry, WaitlistStatus
 from app.schemas.booking import (
     SlotAvailabilityResponse,
     TimeSlot,
+    AvailabilityMatrixResponse,
+    DayAvailability,
+    AvailableBox,
+    AvailableBoxesResponse,
     BookingCreate,
     BookingResponse,
     BookingListResponse,
     OfflineBookingCreate,
+    OfflineImportResponse,
+    RejectedRow,
+    RecurringBookingCreate,
+    RecurringBookingResponse,
+    SkippedDate,
+    WaitlistJoin,
+    WaitlistEntryResponse,
 )
 from app.schemas.common import SuccessResponse
 from app.core.config import settings
+from app.core.clock import local_now
+from app.core.pagination import apply_keyset, cached_count, fetch_page, next_cursor
+from app.services.cricket_box_service import CricketBoxService
+from app.services.booking_reminders import booking_reminders
+from app.services.notification_service import NotificationService
+from app.services.slot_updates import slot_updates, SLOT_BOOKED, SLOT_FREE, SLOT_HELD
+
+
+# Columns an offline import CSV must have (owner_notes is optional)
+OFFLINE_CSV_REQUIRED_COLUMNS = {
+    "booking_date",
+    "start_time",
+    "end_time",
+    "customer_name",
+    "customer_phone",
+    "amount_collected",
+}
+
+
+class _BookedRange(BaseModel):
+    """Projection for availability checks"""
+    id: PydanticObjectId = Field(alias="_id")
+    cricket_box_id: str
+    booking_date: date
+    start_minute: int
+    end_minute: int
+
+
+class _BookingRef(BaseModel):
+    """Projection for batched status changes"""
+    id: PydanticObjectId = Field(alias="_id")
 
 
 class BookingService:
@@ -33,6 +92,187 @@ class BookingService:
         unique_id = uuid.uuid4().hex[:6].upper()
         return f"CBK-{timestamp}-{unique_id}"
     
+    @staticmethod
+    def _holds_slot(now: datetime):
+        """
+        Filter for bookings occupying their slot at `now`:
+        confirmed, or pending with an unexpired hold
+        """
+        return Or(
+            Booking.booking_status == BookingStatus.CONFIRMED,
+            And(
+                Booking.booking_status == BookingStatus.PENDING,
+                Booking.hold_expires_at > now,
+            ),
+        )
+    
+    @staticmethod
+    async def _release_expired_holds(booking: Booking) -> int:
+        """Expire lapsed holds overlapping a booking's range right away"""
+        result = await Booking.find(
+            Booking.cricket_box_id == booking.cricket_box_id,
+            Booking.booking_date == booking.booking_date,
+            Booking.booking_status == BookingStatus.PENDING,
+            Booking.hold_expires_at <= datetime.utcnow(),
+            In(Booking.slot_units, booking.slot_units),
+        ).update({"$set": {
+            "booking_status": BookingStatus.EXPIRED,
+            "updated_at": datetime.utcnow(),
+        }})
+        
+        return result.modified_count if result else 0
+    
+    @staticmethod
+    async def _insert_booking(booking: Booking) -> Booking:
+        """
+        Insert booking, relying on the active_slot_units_unique index
+        to reject a time range overlapping one already held or booked
+        
+        A lapsed hold the sweeper hasn't reached yet still sits in the
+        index, so on conflict those are expired and the insert retried once.
+        """
+        for attempt in range(2):
+            try:
+                await booking.insert()
+                return booking
+            except DuplicateKeyError as e:
+                if "active_slot_units_unique" not in str(e):
+                    raise
+                
+                if attempt or not await BookingService._release_expired_holds(booking):
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="This slot is already booked"
+                    )
+    
+    @staticmethod
+    async def expire_holds() -> int:
+        """
+        Release every lapsed hold in one update (background sweeper)
+        
+        Returns:
+            Number of bookings expired
+        """
+        now = datetime.utcnow()
+        lapsed = (
+            Booking.booking_status == BookingStatus.PENDING,
+            Booking.hold_expires_at <= now,
+        )
+        
+        # Slots about to be freed, for waitlist promotion
+        freed = {
+            (b.cricket_box_id, b.booking_date)
+            for b in await Booking.find(*lapsed).project(_BookedRange).to_list()
+        }
+        
+        result = await Booking.find(*lapsed).update({"$set": {
+            "booking_status": BookingStatus.EXPIRED,
+            "updated_at": now,
+        }})
+        
+        for box_id, day in freed:
+            await BookingService._promote_waitlist(box_id, day)
+        
+        return result.modified_count if result else 0
+    
+    @staticmethod
+    async def complete_finished_bookings() -> int:
+        """
+        Move confirmed bookings that ended more than the grace period ago
+        to COMPLETED (background job)
+        
+        Works in batches: an indexed range query picks the ids, one
+        update_many flips them (tagged with the run's completion_batch),
+        then one aggregation over the tagged rows feeds a single $inc
+        bulk write per collection for User.total_matches_played and
+        CricketBox.total_bookings. Only online bookings are counted;
+        offline ones were counted when the owner entered them.
+        
+        Returns:
+            Number of bookings completed
+        """
+        cutoff = local_now() - timedelta(
+            minutes=settings.BOOKING_COMPLETE_GRACE_MINUTES
+        )
+        cutoff_minute = cutoff.hour * 60 + cutoff.minute
+        finished = (
+            Booking.booking_status == BookingStatus.CONFIRMED,
+            Or(
+                Booking.booking_date < cutoff.date(),
+                And(
+                    Booking.booking_date == cutoff.date(),
+                    Booking.end_minute <= cutoff_minute,
+                ),
+            ),
+        )
+        
+        completed = 0
+        
+        while True:
+            refs = await Booking.find(*finished).limit(
+                settings.BOOKING_LIFECYCLE_BATCH_SIZE
+            ).project(_BookingRef).to_list()
+            if not refs:
+                break
+            
+            ids = [r.id for r in refs]
+            batch = uuid.uuid4().hex
+            
+            # Status filter again: another worker may have taken some already
+            result = await Booking.find(
+                In(Booking.id, ids),
+                Booking.booking_status == BookingStatus.CONFIRMED,
+            ).update({"$set": {
+                "booking_status": BookingStatus.COMPLETED,
+                "completion_batch": batch,
+                "updated_at": datetime.utcnow(),
+            }})
+            completed += result.modified_count if result else 0
+            
+            await BookingService._count_completed(ids, batch)
+            
+            if len(refs) < settings.BOOKING_LIFECYCLE_BATCH_SIZE:
+                break
+        
+        return completed
+    
+    @staticmethod
+    async def _count_completed(ids: List[PydanticObjectId], batch: str):
+        """Add the bookings one completion batch changed to user and box stats"""
+        rows = await Booking.aggregate([
+            {"$match": {
+                "_id": {"$in": ids},
+                "completion_batch": batch,
+                "booking_type": BookingType.ONLINE.value,
+            }},
+            {"$group": {
+                "_id": {"user": "$user_id", "box": "$cricket_box_id"},
+                "count": {"$sum": 1},
+            }},
+        ]).to_list()
+        
+        matches: Counter = Counter()
+        box_bookings: Counter = Counter()
+        for row in rows:
+            matches[row["_id"]["user"]] += row["count"]
+            box_bookings[row["_id"]["box"]] += row["count"]
+        
+        for model, field, counts in (
+            (User, "total_matches_played", matches),
+            (CricketBox, "total_bookings", box_bookings),
+        ):
+            updates = [
+                UpdateOne({"_id": PydanticObjectId(doc_id)}, {"$inc": {field: n}})
+                for doc_id, n in counts.items()
+                if PydanticObjectId.is_valid(doc_id)
+            ]
+            if updates:
+                await model.get_motor_collection().bulk_write(updates, ordered=False)
+        
+        # Cached box details and listings show total_bookings
+        if box_bookings:
+            await CricketBoxService.invalidate_cache(box_ids=box_bookings.keys())
+    
     @staticmethod
     def _to_response(booking: Booking) -> BookingResponse:
         """Convert model to response"""
@@ -54,6 +294,7 @@ class BookingService:
             payment_status=booking.payment_status,
             booking_status=booking.booking_status,
             booking_type=booking.booking_type,
+            hold_expires_at=booking.hold_expires_at,
             created_at=booking.created_at,
         )
     
@@ -75,39 +316,34 @@ class BookingService:
         existing_bookings = await Booking.find(
             Booking.cricket_box_id == box_id,
             Booking.booking_date == booking_date,
-            Booking.booking_status.in_([
-                BookingStatus.PENDING, 
-                BookingStatus.CONFIRMED
-            ])
-        ).to_list()
-        
-        booked_slots = {
-            (b.start_time, b.end_time): str(b.id) 
-            for b in existing_bookings
-        }
+            BookingService._holds_slot(datetime.utcnow())
+        ).project(_BookedRange).to_list()
+        
+        # Slot index -> booking covering it
+        opening, step, num_slots = BookingService._slot_grid(box)
+        booked_slots = {}
+        
+        for b in existing_bookings:
+            taken = BookingService._taken_bits(b, opening, step, num_slots)
+            for i in range(num_slots):
+                if taken >> i & 1:
+                    booked_slots[i] = str(b.id)
+        
+        # Per-slot price from the hourly rate
+        price = BookingService._day_price(box, booking_date) * step / 60
         
         # Generate time slots
         slots = []
-        opening_hour = int(box.opening_time.split(":")[0])
-        closing_hour = int(box.closing_time.split(":")[0])
-        
-        # Check if weekend for pricing
-        is_weekend = booking_date.weekday() >= 5
-        price = box.weekend_price_per_hour if is_weekend and box.weekend_price_per_hour else box.price_per_hour
         
-        for hour in range(opening_hour, closing_hour):
-            start_time = f"{hour:02d}:00"
-            end_time = f"{hour+1:02d}:00"
-            
-            is_available = (start_time, end_time) not in booked_slots
-            booking_id = booked_slots.get((start_time, end_time))
+        for i in range(num_slots):
+            start = opening + i * step
             
             slots.append(TimeSlot(
-                start_time=start_time,
-                end_time=end_time,
-                is_available=is_available,
+                start_time=BookingService._hhmm(start),
+                end_time=BookingService._hhmm(start + step),
+                is_available=i not in booked_slots,
                 price=price,
-                booking_id=booking_id,
+                booking_id=booked_slots.get(i),
             ))
         
         return SlotAvailabilityResponse(
@@ -117,84 +353,487 @@ class BookingService:
         )
     
     @staticmethod
-    async def create_booking(
-        user_id: str,
-        request: BookingCreate
-    ) -> BookingResponse:
-        """Create a new booking"""
-        # Get user
-        user = await User.get(user_id)
-        if not user:
+    def _hhmm(minutes: int) -> str:
+        """1110 -> '18:30'"""
+        return f"{minutes // 60:02d}:{minutes % 60:02d}"
+    
+    @staticmethod
+    def _day_price(box: CricketBox, day: date) -> float:
+        """Hourly price for a day (weekend rate if set)"""
+        if day.weekday() >= 5 and box.weekend_price_per_hour:
+            return box.weekend_price_per_hour
+        return box.price_per_hour
+    
+    @staticmethod
+    def _unit_bits(start_minute: int, end_minute: int) -> int:
+        """Bitmask of the SLOT_UNIT_MINUTES units in [start, end)"""
+        first = start_minute // SLOT_UNIT_MINUTES
+        last = -(-end_minute // SLOT_UNIT_MINUTES)
+        return ((1 << (last - first)) - 1) << first
+    
+    @staticmethod
+    def _slot_grid(box: CricketBox) -> Tuple[int, int, int]:
+        """(opening minute, slot minutes, number of slots) for a box"""
+        opening = time_to_minutes(box.opening_time)
+        closing = time_to_minutes(box.closing_time)
+        step = box.slot_duration_minutes
+        return opening, step, max(0, (closing - opening) // step)
+    
+    @staticmethod
+    def _taken_bits(b: _BookedRange, opening: int, step: int, num_slots: int) -> int:
+        """Bitmask of the slots overlapped by a booking's [start, end)"""
+        first = (b.start_minute - opening) // step
+        last = -(-(b.end_minute - opening) // step)
+        first, last = max(first, 0), min(last, num_slots)
+        
+        if first >= last:
+            return 0
+        return ((1 << (last - first)) - 1) << first
+    
+    @staticmethod
+    def _free_slots(taken: int, num_slots: int) -> str:
+        """'1' per free slot, '0' per taken one, slot 0 first"""
+        if not num_slots:
+            return ""
+        free = ((1 << num_slots) - 1) & ~taken
+        # Bit i -> char i, so reverse the binary string
+        return format(free, f"0{num_slots}b")[::-1]
+    
+    @staticmethod
+    async def get_availability_matrix(
+        box_id: str,
+        from_date: date,
+        to_date: date
+    ) -> AvailabilityMatrixResponse:
+        """
+        Availability for every slot of every day in [from_date, to_date]
+        
+        One indexed query loads the range's active bookings; each day is
+        an int bitset (bit i = slot i taken) filled with range masks.
+        """
+        if to_date < from_date:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="to must not be before from"
             )
         
-        # Get box
-        box = await CricketBox.get(request.cricket_box_id)
+        num_days = (to_date - from_date).days + 1
+        if num_days > settings.AVAILABILITY_MAX_DAYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Date range is limited to {settings.AVAILABILITY_MAX_DAYS} days"
+            )
+        
+        box = await CricketBox.get(box_id)
+        
         if not box:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Cricket box not found"
             )
         
-        # Check slot availability
-        existing = await Booking.find_one(
-            Booking.cricket_box_id == request.cricket_box_id,
-            Booking.booking_date == request.booking_date,
-            Booking.start_time == request.start_time,
-            Booking.booking_status.in_([
-                BookingStatus.PENDING, 
-                BookingStatus.CONFIRMED
-            ])
+        opening, step, num_slots = BookingService._slot_grid(box)
+        
+        booked = await Booking.find(
+            Booking.cricket_box_id == box_id,
+            Booking.booking_date >= from_date,
+            Booking.booking_date <= to_date,
+            BookingService._holds_slot(datetime.utcnow())
+        ).project(_BookedRange).to_list()
+        
+        taken = [0] * num_days
+        
+        for b in booked:
+            day = (b.booking_date - from_date).days
+            taken[day] |= BookingService._taken_bits(b, opening, step, num_slots)
+        
+        days = []
+        
+        for i in range(num_days):
+            day = from_date + timedelta(days=i)
+            
+            days.append(DayAvailability(
+                date=day,
+                price=BookingService._day_price(box, day),
+                slots=BookingService._free_slots(taken[i], num_slots),
+            ))
+        
+        return AvailabilityMatrixResponse(
+            cricket_box_id=box_id,
+            slot_duration_minutes=step,
+            slot_starts=[
+                BookingService._hhmm(m)
+                for m in range(opening, opening + num_slots * step, step)
+            ],
+            days=days,
         )
+    
+    @staticmethod
+    def _validate_time_range(box: CricketBox, start_time: str, end_time: str) -> float:
+        """
+        Check a requested [start_time, end_time) covers whole slots of
+        the box within opening hours
+        
+        Returns:
+            Duration in hours
         
-        if existing:
+        Raises:
+            HTTPException: If the range is malformed or off the slot grid
+        """
+        try:
+            start = time_to_minutes(start_time)
+            end = time_to_minutes(end_time)
+        except ValueError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="This slot is already booked"
+                detail="Times must be HH:MM"
             )
         
+        opening, step, num_slots = BookingService._slot_grid(box)
+        closing = opening + num_slots * step
+        
+        if end <= start:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="end_time must be after start_time"
+            )
+        
+        if start < opening or end > closing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Booking must be between {box.opening_time} and {BookingService._hhmm(closing)}"
+            )
+        
+        if (start - opening) % step or (end - start) % step:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Booking must start and end on {step}-minute slot boundaries"
+            )
+        
+        return (end - start) / 60
+    
+    @staticmethod
+    async def search_available_boxes(
+        booking_date: date,
+        start_time: str,
+        end_time: str,
+        area: Optional[str] = None,
+        near: Optional[Tuple[float, float]] = None,
+        radius_km: Optional[float] = None,
+    ) -> AvailableBoxesResponse:
+        """
+        Boxes with at least one free slot starting in [start_time, end_time)
+        
+        One query (or $geoNear aggregation) picks candidate boxes and one
+        query loads all of their bookings for the date; availability is
+        then worked out per box with bitsets, with no per-box calls.
+        """
+        try:
+            window_start = time_to_minutes(start_time)
+            window_end = time_to_minutes(end_time)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Times must be HH:MM"
+            )
+        
+        if window_end <= window_start:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="end_time must be after start_time"
+            )
+        
+        # Candidate boxes
+        query = CricketBox.find(
+            CricketBox.is_active == True,
+            CricketBox.is_approved == True,
+        )
+        if area:
+            query = query.find(CricketBox.area == area)
+        
+        max_boxes = settings.AVAILABILITY_SEARCH_MAX_BOXES
+        candidates: List[Tuple[CricketBox, Optional[float]]] = []
+        
+        if near:
+            stage = CricketBoxService.geo_near_stage(
+                query, near, radius_km or settings.NEARBY_DEFAULT_RADIUS_KM
+            )
+            rows = await CricketBox.aggregate([
+                {"$geoNear": stage},
+                {"$limit": max_boxes},
+            ]).to_list()
+            
+            for row in rows:
+                distance_m = row.pop("distance_m")
+                candidates.append((CricketBox.model_validate(row), round(distance_m / 1000, 2)))
+        else:
+            boxes = await query.sort(-CricketBox.rating).limit(max_boxes).to_list()
+            candidates = [(box, None) for box in boxes]
+        
+        if not candidates:
+            return AvailableBoxesResponse(
+                date=booking_date, start_time=start_time, end_time=end_time, boxes=[]
+            )
+        
+        # All bookings for every candidate on that date
+        booked = await Booking.find(
+            In(Booking.cricket_box_id, [str(box.id) for box, _ in candidates]),
+            Booking.booking_date == booking_date,
+            BookingService._holds_slot(datetime.utcnow())
+        ).project(_BookedRange).to_list()
+        
+        bookings_by_box = {}
+        for b in booked:
+            bookings_by_box.setdefault(b.cricket_box_id, []).append(b)
+        
+        results = []
+        for box, distance_km in candidates:
+            opening, step, num_slots = BookingService._slot_grid(box)
+            
+            taken = 0
+            for b in bookings_by_box.get(str(box.id), []):
+                taken |= BookingService._taken_bits(b, opening, step, num_slots)
+            
+            free_slots = []
+            for i in range(num_slots):
+                slot_start = opening + i * step
+                if window_start <= slot_start < window_end and not taken >> i & 1:
+                    free_slots.append(BookingService._hhmm(slot_start))
+            
+            if free_slots:
+                results.append(AvailableBox(
+                    cricket_box_id=str(box.id),
+                    name=box.name,
+                    area=box.area,
+                    cover_photo=box.cover_photo,
+                    rating=box.rating,
+                    price=BookingService._day_price(box, booking_date),
+                    free_slots=free_slots,
+                    distance_km=distance_km,
+                ))
+        
+        return AvailableBoxesResponse(
+            date=booking_date,
+            start_time=start_time,
+            end_time=end_time,
+            boxes=results,
+        )
+    
+    @staticmethod
+    def _held_booking(
+        box: CricketBox,
+        user_id: str,
+        user_name: Optional[str],
+        user_phone: Optional[str],
+        booking_date: date,
+        start_time: str,
+        end_time: str,
+        duration_hours: float,
+        hold_minutes: int
+    ) -> Booking:
+        """Build an online booking holding its slot until paid"""
         # Calculate pricing
-        is_weekend = request.booking_date.weekday() >= 5
-        base_amount = box.weekend_price_per_hour if is_weekend and box.weekend_price_per_hour else box.price_per_hour
+        base_amount = BookingService._day_price(box, booking_date) * duration_hours
         platform_fee = base_amount * (settings.PLATFORM_COMMISSION_PERCENT / 100)
         tax_amount = 0  # Add GST if needed
         total_amount = base_amount + platform_fee + tax_amount
         
-        # Create booking
-        booking = Booking(
+        return Booking(
             booking_number=BookingService._generate_booking_number(),
             user_id=user_id,
-            user_name=user.name,
-            user_phone=user.phone,
+            user_name=user_name,
+            user_phone=user_phone,
             cricket_box_id=str(box.id),
             cricket_box_name=box.name,
             owner_id=box.owner_id,
-            booking_date=request.booking_date,
-            start_time=request.start_time,
-            end_time=request.end_time,
-            duration_hours=1.0,
+            booking_date=booking_date,
+            start_time=start_time,
+            end_time=end_time,
+            duration_hours=duration_hours,
             base_amount=base_amount,
             tax_amount=tax_amount,
             platform_fee=platform_fee,
             total_amount=total_amount,
             booking_status=BookingStatus.PENDING,
             booking_type=BookingType.ONLINE,
-            user_notes=request.user_notes,
-            match_request_id=request.match_request_id,
+            hold_expires_at=datetime.utcnow() + timedelta(minutes=hold_minutes),
+        )
+    
+    @staticmethod
+    async def create_booking(
+        user_id: str,
+        request: BookingCreate
+    ) -> BookingResponse:
+        """Create a new booking"""
+        # Get user
+        user = await User.get(user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        
+        # Get box
+        box = await CricketBox.get(request.cricket_box_id)
+        if not box:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Cricket box not found"
+            )
+        
+        duration_hours = BookingService._validate_time_range(
+            box, request.start_time, request.end_time
         )
         
-        await booking.insert()
+        booking = BookingService._held_booking(
+            box,
+            user_id,
+            user.name,
+            user.phone,
+            request.booking_date,
+            request.start_time,
+            request.end_time,
+            duration_hours,
+            hold_minutes=settings.BOOKING_HOLD_MINUTES,
+        )
+        booking.user_notes = request.user_notes
+        booking.match_request_id = request.match_request_id
+        
+        # Overlaps are rejected by the unique slot-units index
+        await BookingService._insert_booking(booking)
+        await slot_updates.publish(booking, SLOT_HELD)
         
         return BookingService._to_response(booking)
     
+    @staticmethod
+    async def create_recurring_booking(
+        user_id: str,
+        request: RecurringBookingCreate
+    ) -> RecurringBookingResponse:
+        """
+        Book the same time on the same weekday for several weeks
+        
+        Every occurrence is checked for conflicts in one query and the
+        free ones are inserted with one insert_many. Occurrences that are
+        in the past or taken are skipped and reported. Like a single
+        booking, the series is held as PENDING until it is paid for
+        upfront (one order for every occurrence, by series_id); unpaid
+        holds lapse with the rest.
+        """
+        if request.weeks > settings.RECURRING_MAX_WEEKS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"A series can be at most {settings.RECURRING_MAX_WEEKS} weeks"
+            )
+        
+        user = await User.get(user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        
+        box = await CricketBox.get(request.cricket_box_id)
+        if not box:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Cricket box not found"
+            )
+        
+        duration_hours = BookingService._validate_time_range(
+            box, request.start_time, request.end_time
+        )
+        
+        series_id = uuid.uuid4().hex
+        now = local_now()
+        started = now.date() == request.start_date and (
+            time_to_minutes(request.start_time) <= now.hour * 60 + now.minute
+        )
+        skipped: List[SkippedDate] = []
+        dates = []
+        
+        for week in range(request.weeks):
+            day = request.start_date + timedelta(weeks=week)
+            if day < now.date() or (week == 0 and started):
+                skipped.append(SkippedDate(date=day, reason="In the past"))
+            else:
+                dates.append(day)
+        
+        bookings = []
+        for day in dates:
+            booking = BookingService._held_booking(
+                box,
+                user_id,
+                user.name,
+                user.phone,
+                day,
+                request.start_time,
+                request.end_time,
+                duration_hours,
+                hold_minutes=settings.BOOKING_HOLD_MINUTES,
+            )
+            booking.id = PydanticObjectId()
+            booking.series_id = series_id
+            booking.user_notes = request.user_notes
+            # insert_many skips document event hooks
+            booking.sync_slot_range()
+            bookings.append(booking)
+        
+        # One query for every occurrence's conflicts
+        taken_dates = set()
+        if bookings:
+            conflicts = await Booking.find(
+                Booking.cricket_box_id == str(box.id),
+                In(Booking.booking_date, dates),
+                In(Booking.slot_units, bookings[0].slot_units),
+                BookingService._holds_slot(datetime.utcnow())
+            ).project(_BookedRange).to_list()
+            taken_dates = {c.booking_date for c in conflicts}
+        
+        to_insert = [b for b in bookings if b.booking_date not in taken_dates]
+        skipped += [
+            SkippedDate(date=b.booking_date, reason="Already booked")
+            for b in bookings if b.booking_date in taken_dates
+        ]
+        
+        # One bulk write; rows that lost a race with another booking
+        # (or hit a lapsed hold not yet swept) fail alone
+        failed = set()
+        if to_insert:
+            try:
+                await Booking.insert_many(to_insert, ordered=False)
+            except BulkWriteError as e:
+                for error in e.details.get("writeErrors", []):
+                    if error.get("code") != 11000:
+                        raise
+                    failed.add(error["index"])
+        
+        booked = []
+        for i, booking in enumerate(to_insert):
+            if i in failed:
+                skipped.append(SkippedDate(date=booking.booking_date, reason="Already booked"))
+            else:
+                booked.append(booking)
+                await slot_updates.publish(booking, SLOT_HELD)
+        
+        skipped.sort(key=lambda s: s.date)
+        
+        return RecurringBookingResponse(
+            series_id=series_id,
+            bookings=[BookingService._to_response(b) for b in booked],
+            skipped=skipped,
+            total_amount=sum(b.total_amount for b in booked),
+            hold_expires_at=booked[0].hold_expires_at if booked else None,
+        )
+    
     @staticmethod
     async def get_user_bookings(
         user_id: str,
         status: Optional[str] = None,
         page: int = 1,
         limit: int = 10,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
     ) -> BookingListResponse:
         """Get user's bookings"""
         query = Booking.find(Booking.user_id == user_id)
@@ -202,16 +841,21 @@ class BookingService:
         if status:
             query = query.find(Booking.booking_status == status)
         
-        total = await query.count()
+        # Totals are optional and briefly cached; has_more comes from limit+1
+        total = await cached_count(query) if include_total else None
         
-        skip = (page - 1) * limit
-        bookings = await query.sort(-Booking.created_at).skip(skip).limit(limit).to_list()
+        # Paginate by cursor (keyset) when given, else by page
+        query = apply_keyset(query, "created_at", DESCENDING, cursor)
+        skip = 0 if cursor else (page - 1) * limit
+        bookings, has_more = await fetch_page(query, limit, skip)
         
         return BookingListResponse(
             bookings=[BookingService._to_response(b) for b in bookings],
             total=total,
             page=page,
             limit=limit,
+            has_more=has_more,
+            next_cursor=next_cursor(bookings, "created_at", has_more),
         )
     
     @staticmethod
@@ -269,11 +913,291 @@ class BookingService:
         booking.cancelled_at = datetime.utcnow()
         booking.updated_at = datetime.utcnow()
         await booking.save()
+        booking_reminders.cancel(booking_id)
+        await slot_updates.publish(booking, SLOT_FREE)
+        await BookingService._promote_waitlist(booking.cricket_box_id, booking.booking_date)
         
         # TODO: Process refund if payment was made
         
         return SuccessResponse(message="Booking cancelled successfully")
     
+    @staticmethod
+    def _waitlist_response(entry: WaitlistEntry) -> WaitlistEntryResponse:
+        """Convert model to response"""
+        return WaitlistEntryResponse(
+            id=str(entry.id),
+            cricket_box_id=entry.cricket_box_id,
+            cricket_box_name=entry.cricket_box_name,
+            booking_date=entry.booking_date,
+            start_time=entry.start_time,
+            end_time=entry.end_time,
+            status=entry.status,
+            booking_id=entry.booking_id,
+            created_at=entry.created_at,
+        )
+    
+    @staticmethod
+    async def join_waitlist(
+        user_id: str,
+        request: WaitlistJoin
+    ) -> WaitlistEntryResponse:
+        """
+        Wait for a booked-out time range; the first waiting player whose
+        range frees up gets a pending hold on it
+        """
+        user = await User.get(user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        
+        box = await CricketBox.get(request.cricket_box_id)
+        if not box:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Cricket box not found"
+            )
+        
+        BookingService._validate_time_range(box, request.start_time, request.end_time)
+        
+        if request.booking_date < local_now().date():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Booking date is in the past"
+            )
+        
+        # Only worth waiting for if something holds part of the range
+        start = time_to_minutes(request.start_time)
+        end = time_to_minutes(request.end_time)
+        holder = await Booking.find_one(
+            Booking.cricket_box_id == str(box.id),
+            Booking.booking_date == request.booking_date,
+            Booking.start_minute < end,
+            Booking.end_minute > start,
+            BookingService._holds_slot(datetime.utcnow()),
+        )
+        
+        if not holder:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="This slot is available, book it directly"
+            )
+        
+        entry = WaitlistEntry(
+            user_id=user_id,
+            user_name=user.name,
+            user_phone=user.phone,
+            cricket_box_id=str(box.id),
+            cricket_box_name=box.name,
+            booking_date=request.booking_date,
+            start_time=request.start_time,
+            end_time=request.end_time,
+        )
+        
+        try:
+            await entry.insert()
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You are already on the waitlist for this slot"
+            )
+        
+        return BookingService._waitlist_response(entry)
+    
+    @staticmethod
+    async def leave_waitlist(
+        entry_id: str,
+        user_id: str
+    ) -> SuccessResponse:
+        """Leave a waitlist"""
+        entry = await WaitlistEntry.get(entry_id)
+        
+        if not entry or entry.user_id != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Waitlist entry not found"
+            )
+        
+        result = await WaitlistEntry.find_one(
+            WaitlistEntry.id == entry.id,
+            WaitlistEntry.status == WaitlistStatus.WAITING,
+        ).update({"$set": {"status": WaitlistStatus.CANCELLED}})
+        
+        if not result or not result.modified_count:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You are no longer waiting for this slot"
+            )
+        
+        return SuccessResponse(message="Removed from waitlist")
+    
+    @staticmethod
+    async def get_user_waitlist(user_id: str) -> List[WaitlistEntryResponse]:
+        """Current user's waitlist entries for today onwards"""
+        entries = await WaitlistEntry.find(
+            WaitlistEntry.user_id == user_id,
+            WaitlistEntry.booking_date >= local_now().date(),
+        ).sort(-WaitlistEntry.created_at).limit(50).to_list()
+        
+        return [BookingService._waitlist_response(e) for e in entries]
+    
+    @staticmethod
+    async def _promote_waitlist(box_id: str, day: date) -> int:
+        """
+        Give freed slots of a box/date to waiting players, oldest first
+        
+        One query loads the day's active bookings into a bitmask of slot
+        units; each waiting entry whose whole range is free gets a
+        pending hold. The hold insert is guarded by the unique
+        slot-units index, so concurrent promotions (or a player booking
+        the slot directly) can't double-book it.
+        
+        Returns:
+            Number of players promoted
+        """
+        now = local_now()
+        if day < now.date():
+            return 0
+        
+        entries = await WaitlistEntry.find(
+            WaitlistEntry.cricket_box_id == box_id,
+            WaitlistEntry.booking_date == day,
+            WaitlistEntry.status == WaitlistStatus.WAITING,
+        ).sort(+WaitlistEntry.created_at).to_list()
+        
+        if not entries:
+            return 0
+        
+        box = await CricketBox.get(box_id)
+        if not box:
+            return 0
+        
+        taken = 0
+        for b in await Booking.find(
+            Booking.cricket_box_id == box_id,
+            Booking.booking_date == day,
+            BookingService._holds_slot(datetime.utcnow()),
+        ).project(_BookedRange).to_list():
+            taken |= BookingService._unit_bits(b.start_minute, b.end_minute)
+        
+        promoted = 0
+        
+        for entry in entries:
+            start = time_to_minutes(entry.start_time)
+            end = time_to_minutes(entry.end_time)
+            bits = BookingService._unit_bits(start, end)
+            
+            if taken & bits:
+                continue
+            
+            # Too late to play it
+            if day == now.date() and start <= now.hour * 60 + now.minute:
+                continue
+            
+            booking = BookingService._held_booking(
+                box,
+                entry.user_id,
+                entry.user_name,
+                entry.user_phone,
+                day,
+                entry.start_time,
+                entry.end_time,
+                (end - start) / 60,
+                hold_minutes=settings.WAITLIST_HOLD_MINUTES,
+            )
+            
+            try:
+                await booking.insert()
+            except DuplicateKeyError:
+                continue  # Taken by someone else meanwhile
+            
+            taken |= bits
+            
+            claimed = await WaitlistEntry.find_one(
+                WaitlistEntry.id == entry.id,
+                WaitlistEntry.status == WaitlistStatus.WAITING,
+            ).update({"$set": {
+                "status": WaitlistStatus.PROMOTED,
+                "booking_id": str(booking.id),
+                "promoted_at": datetime.utcnow(),
+            }})
+            
+            if not claimed or not claimed.modified_count:
+                # Left the waitlist (or promoted elsewhere) meanwhile
+                booking.booking_status = BookingStatus.EXPIRED
+                await booking.save()
+                taken &= ~bits
+                continue
+            
+            promoted += 1
+            await slot_updates.publish(booking, SLOT_HELD)
+            await NotificationService.create_notification(
+                user_id=entry.user_id,
+                notification_type=NotificationType.WAITLIST_PROMOTED,
+                title="Your slot is free! 🏏",
+                message=(
+                    f"{box.name} on {day} at {entry.start_time} is held for you. "
+                    f"Pay within {settings.WAITLIST_HOLD_MINUTES} minutes to confirm."
+                ),
+                related_id=str(booking.id),
+                related_type="booking",
+                action_url=f"/bookings/{booking.id}",
+            )
+        
+        return promoted
+    
+    @staticmethod
+    async def mark_no_show(
+        booking_id: str,
+        owner_id: str
+    ) -> SuccessResponse:
+        """
+        Owner marks a confirmed booking as a no-show
+        
+        Allowed once the booking has started and until the lifecycle
+        job completes it (BOOKING_COMPLETE_GRACE_MINUTES after the end).
+        """
+        booking = await Booking.get(booking_id)
+        
+        if not booking:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Booking not found"
+            )
+        
+        if booking.owner_id != owner_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You can only update bookings for your own box"
+            )
+        
+        starts_at = datetime.combine(booking.booking_date, datetime.min.time()) + timedelta(
+            minutes=time_to_minutes(booking.start_time)
+        )
+        if local_now() < starts_at:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Booking has not started yet"
+            )
+        
+        # Conditional update so it can't race the lifecycle job
+        result = await Booking.find_one(
+            Booking.id == booking.id,
+            Booking.booking_status == BookingStatus.CONFIRMED,
+        ).update({"$set": {
+            "booking_status": BookingStatus.NO_SHOW,
+            "updated_at": datetime.utcnow(),
+        }})
+        
+        if not result or not result.modified_count:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Only confirmed bookings can be marked as no-show"
+            )
+        
+        return SuccessResponse(message="Booking marked as no-show")
+    
     @staticmethod
     async def create_offline_booking(
         owner_id: str,
@@ -295,25 +1219,30 @@ class BookingService:
                 detail="You can only add bookings to your own box"
             )
         
-        # Check slot availability
-        existing = await Booking.find_one(
-            Booking.cricket_box_id == box_id,
-            Booking.booking_date == request.booking_date,
-            Booking.start_time == request.start_time,
-            Booking.booking_status.in_([
-                BookingStatus.PENDING, 
-                BookingStatus.CONFIRMED
-            ])
+        duration_hours = BookingService._validate_time_range(
+            box, request.start_time, request.end_time
         )
         
-        if existing:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="This slot is already booked"
-            )
+        booking = BookingService._offline_booking(owner_id, box, request, duration_hours)
+        
+        # Overlaps are rejected by the unique slot-units index
+        await BookingService._insert_booking(booking)
+        await slot_updates.publish(booking, SLOT_BOOKED)
         
-        # Create offline booking
-        booking = Booking(
+        # Update box stats
+        await box.inc({CricketBox.total_bookings: 1})
+        
+        return BookingService._to_response(booking)
+    
+    @staticmethod
+    def _offline_booking(
+        owner_id: str,
+        box: CricketBox,
+        request: OfflineBookingCreate,
+        duration_hours: float
+    ) -> Booking:
+        """Build a confirmed, paid-at-box booking entered by the owner"""
+        return Booking(
             booking_number=BookingService._generate_booking_number(),
             user_id=owner_id,  # Owner is the booker for offline
             user_name=request.customer_name,
@@ -324,7 +1253,7 @@ class BookingService:
             booking_date=request.booking_date,
             start_time=request.start_time,
             end_time=request.end_time,
-            duration_hours=1.0,
+            duration_hours=duration_hours,
             base_amount=request.amount_collected,
             total_amount=request.amount_collected,
             payment_status=PaymentStatus.PAID,
@@ -332,14 +1261,179 @@ class BookingService:
             booking_type=BookingType.OFFLINE,
             owner_notes=request.owner_notes,
         )
+    
+    @staticmethod
+    def parse_offline_csv(
+        content: bytes
+    ) -> Tuple[List[Tuple[int, OfflineBookingCreate]], List[RejectedRow]]:
+        """
+        Parse an offline booking CSV upload
         
-        await booking.insert()
+        Columns: booking_date (YYYY-MM-DD), start_time, end_time,
+        customer_name, customer_phone, amount_collected, owner_notes
+        (optional). Rows that don't parse are returned as rejected.
         
-        # Update box stats
-        box.total_bookings += 1
-        await box.save()
+        Returns:
+            ([(row number, booking)], rejected rows)
+        """
+        try:
+            text = content.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="CSV must be UTF-8 encoded"
+            )
         
-        return BookingService._to_response(booking)
+        reader = csv.DictReader(io.StringIO(text))
+        missing = OFFLINE_CSV_REQUIRED_COLUMNS - set(reader.fieldnames or [])
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"CSV is missing columns: {', '.join(sorted(missing))}"
+            )
+        
+        rows: List[Tuple[int, OfflineBookingCreate]] = []
+        rejected: List[RejectedRow] = []
+        
+        for number, record in enumerate(reader, start=1):
+            if number > settings.OFFLINE_IMPORT_MAX_ROWS:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"An import can have at most {settings.OFFLINE_IMPORT_MAX_ROWS} rows"
+                )
+            
+            values = {k: (v or "").strip() for k, v in record.items() if k}
+            values["owner_notes"] = values.get("owner_notes") or None
+            
+            try:
+                rows.append((number, OfflineBookingCreate.model_validate(values)))
+            except ValidationError as e:
+                error = e.errors()[0]
+                field = ".".join(str(part) for part in error["loc"])
+                rejected.append(RejectedRow(row=number, reason=f"{field}: {error['msg']}"))
+        
+        return rows, rejected
+    
+    @staticmethod
+    async def import_offline_bookings(
+        owner_id: str,
+        box_id: str,
+        rows: List[Tuple[int, OfflineBookingCreate]],
+        rejected: Optional[List[RejectedRow]] = None
+    ) -> OfflineImportResponse:
+        """
+        Create many offline bookings for one box in a few round trips
+        
+        Every row is checked against the box's active bookings from one
+        range query and against earlier rows of the same import (a
+        per-day bitmask of 5-minute units), the free rows are written
+        with one insert_many and total_bookings gets one $inc.
+        
+        Args:
+            rows: (row number, booking) pairs, numbered for error reporting
+            rejected: Rows already rejected by the caller (e.g. CSV parse errors)
+        """
+        rejected = list(rejected or [])
+        
+        if len(rows) + len(rejected) > settings.OFFLINE_IMPORT_MAX_ROWS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"An import can have at most {settings.OFFLINE_IMPORT_MAX_ROWS} rows"
+            )
+        
+        box = await CricketBox.get(box_id)
+        
+        if not box:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Cricket box not found"
+            )
+        
+        if box.owner_id != owner_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You can only add bookings to your own box"
+            )
+        
+        bookings: List[Booking] = []
+        row_numbers: List[int] = []
+        
+        for number, request in rows:
+            try:
+                duration_hours = BookingService._validate_time_range(
+                    box, request.start_time, request.end_time
+                )
+            except HTTPException as e:
+                rejected.append(RejectedRow(row=number, reason=e.detail))
+                continue
+            
+            booking = BookingService._offline_booking(owner_id, box, request, duration_hours)
+            # insert_many skips document event hooks
+            booking.id = PydanticObjectId()
+            booking.sync_slot_range()
+            bookings.append(booking)
+            row_numbers.append(number)
+        
+        # Slot units taken per day, seeded from one range query
+        taken: Dict[date, int] = {}
+        if bookings:
+            existing = await Booking.find(
+                Booking.cricket_box_id == str(box.id),
+                Booking.booking_date >= min(b.booking_date for b in bookings),
+                Booking.booking_date <= max(b.booking_date for b in bookings),
+                BookingService._holds_slot(datetime.utcnow())
+            ).project(_BookedRange).to_list()
+            
+            for b in existing:
+                taken[b.booking_date] = taken.get(b.booking_date, 0) | BookingService._unit_bits(
+                    b.start_minute, b.end_minute
+                )
+        
+        to_insert: List[Booking] = []
+        insert_rows: List[int] = []
+        
+        for number, booking in zip(row_numbers, bookings):
+            bits = BookingService._unit_bits(booking.start_minute, booking.end_minute)
+            day_taken = taken.get(booking.booking_date, 0)
+            
+            if day_taken & bits:
+                rejected.append(RejectedRow(row=number, reason="This slot is already booked"))
+                continue
+            
+            taken[booking.booking_date] = day_taken | bits
+            to_insert.append(booking)
+            insert_rows.append(number)
+        
+        # One bulk write; rows that lost a race with another booking
+        # (or hit a lapsed hold not yet swept) fail alone
+        failed = set()
+        if to_insert:
+            try:
+                await Booking.insert_many(to_insert, ordered=False)
+            except BulkWriteError as e:
+                for error in e.details.get("writeErrors", []):
+                    if error.get("code") != 11000:
+                        raise
+                    failed.add(error["index"])
+        
+        created = []
+        for i, booking in enumerate(to_insert):
+            if i in failed:
+                rejected.append(RejectedRow(row=insert_rows[i], reason="This slot is already booked"))
+            else:
+                created.append(booking)
+                await slot_updates.publish(booking, SLOT_BOOKED)
+        
+        if created:
+            await box.inc({CricketBox.total_bookings: len(created)})
+        
+        rejected.sort(key=lambda r: r.row)
+        
+        return OfflineImportResponse(
+            created_count=len(created),
+            bookings=[BookingService._to_response(b) for b in created],
+            rejected=rejected,
+        )
     
     @staticmethod
     async def get_box_bookings(
@@ -349,6 +1443,8 @@ class BookingService:
         status: Optional[str] = None,
         page: int = 1,
         limit: int = 10,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
     ) -> BookingListResponse:
         """Get all bookings for a box (owner only)"""
         box = await CricketBox.get(box_id)
@@ -373,14 +1469,19 @@ class BookingService:
         if status:
             query = query.find(Booking.booking_status == status)
         
-        total = await query.count()
+        # Totals are optional and briefly cached; has_more comes from limit+1
+        total = await cached_count(query) if include_total else None
         
-        skip = (page - 1) * limit
-        bookings = await query.sort(Booking.start_time).skip(skip).limit(limit).to_list()
+        # Paginate by cursor (keyset) when given, else by page
+        query = apply_keyset(query, "start_time", ASCENDING, cursor)
+        skip = 0 if cursor else (page - 1) * limit
+        bookings, has_more = await fetch_page(query, limit, skip)
         
         return BookingListResponse(
             bookings=[BookingService._to_response(b) for b in bookings],
             total=total,
             page=page,
             limit=limit,
+            has_more=has_more,
+            next_cursor=next_cursor(bookings, "start_time", has_more),
         )
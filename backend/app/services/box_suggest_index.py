@@ -0,0 +1,254 @@
+"""
+Box Suggest Index
+In-memory typeahead over listed box names, areas and pincodes
+"""
+
+import re
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from beanie import PydanticObjectId
+from pydantic import BaseModel, Field
+
+from app.models.cricket_box import CricketBox
+
+
+# Prefixes shorter than this get no typo tolerance
+MIN_FUZZY_LENGTH = 3
+
+# Longer words are truncated when building the typo index
+MAX_FUZZY_LENGTH = 12
+
+
+class _BoxSource(BaseModel):
+    """Fields needed to index a box"""
+    id: PydanticObjectId = Field(alias="_id")
+    name: str
+    area: str
+    pincode: str
+
+
+@dataclass
+class _Suggestion:
+    """A suggestable value and the boxes behind it"""
+    kind: str  # box, area, pincode
+    value: str
+    box_ids: Set[str] = field(default_factory=set)
+
+
+def _normalize(text: str) -> str:
+    """Lowercase and collapse punctuation/whitespace to single spaces"""
+    return re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
+
+
+def _deletes(text: str) -> Set[str]:
+    """Every string one deletion away from text"""
+    return {text[:i] + text[i + 1:] for i in range(len(text))}
+
+
+class BoxSuggestIndex:
+    """
+    Sorted-array prefix index with a delete-neighbourhood typo index
+
+    Prefix matches are a bisect into a sorted list of every word-start
+    suffix of each value. If those don't fill the result, words within
+    one edit of the last typed word are looked up in a dict of
+    precomputed single deletions, so lookups never scan the whole index.
+    Boxes are upserted/removed in place as they change and the whole
+    index is rebuilt from MongoDB by a background job so writes made by
+    other workers show up. Changes made while a rebuild waits on MongoDB
+    are replayed onto the new index before it is swapped in.
+    """
+
+    def __init__(self):
+        self._suggestions: Dict[str, _Suggestion] = {}
+        self._keys: List[Tuple[str, str]] = []  # sorted (key, suggestion_id)
+        self._fuzzy: Dict[str, Set[str]] = {}  # deletion variant -> suggestion_ids
+        self._box_entries: Dict[str, List[str]] = {}  # box_id -> suggestion_ids
+        self._bulk = False  # Append keys unsorted during a rebuild
+        # Per running rebuild: (box_id, (name, area, pincode) or None if removed)
+        self._replay_logs: List[List[Tuple[str, Optional[Tuple[str, str, str]]]]] = []
+
+    # ---------- Building ----------
+
+    @staticmethod
+    def _index_keys(value: str) -> Set[str]:
+        """Value from each word on, so 'turf ar' finds 'Green Turf Arena'"""
+        words = _normalize(value).split()
+        return {" ".join(words[i:]) for i in range(len(words))}
+
+    @staticmethod
+    def _fuzzy_keys(value: str) -> Set[str]:
+        """Prefixes of each word and their single deletions"""
+        variants = set()
+
+        for word in set(_normalize(value).split()):
+            word = word[:MAX_FUZZY_LENGTH]
+
+            for length in range(MIN_FUZZY_LENGTH, len(word) + 1):
+                prefix = word[:length]
+                variants.add(prefix)
+                variants |= _deletes(prefix)
+
+        return variants
+
+    def _add_suggestion(self, suggestion_id: str, suggestion: _Suggestion):
+        self._suggestions[suggestion_id] = suggestion
+
+        for key in self._index_keys(suggestion.value):
+            if self._bulk:
+                self._keys.append((key, suggestion_id))
+            else:
+                insort(self._keys, (key, suggestion_id))
+
+        for variant in self._fuzzy_keys(suggestion.value):
+            self._fuzzy.setdefault(variant, set()).add(suggestion_id)
+
+    def _remove_suggestion(self, suggestion_id: str):
+        suggestion = self._suggestions.pop(suggestion_id)
+
+        for key in self._index_keys(suggestion.value):
+            i = bisect_left(self._keys, (key, suggestion_id))
+            if i < len(self._keys) and self._keys[i] == (key, suggestion_id):
+                del self._keys[i]
+
+        for variant in self._fuzzy_keys(suggestion.value):
+            ids = self._fuzzy.get(variant)
+            if ids is not None:
+                ids.discard(suggestion_id)
+                if not ids:
+                    del self._fuzzy[variant]
+
+    def _attach(self, box_id: str, suggestion_id: str, kind: str, value: str):
+        """Link a box to a suggestion, creating it if needed"""
+        if suggestion_id not in self._suggestions:
+            self._add_suggestion(suggestion_id, _Suggestion(kind=kind, value=value))
+
+        self._suggestions[suggestion_id].box_ids.add(box_id)
+        self._box_entries.setdefault(box_id, []).append(suggestion_id)
+
+    def _add_box(self, box_id: str, name: str, area: str, pincode: str):
+        self._attach(box_id, f"box:{box_id}", "box", name)
+        self._attach(box_id, f"area:{_normalize(area)}", "area", area)
+        self._attach(box_id, f"pincode:{pincode}", "pincode", pincode)
+
+    def _record(self, box_id: str, fields: Optional[Tuple[str, str, str]]):
+        """Note a change for any rebuild in progress to replay"""
+        for log in self._replay_logs:
+            log.append((box_id, fields))
+
+    def _drop_box(self, box_id: str):
+        for suggestion_id in self._box_entries.pop(box_id, []):
+            suggestion = self._suggestions.get(suggestion_id)
+            if suggestion is None:
+                continue
+
+            suggestion.box_ids.discard(box_id)
+            if not suggestion.box_ids:
+                self._remove_suggestion(suggestion_id)
+
+    def _apply(self, box_id: str, fields: Optional[Tuple[str, str, str]]):
+        self._drop_box(box_id)
+        if fields is not None:
+            self._add_box(box_id, *fields)
+
+    def remove(self, box_id: str):
+        """Drop a box (and any area/pincode only it provided)"""
+        self._apply(box_id, None)
+        self._record(box_id, None)
+
+    def upsert(self, box: CricketBox):
+        """Reindex a box after create/update; unlisted boxes are removed"""
+        fields = (box.name, box.area, box.pincode) if box.is_active and box.is_approved else None
+        self._apply(str(box.id), fields)
+        self._record(str(box.id), fields)
+
+    async def rebuild(self):
+        """Rebuild the whole index from listed boxes (startup and background job)"""
+        log: List[Tuple[str, Optional[Tuple[str, str, str]]]] = []
+        self._replay_logs.append(log)
+        try:
+            boxes = await CricketBox.find(
+                CricketBox.is_active == True,
+                CricketBox.is_approved == True,
+            ).project(_BoxSource).to_list()
+        finally:
+            self._replay_logs.remove(log)
+
+        fresh = BoxSuggestIndex()
+        fresh._bulk = True
+        for box in boxes:
+            fresh._add_box(str(box.id), box.name, box.area, box.pincode)
+        fresh._keys.sort()
+        fresh._bulk = False
+
+        # The snapshot may predate changes made while it loaded
+        for box_id, fields in log:
+            fresh._apply(box_id, fields)
+
+        # Swap in one step so lookups never see a half-built index
+        self._suggestions = fresh._suggestions
+        self._keys = fresh._keys
+        self._fuzzy = fresh._fuzzy
+        self._box_entries = fresh._box_entries
+
+    # ---------- Lookup ----------
+
+    def _prefix_matches(self, prefix: str, limit: int) -> List[str]:
+        ids: List[str] = []
+        i = bisect_left(self._keys, (prefix, ""))
+
+        while i < len(self._keys) and len(ids) < limit:
+            key, suggestion_id = self._keys[i]
+            if not key.startswith(prefix):
+                break
+            if suggestion_id not in ids:
+                ids.append(suggestion_id)
+            i += 1
+
+        return ids
+
+    def _fuzzy_matches(self, prefix: str) -> Set[str]:
+        prefix = prefix.split()[-1][:MAX_FUZZY_LENGTH]
+        ids = set(self._fuzzy.get(prefix, ()))
+
+        for variant in _deletes(prefix):
+            ids |= self._fuzzy.get(variant, set())
+
+        return ids
+
+    def suggest(self, query: str, limit: int = 8) -> List[dict]:
+        """
+        Suggestions for a partially typed query
+
+        Prefix matches come first (alphabetically); typo matches fill
+        any remaining places.
+        """
+        prefix = _normalize(query)
+        if not prefix:
+            return []
+
+        ids = self._prefix_matches(prefix, limit)
+
+        if len(ids) < limit and len(prefix.split()[-1]) >= MIN_FUZZY_LENGTH:
+            extra = sorted(
+                self._fuzzy_matches(prefix) - set(ids),
+                key=lambda s: self._suggestions[s].value.lower(),
+            )
+            ids.extend(extra[:limit - len(ids)])
+
+        results = []
+        for suggestion_id in ids:
+            suggestion = self._suggestions[suggestion_id]
+            results.append({
+                "type": suggestion.kind,
+                "value": suggestion.value,
+                "box_id": next(iter(suggestion.box_ids)) if suggestion.kind == "box" else None,
+            })
+
+        return results
+
+
+# Global suggest index instance
+box_suggest_index = BoxSuggestIndex()
@@ -20,6 +20,7 @@ from app.schemas.message import (
 )
 from app.schemas.common import SuccessResponse
 from app.services.websocket_manager import ws_manager
+from app.core.pagination import cached_count, fetch_page
 
 
 class ChatService:
@@ -170,6 +171,7 @@ class ChatService:
         user_id: str,
         before: Optional[str] = None,
         limit: int = 50,
+        include_total: bool = True,
     ) -> MessageListResponse:
         """Get messages from a conversation"""
         conversation = await Conversation.get(conversation_id)
@@ -191,26 +193,25 @@ class ChatService:
             Message.is_deleted == False,
         )
         
+        # Conversation total, briefly cached so scrolling doesn't recount
+        total = await cached_count(query) if include_total else None
+        
         # Pagination using cursor
         if before:
             before_msg = await Message.get(before)
             if before_msg:
                 query = query.find(Message.created_at < before_msg.created_at)
         
-        messages = await query.sort(-Message.created_at).limit(limit).to_list()
+        # Fetch one extra to know if older messages remain
+        messages, has_more = await fetch_page(query.sort(-Message.created_at), limit)
         
         # Reverse to get chronological order
         messages.reverse()
         
-        total = await Message.find(
-            Message.conversation_id == conversation_id,
-            Message.is_deleted == False,
-        ).count()
-        
         return MessageListResponse(
             messages=[ChatService._message_to_response(m) for m in messages],
             total=total,
-            has_more=len(messages) == limit,
+            has_more=has_more,
         )
     
     @staticmethod
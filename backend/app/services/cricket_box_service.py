@@ -4,25 +4,86 @@ Business logic for cricket box operations
 """
 
 from datetime import datetime
-from typing import Optional, List
+from typing import Iterable, Optional, List, Tuple
 from fastapi import HTTPException, status
+import hashlib
+import json
+from pymongo import ASCENDING, DESCENDING
 
-from app.models.cricket_box import CricketBox
+from app.models.cricket_box import CricketBox, facilities_to_mask
 from app.models.user import User, UserRole
 from app.schemas.cricket_box import (
     CricketBoxCreate,
     CricketBoxUpdate,
     CricketBoxResponse,
     CricketBoxListResponse,
+    AreaCount,
+    BoxSuggestion,
 )
 from app.schemas.common import SuccessResponse
+from app.core.pagination import (
+    apply_keyset,
+    cached_count,
+    fetch_page,
+    next_cursor,
+    encode_cursor,
+    decode_cursor,
+)
+from app.core.cache import cache
+from app.core.config import settings
+from app.services.box_suggest_index import box_suggest_index
 
 
 class CricketBoxService:
     """Cricket box service class"""
     
+    # sort_by -> (field, direction)
+    SORT_OPTIONS = {
+        "rating": ("rating", DESCENDING),
+        "price": ("price_per_hour", ASCENDING),
+        "name": ("name", ASCENDING),
+    }
+    
+    EARTH_RADIUS_KM = 6378.1
+    
+    # Cache keys
+    CACHE_DETAIL = "boxes:detail:"
+    CACHE_LIST = "boxes:list:"
+    CACHE_FEATURED = "boxes:featured:"
+    CACHE_AREAS = "boxes:areas"
+    
+    @staticmethod
+    async def invalidate_cache(
+        box_id: Optional[str] = None,
+        areas: bool = False,
+        box_ids: Iterable[str] = (),
+    ):
+        """
+        Drop cached catalog reads after a box changes
+        
+        Call after any write that affects public box data
+        (details, approval, active status, rating, booking count).
+        Pass box_ids when a batch write changed several boxes.
+        Pass areas=True when the box was created, approved,
+        deactivated or moved so area counts are rebuilt.
+        """
+        detail_keys = [f"{CricketBoxService.CACHE_DETAIL}{b}" for b in box_ids]
+        if box_id:
+            detail_keys.append(f"{CricketBoxService.CACHE_DETAIL}{box_id}")
+        if detail_keys:
+            await cache.delete(*detail_keys)
+        
+        if areas:
+            await cache.delete(CricketBoxService.CACHE_AREAS)
+        
+        await cache.delete_prefix(CricketBoxService.CACHE_LIST)
+        await cache.delete_prefix(CricketBoxService.CACHE_FEATURED)
+    
     @staticmethod
-    def _to_response(box: CricketBox) -> CricketBoxResponse:
+    def _to_response(
+        box: CricketBox,
+        distance_km: Optional[float] = None
+    ) -> CricketBoxResponse:
         """Convert model to response"""
         return CricketBoxResponse(
             id=str(box.id),
@@ -54,6 +115,7 @@ class CricketBoxService:
             is_featured=box.is_featured,
             is_active=box.is_active,
             created_at=box.created_at,
+            distance_km=distance_km,
         )
     
     @staticmethod
@@ -68,8 +130,45 @@ class CricketBoxService:
         sort_by: str = "rating",
         page: int = 1,
         limit: int = 10,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        near: Optional[Tuple[float, float]] = None,
+        radius_km: Optional[float] = None,
     ) -> CricketBoxListResponse:
-        """List cricket boxes with filters"""
+        """
+        List cricket boxes with filters
+        
+        With near=(lat, lng) results are restricted to radius_km and
+        sorted by distance instead of sort_by. With search they are
+        sorted by text relevance and paginated by page only.
+        """
+        if near and radius_km is None:
+            radius_km = settings.NEARBY_DEFAULT_RADIUS_KM
+        
+        params = {
+            "area": area,
+            "min_price": min_price,
+            "max_price": max_price,
+            "box_type": box_type,
+            "facilities": sorted(facilities) if facilities else None,
+            "min_rating": min_rating,
+            "search": search,
+            "sort_by": sort_by,
+            "page": page,
+            "limit": limit,
+            "cursor": cursor,
+            "include_total": include_total,
+            "near": near,
+            "radius_km": radius_km,
+        }
+        cache_key = CricketBoxService.CACHE_LIST + hashlib.sha1(
+            json.dumps(params, sort_keys=True).encode()
+        ).hexdigest()
+        
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            return CricketBoxListResponse.model_validate(cached)
+        
         # Base query - only active and approved boxes
         query = CricketBox.find(
             CricketBox.is_active == True,
@@ -92,33 +191,166 @@ class CricketBoxService:
         if min_rating is not None:
             query = query.find(CricketBox.rating >= min_rating)
         
-        # TODO: Add search and facilities filter
+        # All listed facilities present = one bitwise predicate
+        if facilities:
+            try:
+                mask = facilities_to_mask(facilities)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Unknown facility"
+                )
+            query = query.find({"facilities_mask": {"$bitsAllSet": mask}})
+        
+        if search:
+            # $text and $geoNear can't run in the same query
+            if near:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="search can't be combined with near"
+                )
+            query = query.find({"$text": {"$search": search}})
+        
+        if near:
+            response = await CricketBoxService._list_nearby(
+                query, near, radius_km, page, limit, cursor, include_total
+            )
+            
+            await cache.set(
+                cache_key,
+                response.model_dump(mode="json"),
+                settings.BOX_LIST_CACHE_TTL_SECONDS,
+            )
+            
+            return response
         
         # Count total
-        total = await query.count()
+        # Totals are optional and briefly cached; has_more comes from limit+1
+        total = await cached_count(query) if include_total else None
+        
+        if search:
+            # Best matches first; text score can't be used as a cursor
+            query = query.sort([("score", {"$meta": "textScore"}), ("_id", ASCENDING)])
+            boxes, has_more = await fetch_page(query, limit, (page - 1) * limit)
+            cursor_out = None
+        else:
+            # Sort, then paginate by cursor (keyset) when given, else by page
+            sort_field, direction = CricketBoxService.SORT_OPTIONS.get(
+                sort_by, CricketBoxService.SORT_OPTIONS["rating"]
+            )
+            query = apply_keyset(query, sort_field, direction, cursor)
+            skip = 0 if cursor else (page - 1) * limit
+            boxes, has_more = await fetch_page(query, limit, skip)
+            cursor_out = next_cursor(boxes, sort_field, has_more)
+        
+        response = CricketBoxListResponse(
+            boxes=[CricketBoxService._to_response(b) for b in boxes],
+            total=total,
+            page=page,
+            limit=limit,
+            has_more=has_more,
+            next_cursor=cursor_out,
+        )
+        
+        await cache.set(
+            cache_key,
+            response.model_dump(mode="json"),
+            settings.BOX_LIST_CACHE_TTL_SECONDS,
+        )
+        
+        return response
+    
+    @staticmethod
+    def geo_near_stage(query, near: Tuple[float, float], radius_km: float) -> dict:
+        """
+        $geoNear stage for boxes within radius_km of near=(lat, lng)
+        
+        The query's filters ride along, so distance and every other
+        filter are answered together from the 2dsphere index.
+        Adds distance_m to each result.
+        """
+        lat, lng = near
+        return {
+            "near": {"type": "Point", "coordinates": [lng, lat]},
+            "distanceField": "distance_m",
+            "maxDistance": radius_km * 1000,
+            "query": query.get_filter_query(),
+            "key": "location",
+            "spherical": True,
+        }
+    
+    @staticmethod
+    async def _list_nearby(
+        query,
+        near: Tuple[float, float],
+        radius_km: float,
+        page: int,
+        limit: int,
+        cursor: Optional[str],
+        include_total: bool,
+    ) -> CricketBoxListResponse:
+        """Distance-sorted page of boxes within radius_km of near"""
+        lat, lng = near
         
-        # Sort
-        if sort_by == "rating":
-            query = query.sort(-CricketBox.rating)
-        elif sort_by == "price":
-            query = query.sort(CricketBox.price_per_hour)
-        elif sort_by == "name":
-            query = query.sort(CricketBox.name)
+        total = None
+        if include_total:
+            total = await cached_count(query.find({
+                "location": {"$geoWithin": {"$centerSphere": [
+                    [lng, lat], radius_km / CricketBoxService.EARTH_RADIUS_KM
+                ]}}
+            }))
         
-        # Paginate
-        skip = (page - 1) * limit
-        boxes = await query.skip(skip).limit(limit).to_list()
+        geo_near = CricketBoxService.geo_near_stage(query, near, radius_km)
+        pipeline = [{"$geoNear": geo_near}]
+        
+        # Keyset on (distance, _id): start the scan at the last distance
+        if cursor:
+            last_distance, last_id = decode_cursor(cursor, "distance_m")
+            geo_near["minDistance"] = last_distance
+            pipeline.append({"$match": {"$or": [
+                {"distance_m": {"$gt": last_distance}},
+                {"distance_m": last_distance, "_id": {"$gt": last_id}},
+            ]}})
+        
+        pipeline.append({"$sort": {"distance_m": 1, "_id": 1}})
+        if not cursor and page > 1:
+            pipeline.append({"$skip": (page - 1) * limit})
+        pipeline.append({"$limit": limit + 1})
+        
+        rows = await CricketBox.aggregate(pipeline).to_list()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        cursor_out = None
+        if has_more and rows:
+            cursor_out = encode_cursor("distance_m", rows[-1]["distance_m"], rows[-1]["_id"])
+        
+        boxes = []
+        for row in rows:
+            distance_m = row.pop("distance_m")
+            boxes.append(CricketBoxService._to_response(
+                CricketBox.model_validate(row),
+                distance_km=round(distance_m / 1000, 2),
+            ))
         
         return CricketBoxListResponse(
-            boxes=[CricketBoxService._to_response(b) for b in boxes],
+            boxes=boxes,
             total=total,
             page=page,
             limit=limit,
+            has_more=has_more,
+            next_cursor=cursor_out,
         )
     
     @staticmethod
     async def get_featured_boxes(limit: int = 5) -> CricketBoxListResponse:
         """Get featured boxes for homepage"""
+        cache_key = f"{CricketBoxService.CACHE_FEATURED}{limit}"
+        
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            return CricketBoxListResponse.model_validate(cached)
+        
         boxes = await CricketBox.find(
             CricketBox.is_active == True,
             CricketBox.is_approved == True,
@@ -133,27 +365,73 @@ class CricketBoxService:
             ).sort(-CricketBox.rating).limit(limit - len(boxes)).to_list()
             boxes.extend(additional)
         
-        return CricketBoxListResponse(
+        response = CricketBoxListResponse(
             boxes=[CricketBoxService._to_response(b) for b in boxes],
             total=len(boxes),
             page=1,
             limit=limit,
         )
+        
+        await cache.set(
+            cache_key,
+            response.model_dump(mode="json"),
+            settings.BOX_CACHE_TTL_SECONDS,
+        )
+        
+        return response
     
     @staticmethod
     async def get_all_areas() -> List[str]:
         """Get all unique areas"""
-        boxes = await CricketBox.find(
-            CricketBox.is_active == True,
-            CricketBox.is_approved == True,
-        ).to_list()
+        area_counts = await CricketBoxService.get_area_counts()
+        return sorted(a.area for a in area_counts)
+    
+    @staticmethod
+    async def get_area_counts() -> List[AreaCount]:
+        """
+        Get listed box count per area, most boxes first
+        
+        Grouped in MongoDB over the listing index and memoized until a
+        box is created, approved, deactivated or changes area.
+        """
+        cached = await cache.get(CricketBoxService.CACHE_AREAS)
         
-        areas = list(set(b.area for b in boxes))
-        return sorted(areas)
+        if cached is None:
+            rows = await CricketBox.find(
+                CricketBox.is_active == True,
+                CricketBox.is_approved == True,
+            ).aggregate([
+                {"$group": {"_id": "$area", "box_count": {"$sum": 1}}},
+                {"$sort": {"box_count": -1, "_id": 1}},
+            ]).to_list()
+            
+            cached = [{"area": r["_id"], "box_count": r["box_count"]} for r in rows]
+            
+            await cache.set(
+                CricketBoxService.CACHE_AREAS,
+                cached,
+                settings.AREA_CACHE_TTL_SECONDS,
+            )
+        
+        return [AreaCount(**row) for row in cached]
+    
+    @staticmethod
+    async def suggest(q: str, limit: int = 8) -> List[BoxSuggestion]:
+        """Typeahead suggestions from the in-memory index"""
+        return [
+            BoxSuggestion(**s)
+            for s in box_suggest_index.suggest(q, limit)
+        ]
     
     @staticmethod
     async def get_box_by_id(box_id: str) -> CricketBoxResponse:
         """Get box details by ID"""
+        cache_key = f"{CricketBoxService.CACHE_DETAIL}{box_id}"
+        
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            return CricketBoxResponse.model_validate(cached)
+        
         box = await CricketBox.get(box_id)
         
         if not box:
@@ -162,7 +440,15 @@ class CricketBoxService:
                 detail="Cricket box not found"
             )
         
-        return CricketBoxService._to_response(box)
+        response = CricketBoxService._to_response(box)
+        
+        await cache.set(
+            cache_key,
+            response.model_dump(mode="json"),
+            settings.BOX_CACHE_TTL_SECONDS,
+        )
+        
+        return response
     
     @staticmethod
     async def create_box(
@@ -193,6 +479,9 @@ class CricketBoxService:
         
         await box.insert()
         
+        await CricketBoxService.invalidate_cache(areas=True)
+        box_suggest_index.upsert(box)
+        
         return CricketBoxService._to_response(box)
     
     @staticmethod
@@ -222,8 +511,24 @@ class CricketBoxService:
         for field, value in update_data.items():
             setattr(box, field, value)
         
-        box.updated_at = datetime.utcnow()
-        await box.save()
+        # Write only what changed (plus derived fields) so counters and
+        # rating aggregates updated meanwhile by $inc aren't overwritten
+        box.sync_location()
+        box.sync_facilities_mask()
+        changes = {field: getattr(box, field) for field in update_data}
+        if "latitude" in update_data or "longitude" in update_data:
+            changes["location"] = box.location
+        if "facilities" in update_data:
+            changes["facilities_mask"] = box.facilities_mask
+        changes["updated_at"] = datetime.utcnow()
+        
+        await box.set(changes)
+        
+        await CricketBoxService.invalidate_cache(
+            box_id,
+            areas="area" in update_data or "is_active" in update_data,
+        )
+        box_suggest_index.upsert(box)
         
         return CricketBoxService._to_response(box)
     
@@ -244,8 +549,9 @@ class CricketBoxService:
                 detail="You can only delete your own cricket box"
             )
         
-        box.is_active = False
-        box.updated_at = datetime.utcnow()
-        await box.save()
+        await box.set({"is_active": False, "updated_at": datetime.utcnow()})
+        
+        await CricketBoxService.invalidate_cache(box_id, areas=True)
+        box_suggest_index.remove(box_id)
         
         return SuccessResponse(message="Cricket box deleted successfully")
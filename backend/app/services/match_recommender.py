@@ -0,0 +1,374 @@
+"""
+Match Recommender
+In-memory inverted index of open match requests, scored against a player's profile
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from beanie import PydanticObjectId
+from pydantic import BaseModel, Field
+
+from app.core.clock import local_now
+from app.core.config import settings
+from app.models.cricket_box import CricketBox
+from app.models.match_request import MatchRequest, RequestStatus
+from app.models.user import SkillLevel, User
+
+
+# Score weights (sum to 1)
+AREA_WEIGHT = 0.4
+SKILL_WEIGHT = 0.25
+TIME_WEIGHT = 0.2
+SPOTS_WEIGHT = 0.15
+
+# Spots left at which the spots score tops out
+FULL_SPOTS_SCORE_AT = 4
+
+# Nearby areas never score as high as the player's own
+NEARBY_AREA_MAX_SCORE = 0.8
+
+EARTH_RADIUS_KM = 6371.0
+
+SKILL_ORDER = [level.value for level in SkillLevel]
+
+# Times of day, in order round the clock, with the local hour each starts at
+TIME_BUCKETS = [("morning", 5), ("afternoon", 12), ("evening", 17), ("night", 21)]
+BUCKET_NAMES = [name for name, _ in TIME_BUCKETS]
+
+
+class _JoinRef(BaseModel):
+    user_id: str
+
+
+class _MatchSource(BaseModel):
+    """Fields needed to index a match request"""
+    id: PydanticObjectId = Field(alias="_id")
+    creator_id: str
+    match_date: date
+    preferred_time: str
+    start_time: Optional[str] = None
+    preferred_area: str
+    players_needed: int
+    players_joined: int = 0
+    skill_level_required: Optional[str] = None
+    join_requests: List[_JoinRef] = []
+    accepted_players: List[str] = []
+    expires_at: Optional[datetime] = None
+
+
+@dataclass
+class _OpenMatch:
+    """An open request as scored by the recommender"""
+    creator_id: str
+    area: str
+    match_date: date
+    expires_at: Optional[datetime]
+    time_bucket: Optional[str]
+    skill: Optional[int]  # Index into SKILL_ORDER; None = any level
+    spots_left: int
+    members: Set[str] = field(default_factory=set)  # Asked to join or accepted
+
+
+def _area_key(area: Optional[str]) -> Optional[str]:
+    return area.strip().lower() if area and area.strip() else None
+
+
+def _skill_rank(level: Optional[str]) -> Optional[int]:
+    level = (level or "").strip().lower()
+    return SKILL_ORDER.index(level) if level in SKILL_ORDER else None
+
+
+def _bucket_for_hour(hour: int) -> str:
+    bucket = TIME_BUCKETS[-1][0]  # Before the first start is still night
+    for name, starts_at in TIME_BUCKETS:
+        if hour >= starts_at:
+            bucket = name
+    return bucket
+
+
+def time_bucket(preferred_time: Optional[str], start_time: Optional[str] = None) -> Optional[str]:
+    """
+    Time of day for a request or player
+
+    Uses start_time ("18:00") when given, else preferred_time, which is
+    either a name ("Evening") or a time/range ("18:00-20:00").
+    """
+    match = re.match(r"\s*(\d{1,2}):\d{2}", start_time or "")
+    if match:
+        return _bucket_for_hour(int(match.group(1)) % 24)
+
+    text = (preferred_time or "").lower()
+    for name in BUCKET_NAMES:
+        if name in text:
+            return name
+
+    match = re.search(r"(\d{1,2}):\d{2}", text)
+    if match:
+        return _bucket_for_hour(int(match.group(1)) % 24)
+
+    return None
+
+
+def _distance_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Great-circle distance between two (lat, lng) points"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (*a, *b))
+    h = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+class MatchRecommendationIndex:
+    """
+    Open match requests posted by area, time of day and skill level
+
+    A player's candidates are the union of the postings for their area
+    and the areas near it, their time of day and their skill level, so a
+    lookup only touches requests that can score on at least one of them.
+    Area proximity uses the centre of each area's listed boxes. Requests
+    are upserted as they are created, joined, accepted, closed or
+    cancelled, and the whole index is rebuilt from MongoDB periodically
+    so writes made by other workers show up; changes made while a
+    rebuild waits on MongoDB are replayed onto the new index before it
+    is swapped in. Past and expired requests are skipped at lookup until
+    the expiry job or next rebuild drops them.
+    """
+
+    def __init__(self):
+        self._matches: Dict[str, _OpenMatch] = {}
+        self._by_area: Dict[str, Set[str]] = {}
+        self._by_time: Dict[str, Set[str]] = {}
+        self._by_skill: Dict[Optional[int], Set[str]] = {}
+        self._nearby: Dict[str, Dict[str, float]] = {}  # area -> {other area: km}
+        # Per running rebuild: (request_id, entry or None if removed)
+        self._replay_logs: List[List[Tuple[str, Optional[_OpenMatch]]]] = []
+
+    # ---------- Building ----------
+
+    @staticmethod
+    def _entry(req: Union[MatchRequest, _MatchSource]) -> _OpenMatch:
+        members = {jr.user_id for jr in req.join_requests}
+        members.update(req.accepted_players)
+
+        return _OpenMatch(
+            creator_id=req.creator_id,
+            area=_area_key(req.preferred_area),
+            match_date=req.match_date,
+            expires_at=req.expires_at,
+            time_bucket=time_bucket(req.preferred_time, req.start_time),
+            skill=_skill_rank(req.skill_level_required),
+            spots_left=req.players_needed - req.players_joined,
+            members=members,
+        )
+
+    def _postings(self, match: _OpenMatch) -> List[Tuple[Dict, object]]:
+        postings = [(self._by_area, match.area), (self._by_skill, match.skill)]
+        if match.time_bucket:
+            postings.append((self._by_time, match.time_bucket))
+        return postings
+
+    def _add(self, request_id: str, match: _OpenMatch):
+        self._matches[request_id] = match
+        for index, key in self._postings(match):
+            index.setdefault(key, set()).add(request_id)
+
+    def _drop(self, request_id: str):
+        match = self._matches.pop(request_id, None)
+        if match is None:
+            return
+
+        for index, key in self._postings(match):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(request_id)
+                if not ids:
+                    del index[key]
+
+    def _apply(self, request_id: str, match: Optional[_OpenMatch]):
+        self._drop(request_id)
+        if match is not None:
+            self._add(request_id, match)
+
+    def _record(self, request_id: str, match: Optional[_OpenMatch]):
+        """Note a change for any rebuild in progress to replay"""
+        for log in self._replay_logs:
+            log.append((request_id, match))
+
+    def remove(self, request_id: str):
+        """Drop a request (closed, cancelled, expired or deleted)"""
+        self._apply(request_id, None)
+        self._record(request_id, None)
+
+    def upsert(self, req: MatchRequest):
+        """Reindex a request after a change; requests no longer open are removed"""
+        match = None
+        if req.status == RequestStatus.OPEN and req.match_date >= local_now().date():
+            match = self._entry(req)
+
+        self._apply(str(req.id), match)
+        self._record(str(req.id), match)
+
+    @staticmethod
+    async def _area_distances() -> Dict[str, Dict[str, float]]:
+        """Distances between areas within the nearby radius, from their boxes' centres"""
+        rows = await CricketBox.find(
+            CricketBox.is_active == True,
+            CricketBox.is_approved == True,
+        ).aggregate([
+            {"$match": {"latitude": {"$type": "number"}, "longitude": {"$type": "number"}}},
+            {"$group": {"_id": "$area", "lat": {"$avg": "$latitude"}, "lng": {"$avg": "$longitude"}}},
+        ]).to_list()
+
+        centres: Dict[str, Tuple[float, float]] = {}
+        for row in rows:
+            key = _area_key(row["_id"])
+            if key:
+                centres[key] = (row["lat"], row["lng"])
+
+        nearby: Dict[str, Dict[str, float]] = {}
+        for area, centre in centres.items():
+            for other, other_centre in centres.items():
+                if other == area:
+                    continue
+                km = _distance_km(centre, other_centre)
+                if km <= settings.NEARBY_DEFAULT_RADIUS_KM:
+                    nearby.setdefault(area, {})[other] = km
+
+        return nearby
+
+    async def rebuild(self):
+        """Rebuild the whole index from open, upcoming requests"""
+        log: List[Tuple[str, Optional[_OpenMatch]]] = []
+        self._replay_logs.append(log)
+        try:
+            requests = await MatchRequest.find(
+                MatchRequest.status == RequestStatus.OPEN,
+                MatchRequest.match_date >= local_now().date(),
+            ).project(_MatchSource).to_list()
+            nearby = await self._area_distances()
+        finally:
+            self._replay_logs.remove(log)
+
+        fresh = MatchRecommendationIndex()
+        for req in requests:
+            fresh._add(str(req.id), self._entry(req))
+
+        # The snapshot may predate changes made while it loaded
+        for request_id, match in log:
+            fresh._apply(request_id, match)
+
+        # Swap in one step so lookups never see a half-built index
+        self._matches = fresh._matches
+        self._by_area = fresh._by_area
+        self._by_time = fresh._by_time
+        self._by_skill = fresh._by_skill
+        self._nearby = nearby
+
+    # ---------- Lookup ----------
+
+    def _candidates(self, area: Optional[str], bucket: Optional[str], skill: Optional[int]) -> Set[str]:
+        if area is None and bucket is None and skill is None:
+            return set(self._matches)  # Empty profile: everything scores the same
+
+        ids: Set[str] = set()
+        if area:
+            ids |= self._by_area.get(area, set())
+            for other in self._nearby.get(area, {}):
+                ids |= self._by_area.get(other, set())
+        if bucket:
+            ids |= self._by_time.get(bucket, set())
+        if skill is not None:
+            ids |= self._by_skill.get(skill, set())
+            ids |= self._by_skill.get(None, set())
+        return ids
+
+    def _score(
+        self,
+        match: _OpenMatch,
+        area: Optional[str],
+        bucket: Optional[str],
+        skill: Optional[int],
+    ) -> Tuple[float, List[str]]:
+        reasons = []
+
+        area_score = 0.0
+        if area and match.area == area:
+            area_score = 1.0
+            reasons.append("In your area")
+        elif area and match.area in self._nearby.get(area, {}):
+            km = self._nearby[area][match.area]
+            area_score = NEARBY_AREA_MAX_SCORE * (1 - km / settings.NEARBY_DEFAULT_RADIUS_KM)
+            reasons.append(f"Near your area ({km:.1f} km)")
+
+        if match.skill is None:
+            skill_score = 0.8
+        elif skill is None:
+            skill_score = 0.5
+        else:
+            skill_score = {0: 1.0, 1: 0.5}.get(abs(match.skill - skill), 0.0)
+            if skill_score == 1.0:
+                reasons.append("Matches your skill level")
+
+        if bucket is None or match.time_bucket is None:
+            time_score = 0.5
+        else:
+            steps = abs(BUCKET_NAMES.index(match.time_bucket) - BUCKET_NAMES.index(bucket))
+            steps = min(steps, len(BUCKET_NAMES) - steps)  # Night is next to morning
+            time_score = {0: 1.0, 1: 0.5}.get(steps, 0.0)
+            if time_score == 1.0:
+                reasons.append("At your preferred time")
+
+        spots_score = min(match.spots_left, FULL_SPOTS_SCORE_AT) / FULL_SPOTS_SCORE_AT
+        reasons.append(f"{match.spots_left} spot{'s' if match.spots_left != 1 else ''} left")
+
+        score = (
+            AREA_WEIGHT * area_score
+            + SKILL_WEIGHT * skill_score
+            + TIME_WEIGHT * time_score
+            + SPOTS_WEIGHT * spots_score
+        )
+        return round(score, 3), reasons
+
+    def recommend(self, user: User, limit: int = 10) -> List[Tuple[str, float, List[str]]]:
+        """
+        Best open requests for a player as (request_id, score, reasons)
+
+        Skips the player's own requests, ones they already asked to join,
+        full ones and ones that are past or expired. Ties go to the
+        earlier match.
+        """
+        user_id = str(user.id)
+        area = _area_key(user.area)
+        bucket = time_bucket(user.preferred_time)
+        skill = _skill_rank(user.skill_level.value if user.skill_level else None)
+        today = local_now().date()
+        now = datetime.utcnow()
+
+        scored = []
+        for request_id in self._candidates(area, bucket, skill):
+            match = self._matches[request_id]
+
+            if (
+                match.creator_id == user_id
+                or user_id in match.members
+                or match.spots_left <= 0
+                or match.match_date < today
+                or (match.expires_at is not None and match.expires_at <= now)
+            ):
+                continue
+
+            score, reasons = self._score(match, area, bucket, skill)
+            scored.append((score, match.match_date, request_id, reasons))
+
+        scored.sort(key=lambda s: (-s[0], s[1], s[2]))
+
+        return [(request_id, score, reasons) for score, _, request_id, reasons in scored[:limit]]
+
+
+# Global match recommender instance
+match_recommender = MatchRecommendationIndex()
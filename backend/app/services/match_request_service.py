@@ -6,6 +6,10 @@ Business logic for player matching
 from datetime import datetime, date
 from typing import Optional
 from fastapi import HTTPException, status
+from pymongo import DESCENDING
+from pydantic import BaseModel, Field
+from beanie import PydanticObjectId
+from beanie.operators import And, In, Or
 
 from app.models.match_request import MatchRequest, RequestStatus, JoinRequest, JoinRequestStatus
 from app.models.user import User
@@ -14,16 +18,45 @@ from app.schemas.match_request import (
     MatchRequestUpdate,
     MatchRequestResponse,
     MatchRequestListResponse,
+    MatchRecommendation,
+    MatchRecommendationListResponse,
     JoinRequestCreate,
     JoinRequestResponse,
 )
 from app.schemas.common import SuccessResponse
+from app.core.clock import local_now
+from app.core.config import settings
+from app.core.pagination import apply_keyset, cached_count, fetch_page, next_cursor
+from app.services.match_recommender import match_recommender
 from app.services.notification_service import NotificationService
 
 
+class _RequestRef(BaseModel):
+    """Projection for batched expiry"""
+    id: PydanticObjectId = Field(alias="_id")
+
+
 class MatchRequestService:
     """Match request service class"""
     
+    @staticmethod
+    def _stale_open():
+        """
+        Open requests that should be expired: the match day has passed
+        (match_date is local) or expires_at has. Each $or branch repeats
+        the status so it can use its own index.
+        """
+        return Or(
+            And(
+                MatchRequest.status == RequestStatus.OPEN,
+                MatchRequest.match_date < local_now().date(),
+            ),
+            And(
+                MatchRequest.status == RequestStatus.OPEN,
+                MatchRequest.expires_at <= datetime.utcnow(),
+            ),
+        )
+    
     @staticmethod
     def _to_response(req: MatchRequest) -> MatchRequestResponse:
         """Convert model to response"""
@@ -71,10 +104,25 @@ class MatchRequestService:
         status: str = "open",
         page: int = 1,
         limit: int = 10,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
     ) -> MatchRequestListResponse:
         """List match requests with filters"""
         query = MatchRequest.find(MatchRequest.status == status)
         
+        # Hide requests the expiry job hasn't reached yet. Now is taken
+        # to the minute so the filter (and its count cache key) stays the
+        # same between calls.
+        if status == RequestStatus.OPEN:
+            now = datetime.utcnow().replace(second=0, microsecond=0)
+            query = query.find(
+                MatchRequest.match_date >= local_now().date(),
+                Or(
+                    MatchRequest.expires_at == None,
+                    MatchRequest.expires_at > now,
+                ),
+            )
+        
         if area:
             query = query.find(MatchRequest.preferred_area == area)
         
@@ -84,18 +132,65 @@ class MatchRequestService:
         if skill_level:
             query = query.find(MatchRequest.skill_level_required == skill_level)
         
-        total = await query.count()
+        # Totals are optional and briefly cached; has_more comes from limit+1
+        total = await cached_count(query) if include_total else None
         
-        skip = (page - 1) * limit
-        requests = await query.sort(-MatchRequest.created_at).skip(skip).limit(limit).to_list()
+        # Paginate by cursor (keyset) when given, else by page
+        query = apply_keyset(query, "created_at", DESCENDING, cursor)
+        skip = 0 if cursor else (page - 1) * limit
+        requests, has_more = await fetch_page(query, limit, skip)
         
         return MatchRequestListResponse(
             requests=[MatchRequestService._to_response(r) for r in requests],
             total=total,
             page=page,
             limit=limit,
+            has_more=has_more,
+            next_cursor=next_cursor(requests, "created_at", has_more),
         )
     
+    @staticmethod
+    async def expire_requests() -> int:
+        """
+        Move open requests whose match day or expires_at has passed to
+        EXPIRED (background job)
+        
+        Works in batches: an indexed query picks the ids and one
+        update_many flips them, then they are dropped from the
+        recommendation index.
+        
+        Returns:
+            Number of requests expired
+        """
+        expired = 0
+        
+        while True:
+            refs = await MatchRequest.find(MatchRequestService._stale_open()).limit(
+                settings.MATCH_EXPIRY_BATCH_SIZE
+            ).project(_RequestRef).to_list()
+            if not refs:
+                break
+            
+            ids = [r.id for r in refs]
+            
+            # Status filter again: the creator or another worker may have changed some
+            result = await MatchRequest.find(
+                In(MatchRequest.id, ids),
+                MatchRequest.status == RequestStatus.OPEN,
+            ).update({"$set": {
+                "status": RequestStatus.EXPIRED,
+                "updated_at": datetime.utcnow(),
+            }})
+            expired += result.modified_count if result else 0
+            
+            for request_id in ids:
+                match_recommender.remove(str(request_id))
+            
+            if len(refs) < settings.MATCH_EXPIRY_BATCH_SIZE:
+                break
+        
+        return expired
+    
     @staticmethod
     async def create_request(
         user_id: str,
@@ -129,6 +224,7 @@ class MatchRequestService:
         )
         
         await match_req.insert()
+        match_recommender.upsert(match_req)
         
         return MatchRequestService._to_response(match_req)
     
@@ -151,6 +247,8 @@ class MatchRequestService:
         status: Optional[str] = None,
         page: int = 1,
         limit: int = 10,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
     ) -> MatchRequestListResponse:
         """Get user's created match requests"""
         query = MatchRequest.find(MatchRequest.creator_id == user_id)
@@ -158,16 +256,21 @@ class MatchRequestService:
         if status:
             query = query.find(MatchRequest.status == status)
         
-        total = await query.count()
+        # Totals are optional and briefly cached; has_more comes from limit+1
+        total = await cached_count(query) if include_total else None
         
-        skip = (page - 1) * limit
-        requests = await query.sort(-MatchRequest.created_at).skip(skip).limit(limit).to_list()
+        # Paginate by cursor (keyset) when given, else by page
+        query = apply_keyset(query, "created_at", DESCENDING, cursor)
+        skip = 0 if cursor else (page - 1) * limit
+        requests, has_more = await fetch_page(query, limit, skip)
         
         return MatchRequestListResponse(
             requests=[MatchRequestService._to_response(r) for r in requests],
             total=total,
             page=page,
             limit=limit,
+            has_more=has_more,
+            next_cursor=next_cursor(requests, "created_at", has_more),
         )
     
     @staticmethod
@@ -176,30 +279,75 @@ class MatchRequestService:
         status: Optional[str] = None,
         page: int = 1,
         limit: int = 10,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
     ) -> MatchRequestListResponse:
         """Get requests where user has joined or is accepted"""
-        # Find requests where user is in join_requests or accepted_players
-        all_requests = await MatchRequest.find().to_list()
-        
-        user_requests = [
-            r for r in all_requests
-            if user_id in r.accepted_players 
-            or any(jr.user_id == user_id for jr in r.join_requests)
-        ]
+        # Each $or branch has its own (member, created_at, _id) index, so
+        # Mongo merges two sorted index scans instead of reading every request
+        query = MatchRequest.find(Or(
+            {"join_requests.user_id": user_id},
+            {"accepted_players": user_id},
+        ))
         
         if status:
-            user_requests = [r for r in user_requests if r.status == status]
+            query = query.find(MatchRequest.status == status)
         
-        total = len(user_requests)
+        # Totals are optional and briefly cached; has_more comes from limit+1
+        total = await cached_count(query) if include_total else None
         
-        skip = (page - 1) * limit
-        paginated = user_requests[skip:skip + limit]
+        # Paginate by cursor (keyset) when given, else by page
+        query = apply_keyset(query, "created_at", DESCENDING, cursor)
+        skip = 0 if cursor else (page - 1) * limit
+        requests, has_more = await fetch_page(query, limit, skip)
         
         return MatchRequestListResponse(
-            requests=[MatchRequestService._to_response(r) for r in paginated],
+            requests=[MatchRequestService._to_response(r) for r in requests],
             total=total,
             page=page,
             limit=limit,
+            has_more=has_more,
+            next_cursor=next_cursor(requests, "created_at", has_more),
+        )
+    
+    @staticmethod
+    async def get_recommendations(user_id: str, limit: int = 10) -> MatchRecommendationListResponse:
+        """
+        Open requests that best fit the player's area, skill level and
+        preferred time, best first
+
+        Scored from the in-memory index; only the chosen requests are
+        read, to return them in full and drop any closed meanwhile on
+        another worker.
+        """
+        user = await User.get(user_id)
+        
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        
+        ranked = match_recommender.recommend(user, limit)
+        if not ranked:
+            return MatchRecommendationListResponse(recommendations=[])
+        
+        requests = await MatchRequest.find(
+            In(MatchRequest.id, [PydanticObjectId(request_id) for request_id, _, _ in ranked]),
+            MatchRequest.status == RequestStatus.OPEN,
+        ).to_list()
+        by_id = {str(r.id): r for r in requests}
+        
+        return MatchRecommendationListResponse(
+            recommendations=[
+                MatchRecommendation(
+                    request=MatchRequestService._to_response(by_id[request_id]),
+                    score=score,
+                    reasons=reasons,
+                )
+                for request_id, score, reasons in ranked
+                if request_id in by_id
+            ],
         )
     
     @staticmethod
@@ -230,6 +378,7 @@ class MatchRequestService:
         
         req.updated_at = datetime.utcnow()
         await req.save()
+        match_recommender.upsert(req)
         
         return MatchRequestService._to_response(req)
     
@@ -256,6 +405,7 @@ class MatchRequestService:
         req.status = RequestStatus.CANCELLED
         req.updated_at = datetime.utcnow()
         await req.save()
+        match_recommender.upsert(req)
         
         return SuccessResponse(message="Match request cancelled")
     
@@ -274,7 +424,8 @@ class MatchRequestService:
                 detail="Match request not found"
             )
         
-        if req.status != RequestStatus.OPEN:
+        # Past matches count as closed even before the expiry job runs
+        if req.status != RequestStatus.OPEN or req.match_date < local_now().date():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="This match request is no longer accepting players"
@@ -307,6 +458,7 @@ class MatchRequestService:
         req.join_requests.append(join_req)
         req.updated_at = datetime.utcnow()
         await req.save()
+        match_recommender.upsert(req)
         
         # Send notification to creator
         await NotificationService.send_match_request_notification(
@@ -362,6 +514,7 @@ class MatchRequestService:
         
         req.updated_at = datetime.utcnow()
         await req.save()
+        match_recommender.upsert(req)
         
         # Send notification to accepted player
         await NotificationService.send_match_request_notification(
@@ -407,6 +560,7 @@ class MatchRequestService:
         
         req.updated_at = datetime.utcnow()
         await req.save()
+        match_recommender.upsert(req)
         
         return SuccessResponse(message="Player rejected")
     
@@ -432,5 +586,6 @@ class MatchRequestService:
         
         req.updated_at = datetime.utcnow()
         await req.save()
+        match_recommender.upsert(req)
         
         return SuccessResponse(message="Join request withdrawn")
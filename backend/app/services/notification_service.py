@@ -4,7 +4,9 @@ Send notifications to users
 """
 
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+from beanie import PydanticObjectId
+from pymongo.errors import BulkWriteError
 
 from app.models.notification import Notification, NotificationType
 from app.schemas.common import SuccessResponse
@@ -36,20 +38,57 @@ class NotificationService:
         )
         
         await notification.insert()
+        await NotificationService._push(notification)
         
-        # Send via WebSocket if user is online
-        if ws_manager.is_user_online(user_id):
-            await ws_manager.send_to_user(user_id, {
+        return notification
+    
+    @staticmethod
+    async def _push(notification: Notification):
+        """Send via WebSocket if user is online"""
+        if ws_manager.is_user_online(notification.user_id):
+            await ws_manager.send_to_user(notification.user_id, {
                 "event": "notification",
                 "data": {
                     "id": str(notification.id),
-                    "type": notification_type,
-                    "title": title,
-                    "message": message,
+                    "type": notification.notification_type,
+                    "title": notification.title,
+                    "message": notification.message,
                 }
             })
+    
+    @staticmethod
+    async def create_notifications(notifications: List[Notification]) -> List[Notification]:
+        """
+        Save many notifications with one insert_many, then push each
+        to its recipient if online
         
-        return notification
+        Notifications whose dedupe_key is already taken are dropped.
+        
+        Returns:
+            The notifications saved
+        """
+        if not notifications:
+            return []
+        
+        # insert_many doesn't assign ids
+        for notification in notifications:
+            notification.id = PydanticObjectId()
+        
+        duplicates = set()
+        try:
+            await Notification.insert_many(notifications, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                if error.get("code") != 11000:
+                    raise
+                duplicates.add(error["index"])
+        
+        saved = [n for i, n in enumerate(notifications) if i not in duplicates]
+        
+        for notification in saved:
+            await NotificationService._push(notification)
+        
+        return saved
     
     @staticmethod
     async def send_booking_notification(
@@ -3,15 +3,20 @@ Payment Service
 Razorpay payment integration
 """
 
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import List, Optional
 from fastapi import HTTPException, Request, status
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from beanie import PydanticObjectId
+from beanie.operators import In
 import razorpay
 import hmac
 import hashlib
 
 from app.core.config import settings
 from app.models.payment import Payment, PaymentStatus, PaymentMethod
+from app.models.notification import NotificationType
 from app.models.booking import Booking, BookingStatus
 from app.models.booking import PaymentStatus as BookingPaymentStatus
 from app.schemas.payment import (
@@ -24,6 +29,9 @@ from app.schemas.payment import (
     RefundResponse,
 )
 from app.services.notification_service import NotificationService
+from app.services.booking_service import BookingService
+from app.services.booking_reminders import booking_reminders
+from app.services.slot_updates import slot_updates, SLOT_BOOKED
 
 
 class PaymentService:
@@ -37,13 +45,279 @@ class PaymentService:
         )
     
     @staticmethod
-    async def create_order(
-        user_id: str,
-        request: PaymentOrderCreate
-    ) -> PaymentOrderResponse:
-        """Create Razorpay order"""
+    def _razorpay_refund(payment: Payment, amount: float, reason: str) -> dict:
+        """Refund part or all of a captured payment through Razorpay"""
+        client = PaymentService._get_razorpay_client()
+        
+        return client.payment.refund(
+            payment.razorpay_payment_id,
+            {
+                "amount": round(amount * 100),
+                "notes": {"reason": reason}
+            }
+        )
+    
+    @staticmethod
+    def _razorpay_refunded(payment_id: str) -> float:
+        """Total Razorpay has refunded on a payment so far"""
+        client = PaymentService._get_razorpay_client()
+        return client.payment.fetch(payment_id)["amount_refunded"] / 100
+    
+    @staticmethod
+    async def _record_refund(
+        payment_id: PydanticObjectId,
+        refund_id: Optional[str],
+        amount: float,
+        reason: str,
+        settle_due: bool = False,
+    ):
+        """
+        Note a refund Razorpay accepted, in one atomic update so concurrent
+        refunds all add up; fully refunded payments become REFUNDED
+        
+        settle_due takes the amount off refund_due and releases the claim.
+        """
+        now = datetime.utcnow()
+        changes = {
+            "refund_amount": {"$add": [{"$ifNull": ["$refund_amount", 0]}, amount]},
+            "refund_reason": reason,
+            "refunded_at": now,
+            "updated_at": now,
+        }
+        if refund_id:
+            changes["refund_id"] = refund_id
+        if settle_due:
+            changes["refund_due"] = {"$subtract": ["$refund_due", amount]}
+            changes["refund_claimed_at"] = None
+        
+        await Payment.get_motor_collection().update_one(
+            {"_id": payment_id},
+            [
+                {"$set": changes},
+                {"$set": {"status": {"$cond": [
+                    {"$gte": ["$refund_amount", "$amount"]},
+                    PaymentStatus.REFUNDED.value,
+                    "$status",
+                ]}}},
+            ],
+        )
+    
+    @staticmethod
+    async def _claim_due_refund(payment_id: PydanticObjectId, now: datetime) -> Optional[dict]:
+        """
+        Take the right to send a payment's refund_due
+        
+        Every worker runs retry_refunds and verify_payment refunds inline,
+        so the claim stops two of them sending the same amount. A claim
+        older than REFUND_CLAIM_TIMEOUT_SECONDS belonged to a worker that
+        died mid-refund and can be taken over.
+        
+        Returns:
+            The payment as it was before the claim, or None if nothing
+            is due or another worker holds the claim
+        """
+        stale = now - timedelta(seconds=settings.REFUND_CLAIM_TIMEOUT_SECONDS)
+        
+        return await Payment.get_motor_collection().find_one_and_update(
+            {
+                "_id": payment_id,
+                "refund_due": {"$gte": 0.01},  # Not float residue
+                "$or": [
+                    {"refund_claimed_at": None},
+                    {"refund_claimed_at": {"$lte": stale}},
+                ],
+            },
+            {"$set": {"refund_claimed_at": now}},
+            return_document=ReturnDocument.BEFORE,
+        )
+    
+    @staticmethod
+    async def _send_due_refund(payment: Payment) -> bool:
+        """
+        Refund payment.refund_due through Razorpay, once the claim is held
+        
+        On failure the claim is released, the amount stays due and
+        retry_refunds tries again. Taking over a stale claim first asks
+        Razorpay whether the last attempt went through, so it isn't sent
+        twice.
+        
+        Returns:
+            Whether the amount due is now refunded
+        """
+        now = datetime.utcnow()
+        claimed = await PaymentService._claim_due_refund(payment.id, now)
+        if claimed is None:
+            return False
+        
+        amount = claimed["refund_due"]
+        reason = claimed.get("refund_reason") or "Slot no longer available"
+        refund_id = None
+        
+        try:
+            already_sent = (
+                claimed.get("refund_claimed_at") is not None
+                and PaymentService._razorpay_refunded(payment.razorpay_payment_id)
+                >= (claimed.get("refund_amount") or 0) + amount
+            )
+            if not already_sent:
+                refund_id = PaymentService._razorpay_refund(payment, amount, reason)["id"]
+        except Exception as e:
+            print(f"⚠️ Refund of payment {payment.id} failed, will retry: {e}")
+            await Payment.get_motor_collection().update_one(
+                {"_id": payment.id, "refund_claimed_at": now},
+                {"$set": {"refund_claimed_at": None}},
+            )
+            return False
+        
+        await PaymentService._record_refund(payment.id, refund_id, amount, reason, settle_due=True)
+        
+        await Booking.find(
+            In(Booking.id, [PydanticObjectId(b) for b in claimed.get("refund_booking_ids", [])]),
+            Booking.payment_status == BookingPaymentStatus.REFUND_PENDING,
+        ).update({"$set": {
+            "payment_status": BookingPaymentStatus.REFUNDED,
+            "updated_at": datetime.utcnow(),
+        }})
+        
+        return True
+    
+    @staticmethod
+    async def _confirm_paid(booking: Booking, razorpay_payment_id: str) -> bool:
+        """
+        Confirm a booking that was just paid for
+        
+        One conditional update on the raw collection, so a slot taken
+        since the hold lapsed surfaces as DuplicateKeyError from
+        active_slot_units_unique (Document.save reports it as
+        RevisionIdWasChanged). Lapsed holds still in the index are
+        expired and the update retried once, as on insert.
+        
+        Returns:
+            Whether the booking is now confirmed; False if its slot was
+            taken or it was cancelled or paid for some other way
+        """
+        now = datetime.utcnow()
+        changes = {
+            "payment_status": BookingPaymentStatus.PAID.value,
+            "payment_id": razorpay_payment_id,
+            "booking_status": BookingStatus.CONFIRMED.value,
+            "hold_expires_at": None,
+            "paid_at": now,
+            "updated_at": now,
+        }
+        
+        for attempt in range(2):
+            try:
+                result = await Booking.get_motor_collection().update_one(
+                    {
+                        "_id": booking.id,
+                        "booking_status": {"$in": [BookingStatus.PENDING.value, BookingStatus.EXPIRED.value]},
+                        "payment_status": {"$ne": BookingPaymentStatus.PAID.value},
+                    },
+                    {"$set": changes},
+                )
+            except DuplicateKeyError:
+                if attempt or not booking.slot_units or not await BookingService._release_expired_holds(booking):
+                    return False
+                continue
+            
+            if not result.matched_count:
+                return False
+            
+            booking.payment_status = BookingPaymentStatus.PAID
+            booking.payment_id = razorpay_payment_id
+            booking.booking_status = BookingStatus.CONFIRMED
+            booking.hold_expires_at = None
+            booking.paid_at = booking.updated_at = now
+            return True
+        
+        return False
+    
+    @staticmethod
+    async def _mark_refund_pending(booking: Booking):
+        """Flag a booking whose payment is being given back (its status is left as is)"""
+        booking.payment_status = BookingPaymentStatus.REFUND_PENDING
+        booking.updated_at = datetime.utcnow()
+        
+        # A booking paid for by another order keeps that payment
+        await Booking.get_motor_collection().update_one(
+            {"_id": booking.id, "payment_status": {"$ne": BookingPaymentStatus.PAID.value}},
+            {"$set": {"payment_status": booking.payment_status.value, "updated_at": booking.updated_at}},
+        )
+    
+    @staticmethod
+    async def _refund_lost_bookings(payment: Payment, bookings: List[Booking], reason: str) -> float:
+        """
+        Give back what was paid for bookings whose slot was lost after payment
+        
+        No bookings means none could be found, so the whole payment is
+        given back. The bookings must already be marked REFUND_PENDING. The refund
+        is started right away (and retried by a job if Razorpay fails),
+        and the user is notified.
+        
+        Returns:
+            Amount being refunded
+        """
+        amount = sum(b.total_amount for b in bookings) if bookings else payment.amount
+        related_id = str(bookings[0].id) if bookings else payment.booking_id
+        
+        # $inc so a refund being sent by another worker isn't overwritten
+        await Payment.get_motor_collection().update_one(
+            {"_id": payment.id},
+            {
+                "$inc": {"refund_due": amount},
+                "$set": {"refund_reason": reason, "updated_at": datetime.utcnow()},
+                "$push": {"refund_booking_ids": {"$each": [str(b.id) for b in bookings]}},
+            },
+        )
+        
+        await PaymentService._send_due_refund(payment)
+        
+        await NotificationService.create_notification(
+            user_id=payment.user_id,
+            notification_type=NotificationType.PAYMENT_REFUNDED,
+            title="Refund started 💸",
+            message=(
+                f"{reason}. We've started a refund of ₹{amount:.0f}; "
+                f"it reaches your account in 5-7 working days."
+            ),
+            related_id=related_id,
+            related_type="booking",
+            action_url=f"/bookings/{related_id}",
+        )
+        
+        return amount
+    
+    @staticmethod
+    async def retry_refunds():
+        """Retry automatic refunds Razorpay failed to take (background job)"""
+        payments = await Payment.find(Payment.refund_due > 0).to_list()
+        
+        # Payments another worker is refunding are skipped by the claim
+        for payment in payments:
+            await PaymentService._send_due_refund(payment)
+    
+    @staticmethod
+    async def _bookings_to_pay(user_id: str, request: PaymentOrderCreate) -> List[Booking]:
+        """The booking, or the still-held occurrences of a series, an order is for"""
+        if request.series_id:
+            bookings = await Booking.find(
+                Booking.series_id == request.series_id,
+                Booking.user_id == user_id,
+                Booking.booking_status == BookingStatus.PENDING,
+                Booking.hold_expires_at > datetime.utcnow(),
+            ).sort("booking_date").to_list()
+            
+            if not bookings:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="No held bookings in this series, please book again"
+                )
+            
+            return bookings
+        
         # Get booking
-        booking = await Booking.get(request.booking_id)
+        booking = await Booking.get(request.booking_id) if request.booking_id else None
         
         if not booking:
             raise HTTPException(
@@ -63,17 +337,39 @@ class PaymentService:
                 detail="Booking already paid"
             )
         
+        if (
+            booking.booking_status == BookingStatus.EXPIRED
+            or (booking.hold_expires_at and booking.hold_expires_at <= datetime.utcnow())
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Slot hold expired, please book again"
+            )
+        
+        return [booking]
+    
+    @staticmethod
+    async def create_order(
+        user_id: str,
+        request: PaymentOrderCreate
+    ) -> PaymentOrderResponse:
+        """Create Razorpay order for a booking, or one for every held date of a series"""
+        bookings = await PaymentService._bookings_to_pay(user_id, request)
+        first = bookings[0]
+        total_amount = sum(b.total_amount for b in bookings)
+        
         # Create Razorpay order
         client = PaymentService._get_razorpay_client()
         
-        amount_in_paise = int(booking.total_amount * 100)
+        amount_in_paise = int(total_amount * 100)
         
         order_data = {
             "amount": amount_in_paise,
             "currency": "INR",
-            "receipt": booking.booking_number,
+            "receipt": first.booking_number,
             "notes": {
-                "booking_id": str(booking.id),
+                "booking_id": str(first.id),
+                "series_id": request.series_id or "",
                 "user_id": user_id,
             }
         }
@@ -81,15 +377,17 @@ class PaymentService:
         razorpay_order = client.order.create(data=order_data)
         
         # Calculate commission split
-        platform_commission = booking.platform_fee
-        owner_amount = booking.total_amount - platform_commission
+        platform_commission = sum(b.platform_fee for b in bookings)
+        owner_amount = total_amount - platform_commission
         
         # Create payment record
         payment = Payment(
             user_id=user_id,
-            booking_id=str(booking.id),
+            booking_id=str(first.id),
+            booking_ids=[str(b.id) for b in bookings],
+            series_id=request.series_id,
             razorpay_order_id=razorpay_order["id"],
-            amount=booking.total_amount,
+            amount=total_amount,
             platform_commission=platform_commission,
             owner_amount=owner_amount,
             status=PaymentStatus.CREATED,
@@ -97,16 +395,18 @@ class PaymentService:
         
         await payment.insert()
         
-        # Update booking with order ID
-        booking.payment_order_id = razorpay_order["id"]
-        await booking.save()
+        # Update bookings with order ID
+        await Booking.find(In(Booking.id, [b.id for b in bookings])).update({"$set": {
+            "payment_order_id": razorpay_order["id"],
+        }})
         
         return PaymentOrderResponse(
             order_id=razorpay_order["id"],
-            amount=booking.total_amount,
+            amount=total_amount,
             currency="INR",
-            booking_id=str(booking.id),
+            booking_id=str(first.id),
             razorpay_key_id=settings.RAZORPAY_KEY_ID,
+            series_id=request.series_id,
         )
     
     @staticmethod
@@ -151,6 +451,18 @@ class PaymentService:
                 message="Payment verification failed",
             )
         
+        if (
+            payment.status == PaymentStatus.CAPTURED
+            and payment.razorpay_payment_id == request.razorpay_payment_id
+        ):
+            # Checkout retried the call; the bookings were settled the first time
+            return PaymentVerifyResponse(
+                success=True,
+                message="Payment already verified",
+                booking_id=payment.booking_id,
+                payment_id=str(payment.id),
+            )
+        
         # Payment successful
         payment.razorpay_payment_id = request.razorpay_payment_id
         payment.razorpay_signature = request.razorpay_signature
@@ -159,23 +471,63 @@ class PaymentService:
         payment.updated_at = datetime.utcnow()
         await payment.save()
         
-        # Update booking
-        booking = await Booking.get(payment.booking_id)
+        # Update bookings (every date of a series is paid by one order).
+        # A newer order for the same series doesn't change what this one paid for.
+        if payment.booking_ids:
+            bookings = await Booking.find(
+                In(Booking.id, [PydanticObjectId(b) for b in payment.booking_ids])
+            ).sort("booking_date").to_list()
+        elif payment.series_id:
+            bookings = await Booking.find(
+                Booking.series_id == payment.series_id,
+                Booking.payment_order_id == payment.razorpay_order_id,
+            ).sort("booking_date").to_list()
+        else:
+            booking = await Booking.get(payment.booking_id)
+            bookings = [booking] if booking else []
+        
+        confirmed, lost = [], []
+        for booking in bookings:
+            if await PaymentService._confirm_paid(booking, request.razorpay_payment_id):
+                confirmed.append(booking)
+            else:
+                # Paid after the hold expired and someone else took the slot
+                # (or the booking was cancelled); give the money back
+                await PaymentService._mark_refund_pending(booking)
+                lost.append(booking)
+        
+        refund_message = ""
+        if lost or not bookings:
+            # Nothing found at all still leaves money captured; give it all back
+            amount = await PaymentService._refund_lost_bookings(
+                payment,
+                lost,
+                "Your slot hold expired and the slot is no longer available",
+            )
+            refund_message = f"A refund of ₹{amount:.0f} has been started."
         
-        if booking:
-            booking.payment_status = BookingPaymentStatus.PAID
-            booking.payment_id = request.razorpay_payment_id
-            booking.booking_status = BookingStatus.CONFIRMED
-            booking.paid_at = datetime.utcnow()
-            booking.updated_at = datetime.utcnow()
-            await booking.save()
+        if not confirmed:
+            return PaymentVerifyResponse(
+                success=False,
+                message=f"Slot hold expired and the slot is no longer available. {refund_message}",
+                booking_id=payment.booking_id,
+                payment_id=str(payment.id),
+            )
+        
+        for booking in confirmed:
+            booking_reminders.schedule(booking)
+            await slot_updates.publish(booking, SLOT_BOOKED)
+        
+        if confirmed:
+            booking = confirmed[0]
+            dates = f" for {len(confirmed)} weeks" if payment.series_id else ""
             
             # Send notification to user
             await NotificationService.send_booking_notification(
                 user_id=booking.user_id,
                 booking_id=str(booking.id),
                 title="Booking Confirmed! 🎉",
-                message=f"Your booking at {booking.cricket_box_name} is confirmed!",
+                message=f"Your booking at {booking.cricket_box_name} is confirmed{dates}!",
             )
             
             # Send notification to owner
@@ -183,12 +535,16 @@ class PaymentService:
                 user_id=booking.owner_id,
                 booking_id=str(booking.id),
                 title="New Booking! 📅",
-                message=f"New booking for {booking.booking_date} at {booking.start_time}",
+                message=f"New booking for {booking.booking_date} at {booking.start_time}{dates}",
             )
         
+        message = "Payment verified successfully"
+        if lost:
+            message += f". {len(lost)} of the dates are no longer available; {refund_message}"
+        
         return PaymentVerifyResponse(
             success=True,
-            message="Payment verified successfully",
+            message=message,
             booking_id=payment.booking_id,
             payment_id=str(payment.id),
         )
@@ -276,11 +632,12 @@ class PaymentService:
             )
             
             if payment:
-                payment.status = PaymentStatus.REFUNDED
-                payment.refund_id = payload.get("id")
-                payment.refund_amount = payload.get("amount") / 100
-                payment.refunded_at = datetime.utcnow()
-                await payment.save()
+                # Amounts and status were recorded when Razorpay accepted the
+                # refund; $set only these so a refund in flight isn't clobbered
+                await payment.set({
+                    "refund_id": payload.get("id"),
+                    "refunded_at": datetime.utcnow(),
+                })
         
         return {"status": "ok"}
     
@@ -310,27 +667,13 @@ class PaymentService:
                 detail="Payment cannot be refunded"
             )
         
-        # Process refund via Razorpay
-        client = PaymentService._get_razorpay_client()
-        
-        refund_amount = request.amount or payment.amount
-        refund_amount_paise = int(refund_amount * 100)
+        # Process refund via Razorpay (automatic refunds still due are not offered)
+        refund_amount = request.amount or payment.amount - (payment.refund_amount or 0) - payment.refund_due
         
         try:
-            refund = client.payment.refund(
-                payment.razorpay_payment_id,
-                {
-                    "amount": refund_amount_paise,
-                    "notes": {"reason": request.reason}
-                }
-            )
+            refund = PaymentService._razorpay_refund(payment, refund_amount, request.reason)
             
-            payment.status = PaymentStatus.REFUNDED
-            payment.refund_id = refund["id"]
-            payment.refund_amount = refund_amount
-            payment.refund_reason = request.reason
-            payment.refunded_at = datetime.utcnow()
-            await payment.save()
+            await PaymentService._record_refund(payment.id, refund["id"], refund_amount, request.reason)
             
             return RefundResponse(
                 success=True,
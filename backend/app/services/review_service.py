@@ -3,12 +3,18 @@ Review Service
 Business logic for reviews
 """
 
+from collections import Counter
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 from fastapi import HTTPException, status
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from beanie import PydanticObjectId
+from beanie.operators import In
+from pydantic import BaseModel, Field
 
-from app.models.review import Review
-from app.models.cricket_box import CricketBox
+from app.models.review import Review, ReviewVote, REVIEW_ASPECTS, star_bucket
+from app.models.cricket_box import CricketBox, RatingStats
 from app.models.booking import Booking, BookingStatus
 from app.models.user import User
 from app.schemas.review import (
@@ -16,13 +22,39 @@ from app.schemas.review import (
     ReviewUpdate,
     ReviewResponse,
     ReviewListResponse,
+    RatingSummary,
+    RatingSummaryBatchResponse,
+    HelpfulVotesResponse,
 )
 from app.schemas.common import SuccessResponse
+from app.core.pagination import apply_keyset, cached_count, fetch_page, next_cursor
+from app.services.cricket_box_service import CricketBoxService
+
+
+class _BoxRatingStats(BaseModel):
+    """Projection for reading a box's review aggregates"""
+    id: PydanticObjectId = Field(alias="_id")
+    rating_stats: RatingStats = Field(default_factory=RatingStats)
+
+
+# Most boxes in one batch summary request
+SUMMARY_BATCH_MAX_BOXES = 50
+
+# Most reviews in one "my helpful votes" lookup
+VOTES_BATCH_MAX_REVIEWS = 100
 
 
 class ReviewService:
     """Review service class"""
     
+    # sort_by -> (field, direction)
+    SORT_OPTIONS = {
+        "recent": ("created_at", DESCENDING),
+        "rating_high": ("rating", DESCENDING),
+        "rating_low": ("rating", ASCENDING),
+        "helpful": ("helpful_count", DESCENDING),
+    }
+    
     @staticmethod
     def _to_response(review: Review) -> ReviewResponse:
         """Convert model to response"""
@@ -54,6 +86,8 @@ class ReviewService:
         sort_by: str = "recent",
         page: int = 1,
         limit: int = 10,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
     ) -> ReviewListResponse:
         """Get all reviews for a cricket box"""
         query = Review.find(
@@ -61,30 +95,27 @@ class ReviewService:
             Review.is_visible == True,
         )
         
-        # Sort
-        if sort_by == "recent":
-            query = query.sort(-Review.created_at)
-        elif sort_by == "rating_high":
-            query = query.sort(-Review.rating)
-        elif sort_by == "rating_low":
-            query = query.sort(Review.rating)
-        elif sort_by == "helpful":
-            query = query.sort(-Review.helpful_count)
-        
-        total = await query.count()
+        # Totals are optional and briefly cached; has_more comes from limit+1
+        total = await cached_count(query) if include_total else None
         
-        # Calculate average rating
-        all_reviews = await Review.find(
-            Review.cricket_box_id == box_id,
-            Review.is_visible == True,
-        ).to_list()
+        # Average from the box's running aggregates, not the reviews
+        box = None
+        if PydanticObjectId.is_valid(box_id):
+            box = await CricketBox.find_one(
+                CricketBox.id == PydanticObjectId(box_id)
+            ).project(_BoxRatingStats)
         
         average_rating = 0.0
-        if all_reviews:
-            average_rating = sum(r.rating for r in all_reviews) / len(all_reviews)
+        if box and box.rating_stats.count:
+            average_rating = box.rating_stats.rating_sum / box.rating_stats.count
         
-        skip = (page - 1) * limit
-        reviews = await query.skip(skip).limit(limit).to_list()
+        # Sort, then paginate by cursor (keyset) when given, else by page
+        sort_field, direction = ReviewService.SORT_OPTIONS.get(
+            sort_by, ReviewService.SORT_OPTIONS["recent"]
+        )
+        query = apply_keyset(query, sort_field, direction, cursor)
+        skip = 0 if cursor else (page - 1) * limit
+        reviews, has_more = await fetch_page(query, limit, skip)
         
         return ReviewListResponse(
             reviews=[ReviewService._to_response(r) for r in reviews],
@@ -92,6 +123,65 @@ class ReviewService:
             average_rating=round(average_rating, 1),
             page=page,
             limit=limit,
+            has_more=has_more,
+            next_cursor=next_cursor(reviews, sort_field, has_more),
+        )
+    
+    @staticmethod
+    def _to_summary(box: _BoxRatingStats) -> RatingSummary:
+        """Build a rating summary from a box's aggregates"""
+        stats = box.rating_stats
+        
+        return RatingSummary(
+            cricket_box_id=str(box.id),
+            average_rating=round(stats.rating_sum / stats.count, 1) if stats.count else 0.0,
+            total_reviews=stats.count,
+            histogram={str(star): stats.stars.get(str(star), 0) for star in range(1, 6)},
+            aspects={
+                aspect: round(stats.aspect_sums.get(aspect, 0) / count, 1)
+                for aspect, count in stats.aspect_counts.items()
+                if count
+            },
+            aspect_counts={aspect: count for aspect, count in stats.aspect_counts.items() if count},
+        )
+    
+    @staticmethod
+    async def get_rating_summary(box_id: str) -> RatingSummary:
+        """Star histogram and aspect averages for a box (one point read)"""
+        box = None
+        if PydanticObjectId.is_valid(box_id):
+            box = await CricketBox.find_one(
+                CricketBox.id == PydanticObjectId(box_id)
+            ).project(_BoxRatingStats)
+        
+        if not box:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Cricket box not found"
+            )
+        
+        return ReviewService._to_summary(box)
+    
+    @staticmethod
+    async def get_rating_summaries(box_ids: List[str]) -> RatingSummaryBatchResponse:
+        """Rating summaries for many boxes with one query, in the order asked"""
+        if len(box_ids) > SUMMARY_BATCH_MAX_BOXES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {SUMMARY_BATCH_MAX_BOXES} boxes per request"
+            )
+        
+        ids = list(dict.fromkeys(
+            PydanticObjectId(box_id) for box_id in box_ids if PydanticObjectId.is_valid(box_id)
+        ))
+        
+        boxes = await CricketBox.find(
+            In(CricketBox.id, ids)
+        ).project(_BoxRatingStats).to_list() if ids else []
+        by_id = {box.id: box for box in boxes}
+        
+        return RatingSummaryBatchResponse(
+            summaries=[ReviewService._to_summary(by_id[i]) for i in ids if i in by_id],
         )
     
     @staticmethod
@@ -153,28 +243,72 @@ class ReviewService:
             is_verified=is_verified,
         )
         
-        await review.insert()
+        # A concurrent request may have inserted since the check above
+        try:
+            await review.insert()
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You have already reviewed this box"
+            )
         
         # Update box rating
-        await ReviewService._update_box_rating(request.cricket_box_id)
+        await ReviewService._apply_rating_delta(
+            request.cricket_box_id,
+            ReviewService._stats_delta(review),
+        )
         
         return ReviewService._to_response(review)
     
     @staticmethod
-    async def _update_box_rating(box_id: str):
-        """Update cricket box average rating"""
-        reviews = await Review.find(
-            Review.cricket_box_id == box_id,
-            Review.is_visible == True,
-        ).to_list()
+    def _stats_delta(review: Review, sign: int = 1) -> Counter:
+        """rating_stats increments for adding (sign=1) or removing (sign=-1) a review"""
+        delta = Counter()
+        
+        if not review.is_visible:
+            return delta
         
-        box = await CricketBox.get(box_id)
+        delta["count"] += sign
+        delta["rating_sum"] += sign * review.rating
+        delta[f"stars.{star_bucket(review.rating)}"] += sign
         
-        if box and reviews:
-            average_rating = sum(r.rating for r in reviews) / len(reviews)
-            box.rating = round(average_rating, 1)
-            box.total_reviews = len(reviews)
-            await box.save()
+        for aspect in REVIEW_ASPECTS:
+            value = getattr(review, f"{aspect}_rating")
+            if value is not None:
+                delta[f"aspect_sums.{aspect}"] += sign * value
+                delta[f"aspect_counts.{aspect}"] += sign
+        
+        return delta
+    
+    @staticmethod
+    async def _apply_rating_delta(box_id: str, delta: Dict[str, float]):
+        """
+        Apply review aggregate increments to a box in one atomic update,
+        re-deriving rating and total_reviews from the new totals
+        """
+        delta = {field: n for field, n in delta.items() if n}
+        if not delta:
+            return
+        
+        await CricketBox.get_motor_collection().update_one(
+            {"_id": PydanticObjectId(box_id)},
+            [
+                {"$set": {
+                    f"rating_stats.{field}": {"$add": [{"$ifNull": [f"$rating_stats.{field}", 0]}, n]}
+                    for field, n in delta.items()
+                }},
+                {"$set": {
+                    "total_reviews": "$rating_stats.count",
+                    "rating": {"$cond": [
+                        {"$gt": ["$rating_stats.count", 0]},
+                        {"$round": [{"$divide": ["$rating_stats.rating_sum", "$rating_stats.count"]}, 1]},
+                        0.0,
+                    ]},
+                }},
+            ],
+        )
+        
+        await CricketBoxService.invalidate_cache(box_id)
     
     @staticmethod
     async def update_review(
@@ -197,17 +331,30 @@ class ReviewService:
                 detail="You can only update your own reviews"
             )
         
-        update_data = request.model_dump(exclude_none=True)
+        update_data = {**request.model_dump(exclude_none=True), "updated_at": datetime.utcnow()}
+        
+        # $set only the edited fields so concurrent helpful votes aren't
+        # overwritten, and take the rating delta from the version this
+        # write replaced so concurrent edits don't count twice
+        before = await Review.get_motor_collection().find_one_and_update(
+            {"_id": review.id, "user_id": user_id},
+            {"$set": update_data},
+            return_document=ReturnDocument.BEFORE,
+        )
         
-        for field, value in update_data.items():
-            setattr(review, field, value)
+        if before is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Review not found"
+            )
         
-        review.updated_at = datetime.utcnow()
-        await review.save()
+        before = Review.model_validate(before)
+        review = before.model_copy(update=update_data)
         
         # Update box rating if rating changed
-        if "rating" in update_data:
-            await ReviewService._update_box_rating(review.cricket_box_id)
+        delta = ReviewService._stats_delta(before, -1)
+        delta.update(ReviewService._stats_delta(review))
+        await ReviewService._apply_rating_delta(review.cricket_box_id, delta)
         
         return ReviewService._to_response(review)
     
@@ -231,12 +378,25 @@ class ReviewService:
                 detail="You can only delete your own reviews"
             )
         
-        box_id = review.cricket_box_id
+        # Only the request that actually deleted it takes it off the box rating
+        deleted = await Review.get_motor_collection().find_one_and_delete(
+            {"_id": review.id, "user_id": user_id}
+        )
         
-        await review.delete()
+        if deleted is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Review not found"
+            )
+        
+        await ReviewVote.find(ReviewVote.review_id == review_id).delete()
         
         # Update box rating
-        await ReviewService._update_box_rating(box_id)
+        deleted = Review.model_validate(deleted)
+        await ReviewService._apply_rating_delta(
+            deleted.cricket_box_id,
+            ReviewService._stats_delta(deleted, -1),
+        )
         
         return SuccessResponse(message="Review deleted successfully")
     
@@ -245,7 +405,12 @@ class ReviewService:
         review_id: str,
         user_id: str
     ) -> SuccessResponse:
-        """Mark review as helpful"""
+        """
+        Toggle the user's helpful vote on a review
+        
+        The unique (review_id, user_id) vote index decides add vs remove
+        atomically; helpful_count follows with a $inc.
+        """
         review = await Review.get(review_id)
         
         if not review:
@@ -254,19 +419,44 @@ class ReviewService:
                 detail="Review not found"
             )
         
-        if user_id in review.helpful_by:
+        try:
+            await ReviewVote(review_id=review_id, user_id=user_id).insert()
+            change = 1
+        except DuplicateKeyError:
             # Already marked, remove
-            review.helpful_by.remove(user_id)
-            review.helpful_count -= 1
-        else:
-            # Add mark
-            review.helpful_by.append(user_id)
-            review.helpful_count += 1
+            result = await ReviewVote.find_one(
+                ReviewVote.review_id == review_id,
+                ReviewVote.user_id == user_id,
+            ).delete()
+            change = -1 if result and result.deleted_count else 0
         
-        await review.save()
+        if change:
+            await review.inc({Review.helpful_count: change})
         
         return SuccessResponse(message="Review helpfulness updated")
     
+    @staticmethod
+    async def get_my_helpful_votes(
+        user_id: str,
+        review_ids: List[str]
+    ) -> HelpfulVotesResponse:
+        """Which of the given reviews the user marked helpful (one query)"""
+        if len(review_ids) > VOTES_BATCH_MAX_REVIEWS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {VOTES_BATCH_MAX_REVIEWS} reviews per request"
+            )
+        
+        votes = await ReviewVote.find(
+            ReviewVote.user_id == user_id,
+            In(ReviewVote.review_id, review_ids),
+        ).to_list() if review_ids else []
+        voted = {vote.review_id for vote in votes}
+        
+        return HelpfulVotesResponse(
+            review_ids=[review_id for review_id in dict.fromkeys(review_ids) if review_id in voted],
+        )
+    
     @staticmethod
     async def owner_respond(
         review_id: str,
@@ -293,6 +483,9 @@ class ReviewService:
         
         review.owner_response = response
         review.owner_responded_at = datetime.utcnow()
-        await review.save()
+        await review.set({
+            Review.owner_response: review.owner_response,
+            Review.owner_responded_at: review.owner_responded_at,
+        })
         
         return ReviewService._to_response(review)
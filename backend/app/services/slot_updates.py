@@ -0,0 +1,83 @@
+"""
+Slot Updates
+Pushes slot changes to users watching a box's availability over WebSocket
+"""
+
+from datetime import date, datetime
+from typing import Optional, Union
+
+from beanie import PydanticObjectId
+from beanie.operators import In
+from pydantic import BaseModel, Field
+
+from app.models.booking import Booking, BookingStatus
+from app.services.websocket_manager import ws_manager
+
+
+# Slot states sent in slot_update events
+SLOT_HELD = "held"      # Pending payment; free again if the hold lapses
+SLOT_BOOKED = "booked"
+SLOT_FREE = "free"
+
+
+class _SlotRange(BaseModel):
+    """Projection for lapsed hold pushes"""
+    id: PydanticObjectId = Field(alias="_id")
+    cricket_box_id: str
+    booking_date: date
+    start_time: str
+    end_time: str
+
+
+class SlotUpdatePublisher:
+    """
+    Sends slot_update events to subscribers of a box/date
+
+    Subscriptions live on this worker's connections (like chat), so each
+    worker pushes the changes it makes. Lapsed holds free their slot by
+    time rather than by a write, so every worker checks for holds that
+    lapsed since its last check, for the boxes its subscribers watch.
+    """
+
+    def __init__(self):
+        self._holds_checked_at: Optional[datetime] = None
+
+    async def publish(self, booking: Union[Booking, _SlotRange], state: str):
+        """Push a booking's time range with its new state"""
+        if not ws_manager.has_slot_subscribers(booking.cricket_box_id, booking.booking_date):
+            return
+
+        await ws_manager.broadcast_slots(booking.cricket_box_id, booking.booking_date, {
+            "event": "slot_update",
+            "data": {
+                "cricket_box_id": booking.cricket_box_id,
+                "date": str(booking.booking_date),
+                "start_time": booking.start_time,
+                "end_time": booking.end_time,
+                "state": state,
+                "booking_id": str(booking.id),
+            },
+        })
+
+    async def push_lapsed_holds(self):
+        """Mark slots of holds that lapsed since the last run as free (background job)"""
+        now = datetime.utcnow()
+        since, self._holds_checked_at = self._holds_checked_at, now
+
+        boxes = ws_manager.watched_slot_boxes()
+        if since is None or not boxes:
+            return
+
+        lapsed = await Booking.find(
+            In(Booking.booking_status, [BookingStatus.PENDING, BookingStatus.EXPIRED]),
+            Booking.hold_expires_at > since,
+            Booking.hold_expires_at <= now,
+            In(Booking.cricket_box_id, list(boxes)),
+        ).project(_SlotRange).to_list()
+
+        for hold in lapsed:
+            await self.publish(hold, SLOT_FREE)
+
+
+# Global slot update publisher instance
+slot_updates = SlotUpdatePublisher()
@@ -1,6 +1,6 @@
 """
 WebSocket Connection Manager
-Manages real-time connections for chat
+Manages real-time connections for chat and live slot updates
 """
 
 from typing import Dict, List, Set
@@ -8,6 +8,10 @@ from fastapi import WebSocket
 import json
 
 
+# Box/date pairs one connection may watch at a time
+MAX_SLOT_SUBSCRIPTIONS = 10
+
+
 class WebSocketManager:
     """
     Manages WebSocket connections for real-time features
@@ -19,6 +23,10 @@ class WebSocketManager:
         
         # conversation_id -> set of user_ids
         self.conversation_members: Dict[str, Set[str]] = {}
+        
+        # "box_id:date" -> set of user_ids watching that day's slots
+        self.slot_subscribers: Dict[str, Set[str]] = {}
+        self.user_slot_channels: Dict[str, Set[str]] = {}
     
     async def connect(self, websocket: WebSocket, user_id: str):
         """
@@ -32,6 +40,9 @@ class WebSocketManager:
         """
         Remove WebSocket connection
         """
+        for channel in self.user_slot_channels.pop(user_id, set()):
+            self._drop_slot_subscriber(channel, user_id)
+        
         if user_id in self.active_connections:
             del self.active_connections[user_id]
             print(f"🔌 User {user_id} disconnected from WebSocket")
@@ -73,6 +84,60 @@ class WebSocketManager:
         if conversation_id in self.conversation_members:
             self.conversation_members[conversation_id].discard(user_id)
     
+    @staticmethod
+    def slot_channel(box_id: str, day) -> str:
+        """Channel name for one box's slots on one date"""
+        return f"{box_id}:{day}"
+    
+    def subscribe_slots(self, box_id: str, day, user_id: str) -> bool:
+        """
+        Watch a box's slots for a date
+        Returns False if the user already watches the maximum number of days.
+        """
+        channels = self.user_slot_channels.setdefault(user_id, set())
+        channel = self.slot_channel(box_id, day)
+        
+        if channel not in channels and len(channels) >= MAX_SLOT_SUBSCRIPTIONS:
+            return False
+        
+        channels.add(channel)
+        self.slot_subscribers.setdefault(channel, set()).add(user_id)
+        return True
+    
+    def unsubscribe_slots(self, box_id: str, day, user_id: str):
+        """Stop watching a box's slots for a date"""
+        channel = self.slot_channel(box_id, day)
+        self.user_slot_channels.get(user_id, set()).discard(channel)
+        self._drop_slot_subscriber(channel, user_id)
+    
+    def _drop_slot_subscriber(self, channel: str, user_id: str):
+        members = self.slot_subscribers.get(channel)
+        if members is not None:
+            members.discard(user_id)
+            if not members:
+                del self.slot_subscribers[channel]
+    
+    def has_slot_subscribers(self, box_id: str, day) -> bool:
+        """Check if anyone here watches a box's slots for a date"""
+        return self.slot_channel(box_id, day) in self.slot_subscribers
+    
+    def watched_slot_boxes(self) -> Set[str]:
+        """Box ids with at least one slot subscriber"""
+        return {channel.split(":", 1)[0] for channel in self.slot_subscribers}
+    
+    async def broadcast_slots(self, box_id: str, day, message: dict):
+        """
+        Send a slot update to everyone watching the box on that date
+        A failed send only drops that connection.
+        """
+        channel = self.slot_channel(box_id, day)
+        
+        for user_id in list(self.slot_subscribers.get(channel, ())):
+            try:
+                await self.send_to_user(user_id, message)
+            except Exception:
+                self.disconnect(user_id)
+    
     def is_user_online(self, user_id: str) -> bool:
         """
         Check if user is connected
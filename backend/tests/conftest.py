@@ -0,0 +1,80 @@
+"""
+Shared fixtures: an in-memory MongoDB and a fake Razorpay client
+"""
+
+import pytest
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from app.core.database import DOCUMENT_MODELS
+from app.services.payment_service import PaymentService
+
+
+async def _restore_partial_indexes(model):
+    """
+    mongomock's create_indexes drops partialFilterExpression (create_index
+    keeps it), so rebuild those indexes one by one
+    """
+    collection = model.get_motor_collection()
+    for index in getattr(model.Settings, "indexes", []):
+        options = dict(index.document)
+        partial = options.get("partialFilterExpression")
+        if not partial:
+            continue
+
+        await collection.drop_index(options.pop("name"))
+        # mongomock can't evaluate $type, which would make every
+        # notification without a dedupe_key a duplicate
+        if any("$type" in str(condition) for condition in partial.values()):
+            continue
+        await collection.create_index(list(options.pop("key").items()), name=index.document["name"], **options)
+
+
+@pytest.fixture
+async def db():
+    """Fresh database with every document model and its indexes"""
+    database = AsyncMongoMockClient()["criczz_test"]
+    await init_beanie(database=database, document_models=DOCUMENT_MODELS)
+    for model in DOCUMENT_MODELS:
+        await _restore_partial_indexes(model)
+    return database
+
+
+class _FakeOrders:
+    def __init__(self):
+        self.created = []
+
+    def create(self, data):
+        self.created.append(data)
+        return {"id": f"order_{len(self.created)}"}
+
+
+class _FakePayments:
+    def __init__(self):
+        self.refunds = []  # (razorpay_payment_id, amount in paise)
+        self.fail_refunds = False
+
+    def refund(self, payment_id, data):
+        if self.fail_refunds:
+            raise Exception("Razorpay unavailable")
+        self.refunds.append((payment_id, data["amount"]))
+        return {"id": f"rfnd_{len(self.refunds)}"}
+
+    def fetch(self, payment_id):
+        refunded = sum(amount for refunded_id, amount in self.refunds if refunded_id == payment_id)
+        return {"id": payment_id, "amount_refunded": refunded}
+
+
+class FakeRazorpay:
+    """Records orders and refunds instead of calling Razorpay"""
+
+    def __init__(self):
+        self.order = _FakeOrders()
+        self.payment = _FakePayments()
+
+
+@pytest.fixture
+def razorpay(monkeypatch):
+    client = FakeRazorpay()
+    monkeypatch.setattr(PaymentService, "_get_razorpay_client", staticmethod(lambda: client))
+    return client
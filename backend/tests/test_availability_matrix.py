@@ -0,0 +1,80 @@
+"""
+Availability matrix: per-day slot bitsets built from booked minute ranges
+"""
+
+from datetime import date
+from types import SimpleNamespace
+
+from app.services.booking_service import BookingService
+
+
+# 06:00-12:00 in hour slots
+OPENING, STEP, NUM_SLOTS = 360, 60, 6
+
+
+def _booked(start_minute, end_minute):
+    return SimpleNamespace(start_minute=start_minute, end_minute=end_minute)
+
+
+def _day(*ranges):
+    taken = 0
+    for start, end in ranges:
+        taken |= BookingService._taken_bits(_booked(start, end), OPENING, STEP, NUM_SLOTS)
+    return BookingService._free_slots(taken, NUM_SLOTS)
+
+
+def test_slot_grid():
+    box = SimpleNamespace(opening_time="06:00", closing_time="12:30", slot_duration_minutes=60)
+
+    # The half slot before closing is not bookable
+    assert BookingService._slot_grid(box) == (OPENING, STEP, NUM_SLOTS)
+
+
+def test_single_slot_booking():
+    assert BookingService._taken_bits(_booked(420, 480), OPENING, STEP, NUM_SLOTS) == 0b10
+    assert _day((420, 480)) == "101111"
+
+
+def test_multi_slot_booking_takes_every_slot_it_spans():
+    assert BookingService._taken_bits(_booked(420, 600), OPENING, STEP, NUM_SLOTS) == 0b1110
+    assert _day((420, 600)) == "100011"
+
+
+def test_off_grid_booking_takes_every_slot_it_touches():
+    # 07:30-09:15 overlaps the 07:00, 08:00 and 09:00 slots
+    assert _day((450, 555)) == "100011"
+
+
+def test_bookings_on_one_day_combine():
+    assert _day((360, 420), (480, 600), (660, 720)) == "010010"
+
+
+def test_adjacent_bookings_leave_the_slot_between_free():
+    assert _day((360, 420), (480, 540)) == "010111"
+
+
+def test_booking_outside_opening_hours_is_clipped():
+    assert _day((300, 420)) == "011111"
+    assert _day((660, 780)) == "111110"
+    assert BookingService._taken_bits(_booked(780, 840), OPENING, STEP, NUM_SLOTS) == 0
+
+
+def test_fully_booked_and_empty_days():
+    assert _day((360, 720)) == "000000"
+    assert _day() == "111111"
+    assert BookingService._free_slots(0, 0) == ""
+
+
+def test_unit_bits_match_slot_units():
+    booking = SimpleNamespace(start_minute=1082, end_minute=1093)
+
+    bits = BookingService._unit_bits(booking.start_minute, booking.end_minute)
+
+    assert [i for i in range(bits.bit_length()) if bits >> i & 1] == [216, 217, 218]
+
+
+def test_day_price_uses_weekend_rate():
+    box = SimpleNamespace(price_per_hour=800.0, weekend_price_per_hour=1000.0)
+
+    assert BookingService._day_price(box, date(2026, 10, 16)) == 800.0  # Friday
+    assert BookingService._day_price(box, date(2026, 10, 17)) == 1000.0  # Saturday
@@ -0,0 +1,174 @@
+"""
+Box typeahead: prefix and one-typo lookups, upsert and remove
+"""
+
+from types import SimpleNamespace
+
+from app.services import box_suggest_index
+from app.services.box_suggest_index import BoxSuggestIndex
+
+
+def _box(box_id, name, area="Vesu", pincode="395007", listed=True):
+    return SimpleNamespace(
+        id=box_id, name=name, area=area, pincode=pincode,
+        is_active=listed, is_approved=listed,
+    )
+
+
+def _index(*boxes):
+    index = BoxSuggestIndex()
+    for box in boxes:
+        index.upsert(box)
+    return index
+
+
+def _values(results):
+    return [(r["type"], r["value"]) for r in results]
+
+
+def test_prefix_matches_any_word_of_a_name():
+    index = _index(_box("b1", "Green Turf Arena"), _box("b2", "Blue Turf"))
+
+    assert ("box", "Green Turf Arena") in _values(index.suggest("gre"))
+    assert _values(index.suggest("turf ar")) == [("box", "Green Turf Arena")]
+    assert {v for _, v in _values(index.suggest("turf"))} == {"Green Turf Arena", "Blue Turf"}
+
+
+def test_areas_and_pincodes_are_suggested_once():
+    index = _index(
+        _box("b1", "Green Turf", area="Vesu", pincode="395007"),
+        _box("b2", "Blue Arena", area="Vesu", pincode="395007"),
+    )
+
+    assert _values(index.suggest("ves")) == [("area", "Vesu")]
+    assert _values(index.suggest("3950")) == [("pincode", "395007")]
+
+
+def test_box_suggestions_carry_the_box_id():
+    index = _index(_box("b1", "Green Turf"))
+
+    assert index.suggest("green")[0]["box_id"] == "b1"
+    assert index.suggest("vesu")[0]["box_id"] is None
+
+
+def test_one_typo_is_tolerated():
+    index = _index(_box("b1", "Stadium Cricket"), _box("b2", "Adajan Arena", area="Adajan"))
+
+    # Substitution, transposition-like deletion, insertion
+    assert ("box", "Stadium Cricket") in _values(index.suggest("stadiun"))
+    assert ("box", "Stadium Cricket") in _values(index.suggest("stdium"))
+    assert ("area", "Adajan") in _values(index.suggest("adaajan"))
+
+
+def test_two_typos_or_short_prefixes_find_nothing():
+    index = _index(_box("b1", "Stadium Cricket"))
+
+    assert index.suggest("stxdiun") == []
+    assert index.suggest("sx") == []
+
+
+def test_prefix_matches_come_before_typo_matches():
+    index = _index(_box("b1", "Arena One"), _box("b2", "Areba Two"))
+
+    assert _values(index.suggest("arena"))[0] == ("box", "Arena One")
+
+
+def test_limit_is_respected():
+    index = _index(*(_box(f"b{i}", f"Turf {i}", pincode=f"39500{i}") for i in range(10)))
+
+    assert len(index.suggest("turf", limit=3)) == 3
+
+
+def test_upsert_reindexes_a_renamed_box():
+    index = _index(_box("b1", "Old Name"))
+
+    index.upsert(_box("b1", "New Name"))
+
+    assert index.suggest("old") == []
+    assert _values(index.suggest("new")) == [("box", "New Name")]
+
+
+def test_unlisted_boxes_are_removed_on_upsert():
+    index = _index(_box("b1", "Green Turf"))
+
+    index.upsert(_box("b1", "Green Turf", listed=False))
+
+    assert index.suggest("green") == []
+
+
+def test_remove_keeps_areas_other_boxes_still_use():
+    index = _index(
+        _box("b1", "Green Turf", area="Vesu", pincode="395007"),
+        _box("b2", "Blue Arena", area="Vesu", pincode="395009"),
+    )
+
+    index.remove("b1")
+
+    assert index.suggest("green") == []
+    # One edit from the pincode still listed, so only that one comes back
+    assert _values(index.suggest("395007")) == [("pincode", "395009")]
+    assert _values(index.suggest("vesu")) == [("area", "Vesu")]
+
+    index.remove("b2")
+
+    assert index.suggest("vesu") == []
+    assert index.suggest("ves") == []
+    assert index._keys == [] and index._fuzzy == {}
+
+
+class _SlowSnapshot:
+    """CricketBox query whose results were read before `during` ran"""
+
+    def __init__(self, boxes, during):
+        self.boxes = boxes
+        self.during = during
+
+    def project(self, model):
+        return self
+
+    async def to_list(self):
+        self.during()
+        return [SimpleNamespace(id=b.id, name=b.name, area=b.area, pincode=b.pincode) for b in self.boxes]
+
+
+def _rebuild_with(monkeypatch, index, boxes, during=lambda: None):
+    # Stands in for the query so the test controls when writes land
+    monkeypatch.setattr(box_suggest_index.CricketBox, "find", lambda *args: _SlowSnapshot(boxes, during))
+    return index.rebuild()
+
+
+async def test_rebuild_loads_listed_boxes(db, monkeypatch):
+    index = _index(_box("gone", "Stale Turf"))
+
+    await _rebuild_with(monkeypatch, index, [_box("b1", "Green Turf"), _box("b2", "Blue Arena")])
+
+    assert index.suggest("stale") == []
+    assert {v for _, v in _values(index.suggest("green"))} == {"Green Turf"}
+    assert index._replay_logs == []
+
+
+async def test_changes_during_a_rebuild_are_replayed(db, monkeypatch):
+    index = _index(_box("b1", "Green Turf"), _box("b2", "Blue Arena"))
+
+    def meanwhile():
+        index.upsert(_box("b3", "New Ground"))
+        index.upsert(_box("b1", "Renamed Turf"))
+        index.remove("b2")
+
+    # The snapshot still has b1's old name and b2, and not b3
+    await _rebuild_with(monkeypatch, index, [_box("b1", "Green Turf"), _box("b2", "Blue Arena")], meanwhile)
+
+    assert _values(index.suggest("new")) == [("box", "New Ground")]
+    assert _values(index.suggest("renamed")) == [("box", "Renamed Turf")]
+    assert index.suggest("green") == []
+    assert index.suggest("blue") == []
+
+
+async def test_changes_after_a_rebuild_are_not_replayed(db, monkeypatch):
+    index = _index()
+    await _rebuild_with(monkeypatch, index, [_box("b1", "Green Turf")])
+
+    index.remove("b1")
+    await _rebuild_with(monkeypatch, index, [])
+
+    assert index.suggest("green") == []
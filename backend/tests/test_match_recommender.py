@@ -0,0 +1,220 @@
+"""
+Match recommender: time buckets, scoring and which open requests are offered
+"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.clock import local_now
+from app.core.config import settings
+from app.models.match_request import RequestStatus
+from app.models.user import SkillLevel
+from app.services import match_recommender
+from app.services.match_recommender import MatchRecommendationIndex, time_bucket
+
+
+TODAY = local_now().date()
+
+
+def _request(request_id, area="Vesu", time="Evening", skill="intermediate", needed=4, **overrides):
+    fields = dict(
+        id=request_id,
+        status=RequestStatus.OPEN,
+        creator_id="creator",
+        preferred_area=area,
+        match_date=TODAY + timedelta(days=1),
+        expires_at=None,
+        preferred_time=time,
+        start_time=None,
+        skill_level_required=skill,
+        players_needed=needed,
+        players_joined=0,
+        join_requests=[],
+        accepted_players=[],
+    )
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def _player(area="Vesu", time="Evening", skill=SkillLevel.INTERMEDIATE):
+    return SimpleNamespace(id="player", area=area, preferred_time=time, skill_level=skill)
+
+
+@pytest.fixture
+def index(monkeypatch):
+    monkeypatch.setattr(settings, "NEARBY_DEFAULT_RADIUS_KM", 10.0)
+    index = MatchRecommendationIndex()
+    index._nearby = {"vesu": {"adajan": 5.0}, "adajan": {"vesu": 5.0}}
+    return index
+
+
+def _scores(index, player=None, limit=10):
+    return {request_id: score for request_id, score, _ in index.recommend(player or _player(), limit)}
+
+
+def test_time_bucket():
+    assert time_bucket("Evening") == "evening"
+    assert time_bucket("18:00-20:00") == "evening"
+    assert time_bucket("Evening", start_time="06:30") == "morning"
+    assert time_bucket(None, start_time="13:00") == "afternoon"
+    assert time_bucket("02:00") == "night"
+    assert time_bucket("whenever") is None
+    assert time_bucket(None) is None
+
+
+def test_perfect_match_scores_one(index):
+    index.upsert(_request("a"))
+
+    (request_id, score, reasons), = index.recommend(_player())
+
+    assert (request_id, score) == ("a", 1.0)
+    assert reasons == ["In your area", "Matches your skill level", "At your preferred time", "4 spots left"]
+
+
+def test_nearby_area_scores_by_distance(index):
+    index.upsert(_request("a", area="Adajan"))
+
+    (_, score, reasons), = index.recommend(_player())
+
+    # Area: 0.8 * (1 - 5/10) = 0.4
+    assert score == round(0.4 * 0.4 + 0.25 + 0.2 + 0.15, 3)
+    assert reasons[0] == "Near your area (5.0 km)"
+
+
+def test_skill_and_time_partial_scores(index):
+    index.upsert(_request("one_level_up", skill="advanced"))
+    index.upsert(_request("any_level", skill=None))
+    index.upsert(_request("far_level", skill="professional"))
+    index.upsert(_request("next_bucket", time="Night"))
+    index.upsert(_request("opposite_bucket", time="Morning"))
+
+    scores = _scores(index)
+
+    assert scores["one_level_up"] == round(0.4 + 0.25 * 0.5 + 0.2 + 0.15, 3)
+    assert scores["any_level"] == round(0.4 + 0.25 * 0.8 + 0.2 + 0.15, 3)
+    assert scores["far_level"] == round(0.4 + 0.2 + 0.15, 3)
+    assert scores["next_bucket"] == round(0.4 + 0.25 + 0.2 * 0.5 + 0.15, 3)
+    assert scores["opposite_bucket"] == round(0.4 + 0.25 + 0.15, 3)
+
+
+def test_night_is_next_to_morning(index):
+    index.upsert(_request("a", time="Night"))
+
+    assert _scores(index, _player(time="Morning"))["a"] == round(0.4 + 0.25 + 0.2 * 0.5 + 0.15, 3)
+
+
+def test_spots_score_tops_out(index):
+    index.upsert(_request("few", needed=2))
+    index.upsert(_request("many", needed=11))
+
+    scores = _scores(index)
+
+    assert scores["few"] == round(0.85 + 0.15 * 0.5, 3)
+    assert scores["many"] == 1.0
+
+
+def test_unrelated_requests_are_not_candidates(index):
+    index.upsert(_request("a", area="Katargam", time="Morning", skill="professional"))
+
+    assert index.recommend(_player()) == []
+
+
+def test_empty_profile_sees_everything(index):
+    index.upsert(_request("a", area="Katargam"))
+
+    assert list(_scores(index, _player(area=None, time=None, skill=None))) == ["a"]
+
+
+def test_skips_requests_the_player_cannot_join(index):
+    index.upsert(_request("own", creator_id="player"))
+    index.upsert(_request("asked", join_requests=[SimpleNamespace(user_id="player")]))
+    index.upsert(_request("accepted", accepted_players=["player"]))
+    index.upsert(_request("full", players_joined=4))
+    index.upsert(_request("expired", expires_at=datetime.utcnow() - timedelta(minutes=1)))
+    index.upsert(_request("open"))
+
+    assert list(_scores(index)) == ["open"]
+
+
+def test_past_requests_are_not_indexed(index):
+    index.upsert(_request("past", match_date=TODAY - timedelta(days=1)))
+
+    assert index._matches == {}
+
+
+def test_closed_requests_are_removed(index):
+    index.upsert(_request("a"))
+
+    index.upsert(_request("a", status=RequestStatus.CLOSED))
+
+    assert index.recommend(_player()) == []
+    assert index._by_area == {} and index._by_time == {} and index._by_skill == {}
+
+
+def test_ties_go_to_the_earlier_match_and_limit_applies(index):
+    index.upsert(_request("later", match_date=TODAY + timedelta(days=3)))
+    index.upsert(_request("sooner", match_date=TODAY + timedelta(days=2)))
+    index.upsert(_request("weaker", area="Adajan"))
+
+    assert [r[0] for r in index.recommend(_player())] == ["sooner", "later", "weaker"]
+    assert [r[0] for r in index.recommend(_player(), limit=1)] == ["sooner"]
+
+
+class _SlowSnapshot:
+    """MatchRequest query whose results were read before `during` ran"""
+
+    def __init__(self, requests, during):
+        self.requests = requests
+        self.during = during
+
+    def project(self, model):
+        return self
+
+    async def to_list(self):
+        self.during()
+        return self.requests
+
+
+def _rebuild_with(monkeypatch, index, requests, during=lambda: None):
+    # Stands in for the queries so the test controls when writes land
+    async def nearby():
+        return {"vesu": {"adajan": 5.0}, "adajan": {"vesu": 5.0}}
+
+    monkeypatch.setattr(match_recommender.MatchRequest, "find", lambda *args: _SlowSnapshot(requests, during))
+    monkeypatch.setattr(MatchRecommendationIndex, "_area_distances", staticmethod(nearby))
+    return index.rebuild()
+
+
+async def test_rebuild_loads_open_requests(db, monkeypatch, index):
+    index.upsert(_request("gone"))
+
+    await _rebuild_with(monkeypatch, index, [_request("r1"), _request("r2", area="Adajan")])
+
+    assert set(_scores(index)) == {"r1", "r2"}
+    assert index._replay_logs == []
+
+
+async def test_changes_during_a_rebuild_are_replayed(db, monkeypatch, index):
+    index.upsert(_request("r1"))
+    index.upsert(_request("r2"))
+
+    def meanwhile():
+        index.upsert(_request("r3"))
+        index.upsert(_request("r1", status=RequestStatus.CLOSED))
+        index.remove("r2")
+
+    # The snapshot still has r1 open and r2, and not r3
+    await _rebuild_with(monkeypatch, index, [_request("r1"), _request("r2")], meanwhile)
+
+    assert set(_scores(index)) == {"r3"}
+
+
+async def test_changes_after_a_rebuild_are_not_replayed(db, monkeypatch, index):
+    await _rebuild_with(monkeypatch, index, [_request("r1")])
+
+    index.remove("r1")
+    await _rebuild_with(monkeypatch, index, [_request("r2")])
+
+    assert set(_scores(index)) == {"r2"}
@@ -0,0 +1,151 @@
+"""
+Data migrations: backfilling slot ranges on bookings made before slot units,
+and clearing duplicate reviews before the unique index is built
+"""
+
+from datetime import datetime, timedelta
+
+from app.core import migrations
+from app.models.booking import Booking, BookingStatus
+from app.models.cricket_box import CricketBox
+from app.models.review import Review, ReviewVote
+
+
+DAY = datetime(2026, 11, 1)
+
+
+async def _legacy(number, start, end, status=BookingStatus.CONFIRMED, minutes_ago=60, box_id="box1"):
+    """Insert a booking as an older version stored it: no derived slot fields"""
+    result = await Booking.get_motor_collection().insert_one({
+        "booking_number": number,
+        "user_id": "player",
+        "cricket_box_id": box_id,
+        "owner_id": "owner",
+        "booking_date": DAY,
+        "start_time": start,
+        "end_time": end,
+        "base_amount": 800.0,
+        "total_amount": 800.0,
+        "booking_status": status.value,
+        "created_at": datetime.utcnow() - timedelta(minutes=minutes_ago),
+    })
+    return result.inserted_id
+
+
+async def _raw(booking_id):
+    return await Booking.get_motor_collection().find_one({"_id": booking_id})
+
+
+async def test_non_overlapping_bookings_are_backfilled(db):
+    first = await _legacy("B1", "18:00", "19:00")
+    second = await _legacy("B2", "19:00", "20:30", status=BookingStatus.PENDING)
+
+    await migrations._backfill_active_slot_ranges()
+
+    assert (await _raw(first))["slot_units"] == list(range(216, 228))
+    doc = await _raw(second)
+    assert (doc["start_minute"], doc["end_minute"]) == (1140, 1230)
+    assert doc["slot_units"] == list(range(228, 246))
+    assert doc["booking_status"] == BookingStatus.PENDING.value
+
+
+async def test_overlapping_confirmed_booking_is_flagged_not_indexed(db, capsys):
+    kept = await _legacy("B1", "18:00", "19:00", minutes_ago=120)
+    # Offline booking older versions let through: same box, overlapping time
+    clash = await _legacy("B2", "18:30", "20:00", minutes_ago=60)
+
+    await migrations._backfill_active_slot_ranges()
+
+    assert (await _raw(kept))["slot_units"] == list(range(216, 228))
+    doc = await _raw(clash)
+    assert "slot_units" not in doc
+    assert doc["slot_conflict"] is True
+    assert (doc["start_minute"], doc["end_minute"]) == (1110, 1200)
+    assert doc["booking_status"] == BookingStatus.CONFIRMED.value
+    assert "B2" in capsys.readouterr().out
+
+
+async def test_confirmed_booking_wins_over_an_older_hold(db):
+    hold = await _legacy("B1", "18:00", "19:00", status=BookingStatus.PENDING, minutes_ago=120)
+    paid = await _legacy("B2", "18:00", "19:00", minutes_ago=60)
+
+    await migrations._backfill_active_slot_ranges()
+
+    assert (await _raw(paid))["slot_units"] == list(range(216, 228))
+    doc = await _raw(hold)
+    assert doc["booking_status"] == BookingStatus.EXPIRED.value
+    assert doc["slot_units"] == list(range(216, 228))
+
+
+async def test_already_backfilled_bookings_hold_their_units(db):
+    booking = Booking(
+        booking_number="NEW", user_id="player", cricket_box_id="box1", owner_id="owner",
+        booking_date=DAY.date(), start_time="18:00", end_time="19:00",
+        base_amount=800.0, total_amount=800.0, booking_status=BookingStatus.CONFIRMED,
+    )
+    await booking.insert()
+    clash = await _legacy("OLD", "18:00", "19:00")
+    other_box = await _legacy("OTHER", "18:00", "19:00", box_id="box2")
+
+    await migrations._backfill_active_slot_ranges()
+
+    assert (await _raw(clash))["slot_conflict"] is True
+    assert (await _raw(other_box))["slot_units"] == list(range(216, 228))
+
+
+async def test_flagged_bookings_are_reported_again_next_startup(db, capsys):
+    await _legacy("B1", "18:00", "19:00", minutes_ago=120)
+    await _legacy("B2", "18:00", "19:00", minutes_ago=60)
+
+    await migrations._backfill_active_slot_ranges()
+    capsys.readouterr()
+    backfilled = await migrations._backfill_active_slot_ranges()
+
+    assert backfilled == 0
+    assert "B2" in capsys.readouterr().out
+
+
+async def test_failing_migration_does_not_stop_the_rest(db, monkeypatch, capsys):
+    ran = []
+
+    async def broken():
+        raise RuntimeError("boom")
+
+    async def record(name):
+        ran.append(name)
+
+    monkeypatch.setattr(migrations, "backfill_box_locations", broken)
+    for name in ("backfill_facility_masks", "backfill_booking_slot_ranges", "backfill_booking_holds",
+                 "backfill_box_rating_stats", "backfill_review_votes"):
+        monkeypatch.setattr(migrations, name, lambda name=name: record(name))
+
+    await migrations.run_data_migrations()
+
+    assert len(ran) == 5
+    assert "Migration broken failed" in capsys.readouterr().out
+
+
+
+async def test_duplicate_reviews_keep_the_first(db):
+    reviews = Review.get_motor_collection()
+    await reviews.drop_index("user_box")  # As older versions left it
+    box = await CricketBox.get_motor_collection().insert_one({"name": "Green Turf", "rating_stats": {"count": 3}})
+    box_id = str(box.inserted_id)
+
+    def review(user_id, minutes_ago):
+        return {"user_id": user_id, "cricket_box_id": box_id, "rating": 4.0,
+                "is_visible": True, "created_at": DAY - timedelta(minutes=minutes_ago)}
+
+    first = (await reviews.insert_one(review("player", 120))).inserted_id
+    second = (await reviews.insert_one(review("player", 60))).inserted_id
+    other = (await reviews.insert_one(review("other", 30))).inserted_id
+    await ReviewVote.get_motor_collection().insert_one({"review_id": str(second), "user_id": "other"})
+
+    await migrations.dedupe_reviews(db)
+
+    assert {doc["_id"] async for doc in reviews.find()} == {first, other}
+    assert await ReviewVote.get_motor_collection().count_documents({}) == 0
+    assert "rating_stats" not in await CricketBox.get_motor_collection().find_one({"_id": box.inserted_id})
+
+    await migrations.dedupe_reviews(db)
+    assert await reviews.count_documents({}) == 2
@@ -0,0 +1,64 @@
+"""
+No-shows: owners can mark confirmed bookings once they have started
+"""
+
+import uuid
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.clock import local_now
+from app.models.booking import Booking, BookingStatus
+from app.services.booking_service import BookingService
+
+
+async def _booking(days=-1, status=BookingStatus.CONFIRMED):
+    booking = Booking(
+        booking_number=f"CBK-{uuid.uuid4().hex[:6]}",
+        user_id="player",
+        cricket_box_id="box1",
+        owner_id="owner",
+        booking_date=local_now().date() + timedelta(days=days),
+        start_time="18:00",
+        end_time="19:00",
+        base_amount=800.0,
+        total_amount=800.0,
+        booking_status=status,
+    )
+    return await booking.insert()
+
+
+async def _refused(booking, owner_id="owner"):
+    with pytest.raises(HTTPException) as error:
+        await BookingService.mark_no_show(str(booking.id), owner_id)
+    return error.value
+
+
+async def test_started_confirmed_booking_is_marked(db):
+    booking = await _booking()
+
+    await BookingService.mark_no_show(str(booking.id), "owner")
+
+    assert (await Booking.get(booking.id)).booking_status == BookingStatus.NO_SHOW
+
+
+async def test_bookings_not_started_are_refused(db):
+    booking = await _booking(days=1)
+
+    assert (await _refused(booking)).detail == "Booking has not started yet"
+    assert (await Booking.get(booking.id)).booking_status == BookingStatus.CONFIRMED
+
+
+async def test_only_confirmed_bookings_are_marked(db):
+    # E.g. the lifecycle job completed it first
+    booking = await _booking(status=BookingStatus.COMPLETED)
+
+    assert (await _refused(booking)).status_code == 400
+    assert (await Booking.get(booking.id)).booking_status == BookingStatus.COMPLETED
+
+
+async def test_only_the_box_owner_can_mark(db):
+    booking = await _booking()
+
+    assert (await _refused(booking, owner_id="someone")).status_code == 403
@@ -0,0 +1,130 @@
+"""
+Offline booking import: clashing rows are rejected, the rest written in one batch
+"""
+
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.booking import Booking, BookingStatus, BookingType
+from app.models.cricket_box import CricketBox
+from app.schemas.booking import OfflineBookingCreate
+from app.services.booking_service import BookingService
+
+
+DAY = date.today() + timedelta(days=7)
+
+
+@pytest.fixture
+async def box(db):
+    box = CricketBox(
+        name="Green Turf", address="Vesu Main Road", area="Vesu", pincode="395007",
+        price_per_hour=800.0, owner_id="owner",
+    )
+    return await box.insert()
+
+
+async def _booking(box, start, end, status=BookingStatus.CONFIRMED, hold_minutes=None):
+    booking = Booking(
+        booking_number=f"CBK-{uuid.uuid4().hex[:6]}",
+        user_id="player",
+        cricket_box_id=str(box.id),
+        owner_id="owner",
+        booking_date=DAY,
+        start_time=start,
+        end_time=end,
+        base_amount=800.0,
+        total_amount=800.0,
+        booking_status=status,
+        hold_expires_at=datetime.utcnow() + timedelta(minutes=hold_minutes) if hold_minutes is not None else None,
+    )
+    return await booking.insert()
+
+
+def _rows(*ranges, day=DAY):
+    return [
+        (number, OfflineBookingCreate(
+            booking_date=day, start_time=start, end_time=end,
+            customer_name="Walk-in", customer_phone="9999999999", amount_collected=800.0,
+        ))
+        for number, (start, end) in enumerate(ranges, start=1)
+    ]
+
+
+def _rejected(response):
+    return [(r.row, r.reason) for r in response.rejected]
+
+
+async def test_clashing_rows_are_rejected(box):
+    await _booking(box, "18:00", "19:00")
+
+    response = await BookingService.import_offline_bookings("owner", str(box.id), _rows(
+        ("06:00", "07:00"),
+        ("18:00", "20:00"),  # Overlaps the booking already made
+        ("06:00", "08:00"),  # Overlaps row 1
+        ("20:00", "21:00"),
+    ))
+
+    assert response.created_count == 2
+    assert _rejected(response) == [(2, "This slot is already booked"), (3, "This slot is already booked")]
+
+    created = await Booking.find(Booking.booking_type == BookingType.OFFLINE).to_list()
+    assert sorted(b.start_time for b in created) == ["06:00", "20:00"]
+    assert all(b.slot_units and b.booking_status == BookingStatus.CONFIRMED for b in created)
+    assert (await CricketBox.get(box.id)).total_bookings == 2
+
+
+async def test_lapsed_holds_not_yet_swept_fail_their_row_alone(box):
+    # Not counted as taken, but still in the unique slot index
+    await _booking(box, "18:00", "19:00", status=BookingStatus.PENDING, hold_minutes=-1)
+
+    response = await BookingService.import_offline_bookings("owner", str(box.id), _rows(
+        ("17:00", "18:00"),
+        ("18:00", "19:00"),
+        ("19:00", "20:00"),
+    ))
+
+    assert response.created_count == 2
+    assert _rejected(response) == [(2, "This slot is already booked")]
+    assert (await CricketBox.get(box.id)).total_bookings == 2
+
+
+async def test_rows_outside_opening_hours_are_rejected(box):
+    response = await BookingService.import_offline_bookings(
+        "owner", str(box.id), _rows(("05:00", "06:00"), ("06:00", "07:00"))
+    )
+
+    assert response.created_count == 1
+    assert [row for row, _ in _rejected(response)] == [1]
+
+
+async def test_only_the_owner_can_import(box):
+    with pytest.raises(HTTPException) as error:
+        await BookingService.import_offline_bookings("someone", str(box.id), _rows(("06:00", "07:00")))
+
+    assert error.value.status_code == 403
+    assert await Booking.find_all().count() == 0
+
+
+def test_csv_rows_that_do_not_parse_are_rejected():
+    content = (
+        "booking_date,start_time,end_time,customer_name,customer_phone,amount_collected\n"
+        f"{DAY},18:00,19:00,Walk-in,9999999999,800\n"
+        f"{DAY},19:00,20:00,Walk-in,9999999999,lots\n"
+    ).encode()
+
+    rows, rejected = BookingService.parse_offline_csv(content)
+
+    assert [number for number, _ in rows] == [1]
+    assert rows[0][1].amount_collected == 800.0
+    assert [r.row for r in rejected] == [2]
+    assert rejected[0].reason.startswith("amount_collected")
+
+
+def test_csv_missing_columns_is_refused():
+    with pytest.raises(HTTPException) as error:
+        BookingService.parse_offline_csv(b"booking_date,start_time\n")
+
+    assert "customer_name" in error.value.detail
@@ -0,0 +1,178 @@
+"""
+Keyset pagination: cursor encoding and page continuity
+"""
+
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import ASCENDING, DESCENDING
+
+from app.core.pagination import apply_keyset, decode_cursor, encode_cursor, fetch_page, next_cursor
+from app.models.booking import BookingStatus
+
+
+class FakeQuery:
+    """
+    Stands in for a Beanie FindMany over a list of documents, evaluating
+    the filters apply_keyset adds ($or, $lt/$gt, equality)
+    """
+
+    def __init__(self, docs, filters=(), sort_spec=(), skip_n=0, limit_n=None):
+        self.docs = docs
+        self.filters = filters
+        self.sort_spec = sort_spec
+        self.skip_n = skip_n
+        self.limit_n = limit_n
+
+    def _copy(self, **changes):
+        fields = dict(
+            docs=self.docs, filters=self.filters, sort_spec=self.sort_spec,
+            skip_n=self.skip_n, limit_n=self.limit_n,
+        )
+        fields.update(changes)
+        return FakeQuery(**fields)
+
+    def find(self, flt):
+        return self._copy(filters=self.filters + (flt,))
+
+    def sort(self, spec):
+        return self._copy(sort_spec=tuple(spec))
+
+    def skip(self, n):
+        return self._copy(skip_n=n)
+
+    def limit(self, n):
+        return self._copy(limit_n=n)
+
+    @staticmethod
+    def _get(doc, field):
+        return doc.id if field == "_id" else getattr(doc, field)
+
+    def _matches(self, doc, flt):
+        for field, cond in flt.items():
+            if field == "$or":
+                if not any(self._matches(doc, branch) for branch in cond):
+                    return False
+                continue
+
+            value = self._get(doc, field)
+            if isinstance(cond, dict):
+                for op, operand in cond.items():
+                    if op == "$lt" and not value < operand:
+                        return False
+                    if op == "$gt" and not value > operand:
+                        return False
+            elif value != cond:
+                return False
+
+        return True
+
+    async def to_list(self):
+        docs = [d for d in self.docs if all(self._matches(d, f) for f in self.filters)]
+
+        # Stable sorts, least significant key first
+        for field, direction in reversed(self.sort_spec):
+            docs.sort(key=lambda d: self._get(d, field), reverse=direction == DESCENDING)
+
+        docs = docs[self.skip_n:]
+        return docs if self.limit_n is None else docs[:self.limit_n]
+
+
+def _doc(created_at, rating=0):
+    return SimpleNamespace(id=ObjectId(), created_at=created_at, rating=rating)
+
+
+async def _walk(docs, sort_field, direction, limit):
+    """Follow next_cursor from the first page to the last"""
+    seen, cursor = [], None
+
+    while True:
+        query = apply_keyset(FakeQuery(docs), sort_field, direction, cursor)
+        page, has_more = await fetch_page(query, limit)
+        seen.extend(page)
+
+        cursor = next_cursor(page, sort_field, has_more)
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize("value", [
+    datetime(2024, 1, 26, 18, 30, 15, 123000),
+    4.5,
+    "Green Turf",
+    None,
+])
+def test_cursor_round_trip(value):
+    doc_id = ObjectId()
+    cursor = encode_cursor("created_at", value, doc_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "created_at") == (value, doc_id)
+
+
+def test_cursor_dates_decode_as_midnight_datetimes():
+    doc_id = ObjectId()
+    cursor = encode_cursor("booking_date", date(2024, 1, 26), doc_id)
+
+    assert decode_cursor(cursor, "booking_date") == (datetime(2024, 1, 26), doc_id)
+
+
+def test_cursor_enums_encode_their_value():
+    doc_id = ObjectId()
+    cursor = encode_cursor("booking_status", BookingStatus.CONFIRMED, doc_id)
+
+    assert decode_cursor(cursor, "booking_status") == ("confirmed", doc_id)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "", encode_cursor("created_at", 1, "bad-id")])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as e:
+        decode_cursor(cursor, "created_at")
+
+    assert e.value.status_code == 400
+
+
+def test_cursor_for_another_sort_is_rejected():
+    cursor = encode_cursor("rating", 4.5, ObjectId())
+
+    with pytest.raises(HTTPException):
+        decode_cursor(cursor, "created_at")
+
+
+@pytest.mark.parametrize("direction", [ASCENDING, DESCENDING])
+async def test_pages_cover_every_document_once_across_equal_sort_keys(direction):
+    same = datetime(2024, 1, 26, 18, 0)
+    docs = [_doc(same) for _ in range(5)] + [
+        _doc(datetime(2024, 1, 25)),
+        _doc(datetime(2024, 1, 27)),
+        _doc(same),
+    ]
+
+    seen = await _walk(docs, "created_at", direction, limit=2)
+
+    assert len(seen) == len(docs)
+    assert {d.id for d in seen} == {d.id for d in docs}
+
+    keys = [(d.created_at, d.id) for d in seen]
+    assert keys == sorted(keys, reverse=direction == DESCENDING)
+
+
+async def test_pages_by_id_only():
+    docs = [_doc(datetime(2024, 1, 26)) for _ in range(7)]
+
+    seen = await _walk(docs, "_id", ASCENDING, limit=3)
+
+    assert [d.id for d in seen] == sorted(d.id for d in docs)
+
+
+async def test_last_page_has_no_cursor():
+    docs = [_doc(datetime(2024, 1, 26)) for _ in range(2)]
+
+    page, has_more = await fetch_page(apply_keyset(FakeQuery(docs), "created_at", DESCENDING), 2)
+
+    assert len(page) == 2
+    assert not has_more
+    assert next_cursor(page, "created_at", has_more) is None
@@ -0,0 +1,354 @@
+"""
+Payment verification: confirming paid bookings and refunding ones whose slot was lost
+"""
+
+import asyncio
+import hashlib
+import hmac
+import uuid
+from datetime import date, datetime, timedelta
+
+from app.core.config import settings
+from app.models.booking import Booking, BookingStatus
+from app.models.booking import PaymentStatus as BookingPaymentStatus
+from app.models.notification import Notification, NotificationType
+from app.models.payment import Payment, PaymentStatus
+from app.schemas.payment import PaymentOrderCreate, PaymentVerifyRequest
+from app.services.payment_service import PaymentService
+
+
+BOX_ID = "box1"
+DAY = date.today() + timedelta(days=7)
+
+
+async def _booking(user_id="player", status=BookingStatus.PENDING, start="18:00", end="19:00", order_id="order_1", hold_minutes=None, day=DAY, **fields):
+    if hold_minutes is None:
+        hold_minutes = 10 if status == BookingStatus.PENDING else -5
+    hold = datetime.utcnow() + timedelta(minutes=hold_minutes)
+    booking = Booking(
+        booking_number=f"CBK-{uuid.uuid4().hex[:6]}",
+        user_id=user_id,
+        cricket_box_id=BOX_ID,
+        cricket_box_name="Green Turf",
+        owner_id="owner",
+        booking_date=day,
+        start_time=start,
+        end_time=end,
+        base_amount=800.0,
+        total_amount=900.0,
+        booking_status=status,
+        hold_expires_at=hold,
+        payment_order_id=order_id,
+        **fields,
+    )
+    return await booking.insert()
+
+
+async def _payment(bookings, order_id="order_1", amount=None, **fields):
+    payment = Payment(
+        user_id="player",
+        booking_id=str(bookings[0].id),
+        razorpay_order_id=order_id,
+        amount=amount or sum(b.total_amount for b in bookings),
+        **fields,
+    )
+    return await payment.insert()
+
+
+def _verify_request(order_id="order_1", payment_id="pay_1"):
+    signature = hmac.new(
+        settings.RAZORPAY_KEY_SECRET.encode(),
+        f"{order_id}|{payment_id}".encode(),
+        hashlib.sha256,
+    ).hexdigest()
+    return PaymentVerifyRequest(
+        razorpay_order_id=order_id,
+        razorpay_payment_id=payment_id,
+        razorpay_signature=signature,
+    )
+
+
+async def test_held_booking_is_confirmed(db, razorpay):
+    booking = await _booking()
+    await _payment([booking])
+
+    response = await PaymentService.verify_payment("player", _verify_request())
+
+    booking = await Booking.get(booking.id)
+    assert response.success
+    assert booking.booking_status == BookingStatus.CONFIRMED
+    assert booking.payment_status == BookingPaymentStatus.PAID
+    assert booking.payment_id == "pay_1"
+    assert booking.hold_expires_at is None
+    assert razorpay.payment.refunds == []
+
+
+async def test_lapsed_hold_on_a_free_slot_is_confirmed(db, razorpay):
+    booking = await _booking(status=BookingStatus.EXPIRED)
+    await _payment([booking])
+
+    response = await PaymentService.verify_payment("player", _verify_request())
+
+    assert response.success
+    assert (await Booking.get(booking.id)).booking_status == BookingStatus.CONFIRMED
+
+
+async def test_lapsed_hold_of_someone_else_is_released(db, razorpay):
+    # Their hold lapsed too, but the sweeper hasn't expired it yet
+    other = await _booking(user_id="other", order_id="order_0", hold_minutes=-1)
+    booking = await _booking(status=BookingStatus.EXPIRED)
+    await _payment([booking])
+
+    response = await PaymentService.verify_payment("player", _verify_request())
+
+    assert response.success
+    assert (await Booking.get(booking.id)).booking_status == BookingStatus.CONFIRMED
+    assert (await Booking.get(other.id)).booking_status == BookingStatus.EXPIRED
+
+
+async def test_lost_hold_is_refunded(db, razorpay):
+    # Someone else booked the slot after the hold lapsed
+    await _booking(user_id="other", status=BookingStatus.CONFIRMED, order_id="order_0")
+    booking = await _booking(status=BookingStatus.EXPIRED)
+    payment = await _payment([booking])
+
+    response = await PaymentService.verify_payment("player", _verify_request())
+
+    booking = await Booking.get(booking.id)
+    payment = await Payment.get(payment.id)
+    assert not response.success
+    assert "refund of ₹900" in response.message
+    assert booking.booking_status == BookingStatus.EXPIRED
+    assert booking.payment_status == BookingPaymentStatus.REFUNDED
+    assert razorpay.payment.refunds == [("pay_1", 90000)]
+    assert payment.status == PaymentStatus.REFUNDED
+    assert (payment.refund_amount, payment.refund_due) == (900.0, 0.0)
+    assert payment.refund_booking_ids == [str(booking.id)]
+
+    notification = await Notification.find_one(Notification.user_id == "player")
+    assert notification.notification_type == NotificationType.PAYMENT_REFUNDED
+
+
+async def test_lost_hold_stays_refund_pending_when_razorpay_fails(db, razorpay):
+    await _booking(user_id="other", status=BookingStatus.CONFIRMED, order_id="order_0")
+    booking = await _booking(status=BookingStatus.EXPIRED)
+    payment = await _payment([booking])
+    razorpay.payment.fail_refunds = True
+
+    response = await PaymentService.verify_payment("player", _verify_request())
+
+    payment = await Payment.get(payment.id)
+    assert not response.success
+    assert (await Booking.get(booking.id)).payment_status == BookingPaymentStatus.REFUND_PENDING
+    assert payment.status == PaymentStatus.CAPTURED
+    assert payment.refund_due == 900.0
+
+    razorpay.payment.fail_refunds = False
+    await PaymentService.retry_refunds()
+
+    payment = await Payment.get(payment.id)
+    assert (await Booking.get(booking.id)).payment_status == BookingPaymentStatus.REFUNDED
+    assert payment.refund_due == 0.0
+    assert razorpay.payment.refunds == [("pay_1", 90000)]
+
+
+async def test_cancelled_booking_is_refunded(db, razorpay):
+    booking = await _booking(status=BookingStatus.CANCELLED)
+    await _payment([booking])
+
+    response = await PaymentService.verify_payment("player", _verify_request())
+
+    assert not response.success
+    assert (await Booking.get(booking.id)).booking_status == BookingStatus.CANCELLED
+    assert razorpay.payment.refunds == [("pay_1", 90000)]
+
+
+async def test_verifying_twice_does_not_refund(db, razorpay):
+    booking = await _booking()
+    await _payment([booking])
+
+    await PaymentService.verify_payment("player", _verify_request())
+    response = await PaymentService.verify_payment("player", _verify_request())
+
+    assert response.success
+    assert (await Booking.get(booking.id)).booking_status == BookingStatus.CONFIRMED
+    assert razorpay.payment.refunds == []
+
+
+# ---------- Recurring series ----------
+
+async def _series(weeks=3):
+    return [
+        await _booking(day=DAY + timedelta(weeks=week), series_id="series1", order_id=None)
+        for week in range(weeks)
+    ]
+
+
+async def _series_order():
+    return await PaymentService.create_order("player", PaymentOrderCreate(series_id="series1", amount=0))
+
+
+async def test_series_order_confirms_every_date(db, razorpay):
+    bookings = await _series()
+    order = await _series_order()
+
+    response = await PaymentService.verify_payment("player", _verify_request(order.order_id))
+
+    assert response.success
+    assert order.amount == 2700.0
+    for booking in bookings:
+        assert (await Booking.get(booking.id)).booking_status == BookingStatus.CONFIRMED
+
+
+async def test_superseded_series_order_still_confirms(db, razorpay):
+    bookings = await _series()
+    first = await _series_order()
+    # Checkout was reopened, which made a second order for the same dates
+    await _series_order()
+
+    response = await PaymentService.verify_payment("player", _verify_request(first.order_id))
+
+    assert response.success
+    for booking in bookings:
+        assert (await Booking.get(booking.id)).booking_status == BookingStatus.CONFIRMED
+    assert razorpay.payment.refunds == []
+
+
+async def test_paying_both_series_orders_refunds_the_second(db, razorpay):
+    await _series()
+    first = await _series_order()
+    second = await _series_order()
+    await PaymentService.verify_payment("player", _verify_request(first.order_id, "pay_1"))
+
+    response = await PaymentService.verify_payment("player", _verify_request(second.order_id, "pay_2"))
+
+    payment = await Payment.find_one(Payment.razorpay_order_id == second.order_id)
+    assert not response.success
+    assert razorpay.payment.refunds == [("pay_2", 270000)]
+    assert payment.status == PaymentStatus.REFUNDED
+    # The dates stay paid by the first payment
+    for booking in await Booking.find(Booking.series_id == "series1").to_list():
+        assert booking.payment_status == BookingPaymentStatus.PAID
+        assert booking.payment_id == "pay_1"
+
+
+async def test_series_payment_matching_nothing_is_refunded(db, razorpay):
+    # Order made before payments recorded their bookings, then superseded
+    await _series()
+    await _payment(await Booking.find(Booking.series_id == "series1").to_list(), order_id="order_old", series_id="series1")
+
+    response = await PaymentService.verify_payment("player", _verify_request("order_old"))
+
+    payment = await Payment.find_one(Payment.razorpay_order_id == "order_old")
+    assert not response.success
+    assert "refund of ₹2700" in response.message
+    assert razorpay.payment.refunds == [("pay_1", 270000)]
+    assert payment.status == PaymentStatus.REFUNDED
+
+
+# ---------- Refund claim ----------
+
+async def _refund_due(amount=900.0, claimed_minutes_ago=None, payment_amount=None):
+    booking = await _booking(status=BookingStatus.EXPIRED, payment_status=BookingPaymentStatus.REFUND_PENDING)
+    claimed_at = None
+    if claimed_minutes_ago is not None:
+        claimed_at = datetime.utcnow() - timedelta(minutes=claimed_minutes_ago)
+    return await _payment(
+        [booking],
+        status=PaymentStatus.CAPTURED,
+        razorpay_payment_id="pay_1",
+        refund_due=amount,
+        refund_reason="Slot lost",
+        refund_booking_ids=[str(booking.id)],
+        refund_claimed_at=claimed_at,
+        amount=payment_amount,
+    )
+
+
+async def test_due_refund_is_sent_once_by_concurrent_workers(db, razorpay):
+    payment = await _refund_due()
+
+    results = await asyncio.gather(*(PaymentService._send_due_refund(payment) for _ in range(3)))
+    await PaymentService.retry_refunds()
+
+    payment = await Payment.get(payment.id)
+    assert sorted(results) == [False, False, True]
+    assert razorpay.payment.refunds == [("pay_1", 90000)]
+    assert (payment.refund_due, payment.refund_amount) == (0.0, 900.0)
+    assert payment.refund_claimed_at is None
+
+
+async def test_refund_claimed_by_a_live_worker_is_left_alone(db, razorpay):
+    payment = await _refund_due(claimed_minutes_ago=1)
+
+    await PaymentService.retry_refunds()
+
+    assert razorpay.payment.refunds == []
+    assert (await Payment.get(payment.id)).refund_due == 900.0
+
+
+async def test_stale_claim_is_taken_over(db, razorpay):
+    payment = await _refund_due(claimed_minutes_ago=60)
+
+    await PaymentService.retry_refunds()
+
+    assert razorpay.payment.refunds == [("pay_1", 90000)]
+    assert (await Payment.get(payment.id)).refund_due == 0.0
+
+
+async def test_stale_claim_that_reached_razorpay_is_not_resent(db, razorpay):
+    payment = await _refund_due(claimed_minutes_ago=60)
+    # The worker died after Razorpay accepted the refund
+    razorpay.payment.refunds.append(("pay_1", 90000))
+
+    await PaymentService.retry_refunds()
+
+    payment = await Payment.get(payment.id)
+    assert razorpay.payment.refunds == [("pay_1", 90000)]
+    assert (payment.refund_due, payment.refund_amount) == (0.0, 900.0)
+    assert payment.status == PaymentStatus.REFUNDED
+    booking = await Booking.get(payment.booking_id)
+    assert booking.payment_status == BookingPaymentStatus.REFUNDED
+
+
+async def test_failed_refund_releases_the_claim(db, razorpay):
+    payment = await _refund_due()
+    razorpay.payment.fail_refunds = True
+
+    assert not await PaymentService._send_due_refund(payment)
+
+    payment = await Payment.get(payment.id)
+    assert payment.refund_claimed_at is None
+    assert payment.refund_due == 900.0
+
+
+async def test_amount_added_while_refunding_stays_due(db, razorpay, monkeypatch):
+    # Two dates of a series paid together
+    payment = await _refund_due(amount=900.0, payment_amount=1350.0)
+    record = PaymentService._record_refund
+
+    async def lose_another_then_record(*args, **kwargs):
+        # Another date of the series is lost while this refund is in flight
+        await Payment.get_motor_collection().update_one({"_id": payment.id}, {"$inc": {"refund_due": 450.0}})
+        await record(*args, **kwargs)
+
+    monkeypatch.setattr(PaymentService, "_record_refund", staticmethod(lose_another_then_record))
+    await PaymentService._send_due_refund(payment)
+
+    payment = await Payment.get(payment.id)
+    assert (payment.refund_due, payment.refund_amount) == (450.0, 900.0)
+    assert payment.status == PaymentStatus.CAPTURED
+
+
+async def test_partial_refunds_add_up(db, razorpay):
+    payment = await _refund_due(amount=450.0)
+
+    await PaymentService._send_due_refund(payment)
+    payment = await Payment.get(payment.id)
+    assert payment.status == PaymentStatus.CAPTURED
+
+    await PaymentService._record_refund(payment.id, "rfnd_manual", 450.0, "Requested")
+
+    payment = await Payment.get(payment.id)
+    assert payment.refund_amount == 900.0
+    assert payment.status == PaymentStatus.REFUNDED
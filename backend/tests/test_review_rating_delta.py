@@ -0,0 +1,234 @@
+"""
+Box review aggregates: rating_stats deltas and the update pipeline that applies them
+"""
+
+import pytest
+from beanie import PydanticObjectId
+
+from app.models.cricket_box import CricketBox, RatingStats
+from app.models.review import Review
+from app.services import review_service
+from app.services.review_service import ReviewService
+
+
+BOX_ID = str(PydanticObjectId())
+
+
+def _review(rating, **aspects):
+    fields = {f"{aspect}_rating": value for aspect, value in aspects.items()}
+    return Review.model_construct(rating=rating, is_visible=True, **fields)
+
+
+# ---------- A tiny evaluator for the aggregation expressions used ----------
+
+def _get(doc, path):
+    for key in path.split("."):
+        if not isinstance(doc, dict) or key not in doc:
+            return None
+        doc = doc[key]
+    return doc
+
+
+def _put(doc, path, value):
+    *parents, leaf = path.split(".")
+    for key in parents:
+        doc = doc.setdefault(key, {})
+    doc[leaf] = value
+
+
+def _eval(expr, doc):
+    if isinstance(expr, str) and expr.startswith("$"):
+        return _get(doc, expr[1:])
+    if not isinstance(expr, dict):
+        return expr
+
+    (op, args), = expr.items()
+    if op == "$cond":
+        condition, then, otherwise = args
+        return _eval(then if _eval(condition, doc) else otherwise, doc)
+
+    values = [_eval(arg, doc) for arg in args]
+    if op == "$add":
+        return sum(values)
+    if op == "$ifNull":
+        return values[0] if values[0] is not None else values[1]
+    if op == "$gt":
+        return values[0] > values[1]
+    if op == "$divide":
+        return values[0] / values[1]
+    if op == "$round":
+        return round(values[0], values[1])
+    raise AssertionError(f"Unexpected operator {op}")
+
+
+class FakeCollection:
+    """Applies update pipelines to one in-memory box document"""
+
+    def __init__(self):
+        self.doc = {}
+        self.updates = []
+
+    async def update_one(self, query, pipeline):
+        assert query == {"_id": PydanticObjectId(BOX_ID)}
+        self.updates.append(pipeline)
+        for stage in pipeline:
+            # Every field of a $set stage sees the document as it was before the stage
+            values = {path: _eval(expr, self.doc) for path, expr in stage["$set"].items()}
+            for path, value in values.items():
+                _put(self.doc, path, value)
+
+
+@pytest.fixture
+def box(monkeypatch):
+    collection = FakeCollection()
+    invalidated = []
+
+    async def invalidate_cache(box_id=None, **kwargs):
+        invalidated.append(box_id)
+
+    monkeypatch.setattr(CricketBox, "get_motor_collection", lambda: collection)
+    monkeypatch.setattr(review_service.CricketBoxService, "invalidate_cache", invalidate_cache)
+    collection.invalidated = invalidated
+    return collection
+
+
+async def _create(review):
+    await ReviewService._apply_rating_delta(BOX_ID, ReviewService._stats_delta(review))
+
+
+async def _update(review, **changes):
+    delta = ReviewService._stats_delta(review, -1)
+    for field, value in changes.items():
+        setattr(review, field, value)
+    delta.update(ReviewService._stats_delta(review))
+    await ReviewService._apply_rating_delta(BOX_ID, delta)
+
+
+async def _delete(review):
+    await ReviewService._apply_rating_delta(BOX_ID, ReviewService._stats_delta(review, -1))
+
+
+# ---------- _stats_delta ----------
+
+def test_stats_delta_counts_rating_star_and_given_aspects():
+    delta = ReviewService._stats_delta(_review(4.5, cleanliness=4.0))
+
+    assert delta == {
+        "count": 1,
+        "rating_sum": 4.5,
+        "stars.5": 1,
+        "aspect_sums.cleanliness": 4.0,
+        "aspect_counts.cleanliness": 1,
+    }
+
+
+def test_stats_delta_for_removal_is_negated():
+    review = _review(3.0, facilities=2.0)
+
+    removal = ReviewService._stats_delta(review, -1)
+
+    assert removal == {key: -n for key, n in ReviewService._stats_delta(review).items()}
+
+
+def test_hidden_reviews_do_not_count():
+    review = _review(1.0)
+    review.is_visible = False
+
+    assert ReviewService._stats_delta(review) == {}
+
+
+# ---------- _apply_rating_delta ----------
+
+async def test_create_sets_rating_and_totals(box):
+    await _create(_review(4.0, cleanliness=5.0))
+    await _create(_review(5.0))
+
+    assert box.doc["total_reviews"] == 2
+    assert box.doc["rating"] == 4.5
+    assert box.doc["rating_stats"]["stars"] == {"4": 1, "5": 1}
+    assert box.doc["rating_stats"]["aspect_sums"] == {"cleanliness": 5.0}
+    assert box.doc["rating_stats"]["aspect_counts"] == {"cleanliness": 1}
+    assert box.invalidated == [BOX_ID, BOX_ID]
+
+    # The stored stats load back into the model
+    assert RatingStats(**box.doc["rating_stats"]).count == 2
+
+
+async def test_update_moves_the_star_bucket(box):
+    review = _review(4.0, cleanliness=5.0)
+    await _create(review)
+    await _create(_review(2.0))
+
+    await _update(review, rating=5.0)
+
+    assert box.doc["rating"] == 3.5
+    assert box.doc["total_reviews"] == 2
+    assert box.doc["rating_stats"]["stars"] == {"2": 1, "4": 0, "5": 1}
+    # Unchanged aspects cancel out and are left alone
+    assert "rating_stats.aspect_sums.cleanliness" not in box.updates[-1][0]["$set"]
+
+
+async def test_update_removing_an_aspect(box):
+    review = _review(4.0, cleanliness=5.0, facilities=3.0)
+    await _create(review)
+
+    await _update(review, facilities_rating=None)
+
+    stats = box.doc["rating_stats"]
+    assert stats["aspect_counts"] == {"cleanliness": 1, "facilities": 0}
+    assert stats["aspect_sums"] == {"cleanliness": 5.0, "facilities": 0.0}
+    assert box.doc["rating"] == 4.0
+
+
+async def test_update_changing_an_aspect(box):
+    review = _review(4.0, value_for_money=2.0)
+    await _create(review)
+
+    await _update(review, value_for_money_rating=5.0)
+
+    assert box.doc["rating_stats"]["aspect_sums"] == {"value_for_money": 5.0}
+    assert box.doc["rating_stats"]["aspect_counts"] == {"value_for_money": 1}
+
+
+async def test_delete_last_review_resets_rating(box):
+    review = _review(3.0, staff_behavior=4.0)
+    await _create(review)
+
+    await _delete(review)
+
+    stats = box.doc["rating_stats"]
+    assert box.doc["total_reviews"] == 0
+    assert box.doc["rating"] == 0.0
+    assert stats["stars"] == {"3": 0}
+    assert stats["aspect_sums"] == {"staff_behavior": 0.0}
+    assert stats["aspect_counts"] == {"staff_behavior": 0}
+
+
+async def test_delete_keeps_other_reviews(box):
+    kept = _review(5.0, cleanliness=4.0)
+    removed = _review(2.0, cleanliness=1.0)
+    await _create(kept)
+    await _create(removed)
+
+    await _delete(removed)
+
+    assert box.doc["rating"] == 5.0
+    assert box.doc["total_reviews"] == 1
+    assert box.doc["rating_stats"]["aspect_sums"] == {"cleanliness": 4.0}
+
+
+async def test_rating_is_rounded_to_one_place(box):
+    for rating in (5.0, 4.0, 4.0):
+        await _create(_review(rating))
+
+    assert box.doc["rating"] == 4.3
+
+
+async def test_no_change_skips_the_write(box):
+    review = _review(4.0)
+
+    await _update(review, title="Great turf")
+    await _create(Review.model_construct(rating=5.0, is_visible=False))
+
+    assert box.updates == []
+    assert box.invalidated == []
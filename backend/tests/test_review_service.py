@@ -0,0 +1,152 @@
+"""
+Review creates, edits and deletes: the box rating delta follows what the write actually changed
+"""
+
+import asyncio
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.cricket_box import CricketBox
+from app.models.review import Review
+from app.models.user import User
+from app.schemas.review import ReviewCreate, ReviewUpdate
+from app.services.review_service import ReviewService
+
+
+BOX_ID = "box1"
+
+
+@pytest.fixture
+def applied(monkeypatch):
+    """Net rating_stats change applied to the box"""
+    total = Counter()
+
+    async def apply_rating_delta(box_id, delta):
+        assert box_id == BOX_ID
+        total.update(delta)
+
+    monkeypatch.setattr(ReviewService, "_apply_rating_delta", staticmethod(apply_rating_delta))
+    return total
+
+
+@pytest.fixture
+def racing_reads(monkeypatch):
+    """Concurrent requests both read the review before either writes"""
+    get = Review.get
+
+    async def get_then_yield(*args, **kwargs):
+        review = await get(*args, **kwargs)
+        await asyncio.sleep(0)
+        return review
+
+    monkeypatch.setattr(Review, "get", get_then_yield)
+
+
+async def _review(rating=4.0, **fields):
+    review = Review(user_id="player", user_name="Player", cricket_box_id=BOX_ID, rating=rating, **fields)
+    return await review.insert()
+
+
+def _net(total):
+    return {field: n for field, n in total.items() if n}
+
+
+async def test_update_moves_the_rating(db, applied):
+    review = await _review(4.0, cleanliness_rating=3.0)
+
+    response = await ReviewService.update_review(str(review.id), "player", ReviewUpdate(rating=2.0))
+
+    assert response.rating == 2.0
+    assert (await Review.get(review.id)).rating == 2.0
+    assert _net(applied) == {"rating_sum": -2.0, "stars.4": -1, "stars.2": 1}
+
+
+async def test_concurrent_updates_net_to_the_final_rating(db, applied, racing_reads):
+    review = await _review(4.0)
+
+    await asyncio.gather(
+        ReviewService.update_review(str(review.id), "player", ReviewUpdate(rating=2.0)),
+        ReviewService.update_review(str(review.id), "player", ReviewUpdate(rating=5.0)),
+    )
+
+    final = (await Review.get(review.id)).rating
+    assert _net(applied) == _net(Counter({
+        "rating_sum": final - 4.0,
+        "stars.4": -1,
+        f"stars.{int(final)}": 1,
+    }))
+
+
+async def test_text_only_update_leaves_the_rating(db, applied):
+    review = await _review(4.0)
+
+    await ReviewService.update_review(str(review.id), "player", ReviewUpdate(title="Great turf"))
+
+    assert _net(applied) == {}
+    assert (await Review.get(review.id)).title == "Great turf"
+
+
+async def test_delete_takes_the_review_off_once(db, applied, racing_reads):
+    review = await _review(4.0, facilities_rating=5.0)
+
+    results = await asyncio.gather(
+        ReviewService.delete_review(str(review.id), "player"),
+        ReviewService.delete_review(str(review.id), "player"),
+        return_exceptions=True,
+    )
+
+    assert sum(isinstance(r, HTTPException) and r.status_code == 404 for r in results) == 1
+    assert _net(applied) == {
+        "count": -1,
+        "rating_sum": -4.0,
+        "stars.4": -1,
+        "aspect_sums.facilities": -5.0,
+        "aspect_counts.facilities": -1,
+    }
+    assert await Review.get(review.id) is None
+
+
+async def test_update_after_delete_changes_nothing(db, applied):
+    review = await _review(4.0)
+    await ReviewService.delete_review(str(review.id), "player")
+    applied.clear()
+
+    with pytest.raises(HTTPException) as error:
+        await ReviewService.update_review(str(review.id), "player", ReviewUpdate(rating=1.0))
+
+    assert error.value.status_code == 404
+    assert _net(applied) == {}
+
+
+async def test_only_the_author_can_change_a_review(db, applied):
+    review = await _review(4.0)
+
+    with pytest.raises(HTTPException) as error:
+        await ReviewService.delete_review(str(review.id), "someone_else")
+
+    assert error.value.status_code == 403
+    assert _net(applied) == {}
+
+
+async def test_concurrent_create_adds_one_review(db, applied, monkeypatch):
+    async def found(*args, **kwargs):
+        return SimpleNamespace(name="Player", profile_photo=None)
+
+    async def not_found(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(User, "get", found)
+    monkeypatch.setattr(CricketBox, "get", found)
+    await ReviewService.create_review("player", ReviewCreate(cricket_box_id=BOX_ID, rating=4.0))
+
+    # The second request's duplicate check ran before the first inserted
+    monkeypatch.setattr(Review, "find_one", not_found)
+    with pytest.raises(HTTPException) as error:
+        await ReviewService.create_review("player", ReviewCreate(cricket_box_id=BOX_ID, rating=2.0))
+
+    assert error.value.status_code == 400
+    assert await Review.find(Review.cricket_box_id == BOX_ID).count() == 1
+    assert _net(applied) == {"count": 1, "rating_sum": 4.0, "stars.4": 1}
@@ -0,0 +1,61 @@
+"""
+Booking slot units: derivation and the overlap rule behind active_slot_units_unique
+"""
+
+from app.models.booking import Booking, SLOT_UNIT_MINUTES, time_to_minutes
+
+
+def _units(start_time, end_time):
+    booking = Booking.model_construct(start_time=start_time, end_time=end_time)
+    booking.sync_slot_range()
+    return booking
+
+
+def _overlap(a, b):
+    """What the unique index rejects: any unit held by both bookings"""
+    return bool(set(_units(*a).slot_units) & set(_units(*b).slot_units))
+
+
+def test_time_to_minutes():
+    assert time_to_minutes("00:00") == 0
+    assert time_to_minutes("18:30") == 1110
+    assert time_to_minutes("23:55") == 1435
+
+
+def test_minute_range_is_derived():
+    booking = _units("18:00", "20:00")
+
+    assert (booking.start_minute, booking.end_minute) == (1080, 1200)
+
+
+def test_multi_slot_booking_covers_every_unit():
+    booking = _units("18:00", "20:00")
+
+    assert booking.slot_units == list(range(1080 // SLOT_UNIT_MINUTES, 1200 // SLOT_UNIT_MINUTES))
+    assert len(booking.slot_units) == 120 // SLOT_UNIT_MINUTES
+
+
+def test_unaligned_range_rounds_outwards():
+    booking = _units("18:02", "18:13")
+
+    # 18:00-18:05, 18:05-18:10 and 18:10-18:15 are all touched
+    assert booking.slot_units == [216, 217, 218]
+
+
+def test_units_follow_a_time_change():
+    booking = _units("18:00", "19:00")
+    booking.start_time, booking.end_time = "06:00", "06:30"
+    booking.sync_slot_range()
+
+    assert booking.slot_units == list(range(72, 78))
+
+
+def test_overlapping_bookings_share_a_unit():
+    assert _overlap(("18:00", "20:00"), ("19:00", "21:00"))
+    assert _overlap(("18:00", "20:00"), ("18:30", "19:00"))
+    assert _overlap(("18:00", "18:32"), ("18:31", "19:00"))
+
+
+def test_back_to_back_bookings_do_not_overlap():
+    assert not _overlap(("18:00", "19:00"), ("19:00", "20:00"))
+    assert not _overlap(("06:00", "07:30"), ("07:30", "09:00"))
@@ -0,0 +1,132 @@
+"""
+Waitlist: freed slots go to the oldest waiting player whose whole range is free
+"""
+
+import uuid
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.models.booking import Booking, BookingStatus
+from app.models.cricket_box import CricketBox
+from app.models.notification import Notification, NotificationType
+from app.models.user import User
+from app.models.waitlist import WaitlistEntry, WaitlistStatus
+from app.schemas.booking import WaitlistJoin
+from app.services.booking_service import BookingService
+
+
+DAY = date.today() + timedelta(days=7)
+
+
+@pytest.fixture
+async def box(db):
+    box = CricketBox(
+        name="Green Turf", address="Vesu Main Road", area="Vesu", pincode="395007",
+        price_per_hour=800.0, owner_id="owner",
+    )
+    return await box.insert()
+
+
+async def _booking(box, user_id, start="18:00", end="19:00", status=BookingStatus.CONFIRMED, hold_minutes=None):
+    booking = Booking(
+        booking_number=f"CBK-{uuid.uuid4().hex[:6]}",
+        user_id=user_id,
+        cricket_box_id=str(box.id),
+        owner_id="owner",
+        booking_date=DAY,
+        start_time=start,
+        end_time=end,
+        base_amount=800.0,
+        total_amount=800.0,
+        booking_status=status,
+        hold_expires_at=datetime.utcnow() + timedelta(minutes=hold_minutes) if hold_minutes is not None else None,
+    )
+    return await booking.insert()
+
+
+async def _waiting(box, user_id, start="18:00", end="19:00", minutes_ago=10):
+    entry = WaitlistEntry(
+        user_id=user_id,
+        cricket_box_id=str(box.id),
+        booking_date=DAY,
+        start_time=start,
+        end_time=end,
+        created_at=datetime.utcnow() - timedelta(minutes=minutes_ago),
+    )
+    return await entry.insert()
+
+
+async def test_cancellation_promotes_the_oldest_waiting_player(box):
+    booking = await _booking(box, "holder")
+    first = await _waiting(box, "first", minutes_ago=20)
+    second = await _waiting(box, "second", minutes_ago=10)
+
+    await BookingService.cancel_booking(str(booking.id), "holder", "Rain")
+
+    first = await WaitlistEntry.get(first.id)
+    assert first.status == WaitlistStatus.PROMOTED
+    hold = await Booking.get(first.booking_id)
+    assert hold.user_id == "first"
+    assert hold.booking_status == BookingStatus.PENDING
+    assert hold.hold_expires_at > datetime.utcnow() + timedelta(minutes=settings.WAITLIST_HOLD_MINUTES - 1)
+
+    assert (await WaitlistEntry.get(second.id)).status == WaitlistStatus.WAITING
+    notification = await Notification.find_one(Notification.user_id == "first")
+    assert notification.notification_type == NotificationType.WAITLIST_PROMOTED
+
+
+async def test_ranges_still_partly_taken_are_skipped(box):
+    booking = await _booking(box, "holder", "18:00", "19:00")
+    await _booking(box, "other", "19:00", "20:00")
+    wide = await _waiting(box, "wide", "18:00", "20:00", minutes_ago=20)
+    narrow = await _waiting(box, "narrow", "18:00", "19:00", minutes_ago=10)
+
+    await BookingService.cancel_booking(str(booking.id), "holder", "Rain")
+
+    assert (await WaitlistEntry.get(wide.id)).status == WaitlistStatus.WAITING
+    assert (await WaitlistEntry.get(narrow.id)).status == WaitlistStatus.PROMOTED
+
+
+async def test_lapsed_holds_promote_on_expiry(box):
+    await _booking(box, "holder", status=BookingStatus.PENDING, hold_minutes=-1)
+    entry = await _waiting(box, "waiter")
+
+    assert await BookingService.expire_holds() == 1
+
+    entry = await WaitlistEntry.get(entry.id)
+    assert entry.status == WaitlistStatus.PROMOTED
+    assert (await Booking.get(entry.booking_id)).booking_status == BookingStatus.PENDING
+
+
+async def test_players_who_left_are_not_promoted(box):
+    booking = await _booking(box, "holder")
+    entry = await _waiting(box, "waiter")
+
+    await BookingService.leave_waitlist(str(entry.id), "waiter")
+    await BookingService.cancel_booking(str(booking.id), "holder", "Rain")
+
+    assert (await WaitlistEntry.get(entry.id)).status == WaitlistStatus.CANCELLED
+    assert await Booking.find(Booking.user_id == "waiter").count() == 0
+
+
+async def test_join_needs_a_taken_slot_and_only_once(box, monkeypatch):
+    async def player(user_id):
+        return SimpleNamespace(name="Waiter", phone=None)
+
+    monkeypatch.setattr(User, "get", player)
+    request = WaitlistJoin(cricket_box_id=str(box.id), booking_date=DAY, start_time="18:00", end_time="19:00")
+
+    with pytest.raises(HTTPException) as error:
+        await BookingService.join_waitlist("waiter", request)
+    assert "book it directly" in error.value.detail
+
+    await _booking(box, "holder")
+    await BookingService.join_waitlist("waiter", request)
+
+    with pytest.raises(HTTPException) as error:
+        await BookingService.join_waitlist("waiter", request)
+    assert "already on the waitlist" in error.value.detail